@@ -0,0 +1,103 @@
+import copy
+import random
+import time
+
+import numpy as np
+
+from batch.stopping import Extinction, PopulationExplosion, StopMonitor
+from core.batched import BatchedWorlds
+from core.sim_config import SimConfig
+from core.world import World
+from evolution.genome import TRAIT_NAMES
+
+
+def default_stop_conditions(explosion_limit=None):
+    """Extinction of all agents, plus an optional population explosion limit"""
+    conditions = [Extinction(("Prey", "Predator"))]
+    if explosion_limit is not None:
+        conditions.append(PopulationExplosion(explosion_limit))
+    return conditions
+
+
+def run_headless(params=None, seed=0, max_steps=2000, stop_conditions=None):
+    """
+    Run one headless world until a stop condition fires or the step budget
+    runs out, and summarise it.
+
+    params:          SimConfig overrides (e.g. {"repro_chance": 0.5})
+    max_steps:       hard step budget
+    stop_conditions: batch.stopping conditions checked after every step
+                     (default: stop when every agent is dead)
+    """
+    params = dict(params or {})
+    random.seed(seed)
+    np.random.seed(seed)
+
+    config = SimConfig.from_module(**params)
+    world = World(config.world_width, config.world_height, config)
+    world.populate(config.n_plants, config.n_prey, config.n_predators)
+
+    monitor = StopMonitor(default_stop_conditions() if stop_conditions is None else stop_conditions)
+    start = time.perf_counter()
+    while world.step_count < max_steps:
+        world.step()
+        if monitor.update(world):
+            break
+
+    return summarise(world, monitor, time.perf_counter() - start)
+
+
+def run_batched(params_list, seeds, max_steps=2000, stop_conditions=None):
+    """
+    Run one world per (params, seed) together in a BatchedWorlds, each until
+    its own stop condition fires or the step budget runs out; returns one
+    summarise() row per world, in order. Worlds that stop are frozen while
+    the rest go on. Results match run_headless statistically (see
+    core.batched), not step for step.
+    """
+    configs = [SimConfig.from_module(**dict(params or {})) for params in params_list]
+    batch = BatchedWorlds(len(configs), configs, seeds)
+    batch.populate()
+
+    conditions = default_stop_conditions() if stop_conditions is None else stop_conditions
+    views = batch.views()
+    monitors = [StopMonitor(copy.deepcopy(conditions)) for _ in views]
+    elapsed = [0.0] * len(views)
+    running = list(range(len(views))) if max_steps > 0 else []
+    while running:
+        start = time.perf_counter()
+        batch.step()
+        # The step's time is split evenly between the worlds it advanced
+        share = (time.perf_counter() - start) / len(running)
+        still = []
+        for i in running:
+            elapsed[i] += share
+            if monitors[i].update(views[i]) or views[i].step_count >= max_steps:
+                batch.active[i] = False
+            else:
+                still.append(i)
+        running = still
+
+    return [summarise(view, monitor, t) for view, monitor, t in zip(views, monitors, elapsed)]
+
+
+def summarise(world, monitor, elapsed):
+    """Flat result row: why and when it stopped, final populations and trait means"""
+    extinct = monitor.reason == "extinction"
+    row = {
+        "stop_reason": monitor.reason,
+        "stop_detail": monitor.detail,
+        "steps": world.step_count,
+        "survival_steps": world.step_count if extinct else None,  # Step the agents died out (empty if they didn't)
+        "extinct": extinct,
+        "wall_time": round(elapsed, 3),
+    }
+    for kind in ("Plant", "Prey", "Predator"):
+        row[f"final_{kind.lower()}"] = world.population(kind)
+    # Fixed columns: traits of extinct species are left empty
+    averages = world.compute_trait_averages()
+    for kind in ("Prey", "Predator"):
+        traits = averages.get(kind, {})
+        for trait in TRAIT_NAMES:
+            row[f"{kind.lower()}_{trait}"] = traits.get(trait)
+    return row
@@ -0,0 +1,202 @@
+"""
+Stop conditions for headless runs.
+
+Each condition is fed the world once per step and keeps its own small
+incremental state, so checking it costs O(1) amortised per step (trait
+convergence samples every `interval` steps). Conditions are reset at the
+start of every run, so one list can be reused across runs.
+"""
+from collections import deque
+
+
+class StopCondition:
+    """Base class: update() returns True once the run should stop"""
+    reason = "stopped"
+
+    def reset(self):
+        self.detail = ""
+
+    def update(self, world):
+        raise NotImplementedError
+
+
+def _population(world, species):
+    return sum(world.population(kind) for kind in species)
+
+
+class Extinction(StopCondition):
+    """Stop when every listed species has died out"""
+    reason = "extinction"
+
+    def __init__(self, species=("Prey", "Predator")):
+        self.species = tuple(species)
+        self.reset()
+
+    def update(self, world):
+        if _population(world, self.species) == 0:
+            self.detail = f"{'+'.join(self.species)} extinct at step {world.step_count}"
+            return True
+        return False
+
+
+class PopulationExplosion(StopCondition):
+    """Stop when the listed species together exceed a population limit"""
+    reason = "explosion"
+
+    def __init__(self, limit, species=("Prey", "Predator")):
+        self.limit = limit
+        self.species = tuple(species)
+        self.reset()
+
+    def update(self, world):
+        population = _population(world, self.species)
+        if population > self.limit:
+            self.detail = f"population {population} > {self.limit}"
+            return True
+        return False
+
+
+class _WindowRange:
+    """Sliding-window min/max/mean with monotonic deques (O(1) amortised)"""
+
+    def __init__(self, window):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.values = deque()
+        self.maxima = deque()
+        self.minima = deque()
+        self.total = 0.0
+
+    def push(self, value):
+        self.values.append(value)
+        self.total += value
+        while self.maxima and self.maxima[-1] < value:
+            self.maxima.pop()
+        self.maxima.append(value)
+        while self.minima and self.minima[-1] > value:
+            self.minima.pop()
+        self.minima.append(value)
+
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.total -= old
+            if self.maxima[0] == old:
+                self.maxima.popleft()
+            if self.minima[0] == old:
+                self.minima.popleft()
+
+    @property
+    def full(self):
+        return len(self.values) >= self.window
+
+    @property
+    def spread(self):
+        return self.maxima[0] - self.minima[0]
+
+    @property
+    def mean(self):
+        return self.total / len(self.values)
+
+
+class PopulationPlateau(StopCondition):
+    """
+    Stop when a population has stayed within `tolerance` (relative to its
+    window mean) for `window` consecutive steps, e.g. prey pinned at
+    MAX_PREY in a stable equilibrium.
+    """
+    reason = "plateau"
+
+    def __init__(self, window=300, tolerance=0.05, species=("Prey",), min_population=1):
+        self.species = tuple(species)
+        self.tolerance = tolerance
+        self.min_population = min_population
+        self._range = _WindowRange(window)
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._range.reset()
+
+    def update(self, world):
+        self._range.push(_population(world, self.species))
+        if not self._range.full:
+            return False
+        mean = self._range.mean
+        if mean >= self.min_population and self._range.spread <= self.tolerance * mean:
+            self.detail = (f"{'+'.join(self.species)} within {self._range.spread} of "
+                           f"{mean:.1f} for {self._range.window} steps")
+            return True
+        return False
+
+
+class TraitConvergence(StopCondition):
+    """
+    Stop when every trait mean of a species has drifted less than
+    `tolerance` over the last `window` steps. Trait means are sampled every
+    `interval` steps.
+    """
+    reason = "converged"
+
+    def __init__(self, window=500, tolerance=0.01, species="Prey", interval=10):
+        self.window = window
+        self.tolerance = tolerance
+        self.species = species
+        self.interval = interval
+        self._ranges = {}
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._ranges = {}
+
+    def update(self, world):
+        if world.step_count % self.interval:
+            return False
+        means = world.compute_trait_averages().get(self.species)
+        if not means:
+            self._ranges = {}  # Species gone: start over if it comes back
+            return False
+
+        samples = max(2, self.window // self.interval)
+        for trait, value in means.items():
+            if trait not in self._ranges:
+                self._ranges[trait] = _WindowRange(samples)
+            self._ranges[trait].push(value)
+
+        ranges = self._ranges.values()
+        if all(r.full for r in ranges):
+            drift = max(r.spread for r in ranges)
+            if drift <= self.tolerance:
+                self.detail = f"{self.species} trait means moved <= {drift:.4f} over {self.window} steps"
+                return True
+        return False
+
+
+class StopMonitor:
+    """Evaluates conditions in order; remembers the first that fired"""
+
+    def __init__(self, conditions):
+        self.conditions = list(conditions)
+        self.reset()
+
+    def reset(self):
+        self.fired = None
+        for condition in self.conditions:
+            condition.reset()
+
+    def update(self, world):
+        for condition in self.conditions:
+            if condition.update(world):
+                self.fired = condition
+                return True
+        return False
+
+    @property
+    def reason(self):
+        return self.fired.reason if self.fired else "max_steps"
+
+    @property
+    def detail(self):
+        return self.fired.detail if self.fired else ""
@@ -0,0 +1,265 @@
+"""
+Parameter sweep driver.
+
+Runs headless worlds for every point of a design (grid, random or Latin
+hypercube) in parallel, one row per run appended to a CSV results table.
+The table doubles as the checkpoint: rerunning the same command skips runs
+that are already in it.
+
+Examples (from the repository root):
+    python -m batch.sweep grid repro_chance=0.25,0.5,1 energy_per_step=0.2,0.3 -o sweep.csv
+    python -m batch.sweep lhs 64 repro_distance=10:40 plant_spread_chance=0.02:0.2 -o lhs.csv
+    python -m batch.sweep lhs 512 repro_chance=0.2:1 --batch 64 -o ensemble.csv
+
+With --batch N each worker steps N runs together in one BatchedWorlds
+(see core.batched), which is much faster for large ensembles of small
+worlds but only matches single-world runs statistically.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from dataclasses import fields
+from multiprocessing import Pool
+
+import numpy as np
+
+from batch.runner import default_stop_conditions, run_batched, run_headless
+from batch.stopping import PopulationPlateau, TraitConvergence
+from core.sim_config import SimConfig
+
+# Parameters a sweep usually explores (any SimConfig field is accepted)
+SWEEPABLE = (
+    "repro_chance",
+    "repro_distance",
+    "energy_per_step",
+    "plant_spread_chance",
+    "mutation_rate",
+    "mutation_strength",
+)
+
+
+# === Designs ===
+
+def grid_design(values):
+    """Full factorial design from {name: [values]}"""
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values[n] for n in names))]
+
+
+def random_design(ranges, n, seed=0):
+    """n uniform random points from {name: (low, high)}"""
+    rng = np.random.default_rng(seed)
+    return [
+        {name: float(rng.uniform(low, high)) for name, (low, high) in ranges.items()}
+        for _ in range(n)
+    ]
+
+
+def latin_hypercube_design(ranges, n, seed=0):
+    """
+    n points from {name: (low, high)} with every parameter's range split
+    into n strata, each used exactly once.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in ranges.items():
+        strata = (rng.permutation(n) + rng.uniform(size=n)) / n
+        columns[name] = low + strata * (high - low)
+    return [{name: float(columns[name][i]) for name in ranges} for i in range(n)]
+
+
+# === Runs ===
+
+def build_runs(design, replicates=1, base_seed=0):
+    """Expand a design into runs with stable ids and seeds"""
+    runs = []
+    for point_id, params in enumerate(design):
+        for replicate in range(replicates):
+            run_id = point_id * replicates + replicate
+            runs.append({
+                "run_id": run_id,
+                "point_id": point_id,
+                "replicate": replicate,
+                "seed": base_seed + run_id,
+                "params": params,
+            })
+    return runs
+
+
+def _row(run, result):
+    row = {key: run[key] for key in ("run_id", "point_id", "replicate", "seed")}
+    row.update(run["params"])
+    row.update(result)
+    return row
+
+
+def _execute(job):
+    run, max_steps, stop_conditions = job
+    result = run_headless(run["params"], seed=run["seed"], max_steps=max_steps,
+                          stop_conditions=stop_conditions)
+    return [_row(run, result)]
+
+
+def _execute_batch(job):
+    runs, max_steps, stop_conditions = job
+    results = run_batched([run["params"] for run in runs], [run["seed"] for run in runs],
+                          max_steps=max_steps, stop_conditions=stop_conditions)
+    return [_row(run, result) for run, result in zip(runs, results)]
+
+
+def completed_run_ids(path):
+    """Run ids already present in a results table (the checkpoint)"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as f:
+        return {int(row["run_id"]) for row in csv.DictReader(f)}
+
+
+def run_sweep(runs, output, max_steps=2000, stop_conditions=None, workers=None, batch=None):
+    """
+    Run every run not yet in `output`, appending rows as they finish.
+    Each run gets its own copy of `stop_conditions` (see batch.stopping).
+    With `batch`, pending runs go to the workers in chunks of that many,
+    stepped together by batch.runner.run_batched.
+    Returns the number of runs executed.
+    """
+    done = completed_run_ids(output)
+    pending = [run for run in runs if run["run_id"] not in done]
+    if not pending:
+        return 0
+
+    workers = workers or os.cpu_count() or 1
+    if batch:
+        execute = _execute_batch
+        jobs = [(pending[i:i + batch], max_steps, stop_conditions) for i in range(0, len(pending), batch)]
+    else:
+        execute = _execute
+        jobs = [(run, max_steps, stop_conditions) for run in pending]
+
+    with open(output, "a", newline="") as f, Pool(workers) as pool:
+        writer = None
+        finished = len(done)
+        for rows in pool.imap_unordered(execute, jobs):
+            for row in rows:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    if not done:
+                        writer.writeheader()
+                writer.writerow(row)
+                finished += 1
+                print(f"[{finished}/{len(runs)}] run {row['run_id']}: "
+                      f"{row['stop_reason']} after {row['steps']} steps", flush=True)
+            f.flush()
+    return len(pending)
+
+
+# === CLI ===
+
+def _parse_values(spec):
+    name, _, values = spec.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"Expected name=values, got {spec!r}")
+    return name, values
+
+
+def _check_names(names):
+    valid = {f for f in SimConfig.__dataclass_fields__ if SimConfig.__dataclass_fields__[f].init}
+    unknown = [n for n in names if n not in valid]
+    if unknown:
+        raise SystemExit(f"Unknown parameters: {', '.join(unknown)} (sweepable: {', '.join(SWEEPABLE)})")
+
+
+def _convert(name, value):
+    """A parameter value as its SimConfig field's type (int fields rounded)"""
+    kind = {f.name: f.type for f in fields(SimConfig)}[name]
+    if kind is int:
+        return int(round(float(value)))
+    if kind is float:
+        return float(value)
+    return kind(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EvoSim parameter sweep")
+    parser.add_argument("design", choices=("grid", "random", "lhs"))
+    parser.add_argument("args", nargs="+",
+                        help="grid: name=v1,v2,...; random/lhs: N name=low:high ...")
+    parser.add_argument("-o", "--output", default="sweep_results.csv")
+    parser.add_argument("--replicates", type=int, default=1)
+    parser.add_argument("--steps", type=int, default=2000, help="max steps per run")
+    parser.add_argument("--explosion-limit", type=int, default=None,
+                        help="stop a run once prey + predators exceed this")
+    parser.add_argument("--plateau", type=int, metavar="WINDOW", default=None,
+                        help="stop once the prey count stays flat for WINDOW steps")
+    parser.add_argument("--plateau-tolerance", type=float, default=0.05)
+    parser.add_argument("--converge", type=int, metavar="WINDOW", default=None,
+                        help="stop once prey trait means stop drifting for WINDOW steps")
+    parser.add_argument("--converge-tolerance", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--batch", type=int, metavar="N", default=None,
+                        help="step N runs together per worker (core.batched)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    specs = args.args
+    if args.design == "grid":
+        values = {}
+        for spec in specs:
+            name, raw = _parse_values(spec)
+            values[name] = raw.split(",")
+        _check_names(values)
+        design = grid_design({name: [_convert(name, v) for v in raw] for name, raw in values.items()})
+    else:
+        n = int(specs[0])
+        ranges = {}
+        for spec in specs[1:]:
+            name, raw = _parse_values(spec)
+            low, high = (float(v) for v in raw.split(":"))
+            ranges[name] = (low, high)
+        _check_names(ranges)
+        make = random_design if args.design == "random" else latin_hypercube_design
+        design = [{name: _convert(name, value) for name, value in point.items()}
+                  for point in make(ranges, n, seed=args.seed)]
+
+    # Record the design next to the results so a resumed sweep can't
+    # silently mix two different designs
+    manifest_path = args.output + ".design.json"
+    manifest = {"design": args.design, "points": design, "replicates": args.replicates,
+                "seed": args.seed, "steps": args.steps}
+    if args.batch:
+        manifest["batch"] = args.batch  # A different engine: don't mix with single-world rows
+    # Runs stopped by other conditions aren't comparable either
+    stop = {}
+    if args.explosion_limit is not None:
+        stop["explosion_limit"] = args.explosion_limit
+    if args.plateau:
+        stop.update(plateau=args.plateau, plateau_tolerance=args.plateau_tolerance)
+    if args.converge:
+        stop.update(converge=args.converge, converge_tolerance=args.converge_tolerance)
+    if stop:
+        manifest["stop"] = stop
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) != json.loads(json.dumps(manifest)):
+                raise SystemExit(f"{args.output} belongs to a different sweep ({manifest_path})")
+    else:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    stop_conditions = default_stop_conditions(args.explosion_limit)
+    if args.plateau:
+        stop_conditions.append(PopulationPlateau(args.plateau, args.plateau_tolerance))
+    if args.converge:
+        stop_conditions.append(TraitConvergence(args.converge, args.converge_tolerance))
+
+    runs = build_runs(design, args.replicates, args.seed)
+    executed = run_sweep(runs, args.output, args.steps, stop_conditions, args.workers, args.batch)
+    print(f"{executed} runs executed, results in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
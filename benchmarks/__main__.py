@@ -0,0 +1,58 @@
+"""
+Benchmark suite for simulation scaling.
+
+Usage (from the repository root):
+    python -m benchmarks                      # full grid + microbenchmarks
+    python -m benchmarks --quick              # small grid, fewer steps
+    python -m benchmarks -o new.json --compare baseline.json
+"""
+import argparse
+import sys
+
+from benchmarks.bench_ensemble import run_ensemble
+from benchmarks.bench_scaling import run_scaling
+from benchmarks.common import (
+    compare_results, environment_info, load_results, print_comparison, write_results,
+)
+from benchmarks.microbench import run_micro
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EvoSim benchmark suite")
+    parser.add_argument("-o", "--output", default="bench_results.json",
+                        help="where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="relative slowdown tolerated before flagging a regression")
+    parser.add_argument("--steps", type=int, default=200, help="steps per scaling case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="only the small cases")
+    parser.add_argument("--skip-scaling", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-ensemble", action="store_true")
+    args = parser.parse_args(argv)
+
+    steps = min(args.steps, 50) if args.quick else args.steps
+    cases = []
+    if not args.skip_scaling:
+        cases += run_scaling(steps=steps, seed=args.seed, quick=args.quick)
+    if not args.skip_micro:
+        cases += run_micro(seed=args.seed)
+    if not args.skip_ensemble:
+        cases += run_ensemble(steps=steps, seed=args.seed, quick=args.quick)
+
+    results = {"environment": environment_info(), "cases": cases}
+    write_results(args.output, results)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        rows = compare_results(results, load_results(args.compare), args.tolerance)
+        print_comparison(rows)
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import time
+
+from benchmarks.common import make_world
+from core.batched import BatchedWorlds
+from core.sim_config import SimConfig
+
+# Worlds per batch; sequential World runs are timed on a few worlds, since
+# their rate doesn't depend on how many there are
+BATCH_SIZES = (16, 64, 256)
+QUICK_BATCH_SIZES = (16,)
+SEQUENTIAL_WORLDS = 4
+
+
+def run_sequential(n_worlds, steps, seed):
+    """Default-sized Worlds stepped one after the other"""
+    config = SimConfig.from_module()
+    elapsed = 0.0
+    for i in range(n_worlds):
+        world = make_world(config.world_width, config.world_height, config.n_plants,
+                           config.n_prey, config.n_predators, seed + i)
+        start = time.perf_counter()
+        for _ in range(steps):
+            world.step()
+        elapsed += time.perf_counter() - start
+    return {
+        "name": "ensemble/sequential",
+        "worlds": n_worlds,
+        "steps": steps,
+        "seed": seed,
+        "steps_per_sec": n_worlds * steps / elapsed,  # World steps, summed over worlds
+    }
+
+
+def run_batched(n_worlds, steps, seed):
+    """The same worlds stepped together by one BatchedWorlds"""
+    batch = BatchedWorlds(n_worlds, seeds=range(seed, seed + n_worlds))
+    batch.populate()
+    start = time.perf_counter()
+    for _ in range(steps):
+        batch.step()
+    elapsed = time.perf_counter() - start
+    return {
+        "name": f"ensemble/batched_{n_worlds}",
+        "worlds": n_worlds,
+        "steps": steps,
+        "seed": seed,
+        "steps_per_sec": n_worlds * steps / elapsed,
+        "final_population": {kind: int(counts.sum()) for kind, counts in batch.populations().items()},
+    }
+
+
+def run_ensemble(steps=200, seed=0, quick=False):
+    """Aggregate world-steps per second of many small worlds, sequential vs batched"""
+    results = [run_sequential(SEQUENTIAL_WORLDS, steps, seed)]
+    for n_worlds in QUICK_BATCH_SIZES if quick else BATCH_SIZES:
+        results.append(run_batched(n_worlds, steps, seed))
+    base = results[0]["steps_per_sec"]
+    for result in results:
+        print(f"{result['name']:28s} {result['steps_per_sec']:8.1f} world-steps/s  "
+              f"x{result['steps_per_sec'] / base:5.1f}")
+    return results
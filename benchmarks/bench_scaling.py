@@ -0,0 +1,91 @@
+import time
+import tracemalloc
+
+from core import config
+from benchmarks.common import make_world
+
+# (name, width, height, n_plants, n_prey, n_predators); density is kept
+# constant so cost growth reflects world size rather than crowding.
+SCALING_GRID = [
+    ("small", 800, 500, 1000, 10, 0),
+    ("small_predators", 800, 500, 1000, 40, 4),
+    ("medium", 1600, 1000, 4000, 40, 4),
+    ("large", 3200, 2000, 16000, 160, 16),
+]
+
+QUICK_GRID = SCALING_GRID[:2]
+
+
+def _population_caps(width, height):
+    # Scale the population caps with the world area so larger worlds are
+    # not throttled by the defaults tuned for the default world size
+    scale = max(1.0, (width * height) / (config.WORLD_WIDTH * config.WORLD_HEIGHT))
+    return {
+        "max_plants": int(config.MAX_PLANTS * scale),
+        "max_prey": int(config.MAX_PREY * scale),
+    }
+
+
+def run_case(name, width, height, n_plants, n_prey, n_predators, steps, seed, memory_steps):
+    """
+    Run one scaling case three times from the same seed:
+    a clean timed run, a profiled run and a short tracemalloc run.
+    """
+    caps = _population_caps(width, height)
+    result = {
+        "name": f"scaling/{name}",
+        "world": [width, height],
+        "n_plants": n_plants,
+        "n_prey": n_prey,
+        "n_predators": n_predators,
+        "steps": steps,
+        "seed": seed,
+    }
+
+    def build():
+        return make_world(width, height, n_plants, n_prey, n_predators, seed, **caps)
+
+    # 1. Raw throughput
+    world = build()
+    start = time.perf_counter()
+    for _ in range(steps):
+        world.step()
+    elapsed = time.perf_counter() - start
+    result["steps_per_sec"] = steps / elapsed
+    result["final_population"] = {
+        kind: len(group) for kind, group in world.entities_by_type.items()
+    }
+
+    # 2. Per-phase breakdown and spatial query counts
+    world = build()
+    profiler = world.enable_profiling(window=steps)
+    for _ in range(steps):
+        world.step()
+    summary = profiler.summary()
+    result["phases_ms_per_step"] = {
+        phase: stats["ms_per_step"] for phase, stats in summary["phases"].items()
+    }
+    result["counters_per_step"] = summary["counters"]
+
+    # 3. Peak traced memory (tracemalloc slows everything down, so it
+    # gets its own shorter run)
+    tracemalloc.start()
+    world = build()
+    for _ in range(memory_steps):
+        world.step()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["peak_memory_mb"] = peak / (1024 * 1024)
+
+    return result
+
+
+def run_scaling(steps=200, seed=0, quick=False, memory_steps=20):
+    grid = QUICK_GRID if quick else SCALING_GRID
+    results = []
+    for case in grid:
+        result = run_case(*case, steps=steps, seed=seed, memory_steps=memory_steps)
+        print(f"{result['name']:28s} {result['steps_per_sec']:8.1f} steps/s  "
+              f"peak {result['peak_memory_mb']:7.1f} MB")
+        results.append(result)
+    return results
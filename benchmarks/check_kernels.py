@@ -0,0 +1,135 @@
+"""
+Check that every available kernel backend agrees with the Python reference.
+
+Usage (from the repository root):
+    python -m benchmarks.check_kernels            # exits 1 on any mismatch
+    python -m benchmarks.check_kernels --cases 2000 --seed 3
+"""
+import argparse
+import math
+import random
+import sys
+
+from systems import kernels
+from systems.vision import EyeLayout, eye_angles
+
+TOLERANCE = 1e-9
+
+
+def random_case(rng):
+    """Kernel arguments for one query, drawn from a random.Random (shared with tests/test_kernels.py)"""
+    n = rng.choice((0, 1, 5, 40, 300))
+    x, y = rng.uniform(0, 800), rng.uniform(0, 500)
+    xs = [x + rng.uniform(-120, 120) for _ in range(n)]
+    ys = [y + rng.uniform(-120, 120) for _ in range(n)]
+    # Put a few points exactly on the query radius and on top of the query point
+    for i in range(0, n, 17):
+        xs[i], ys[i] = x + 15.0, y
+    if n:
+        xs[-1], ys[-1] = x, y
+    eye_pos = rng.choice((0.0, 0.25, 0.5, rng.random(), 1.0))
+    viewers = [
+        eye_angles(rng.randint(1, 4), rng.choice((0.0, 1 / 6, 0.5, rng.random(), 1.0)))
+        for _ in range(rng.randint(1, 4))
+    ]
+    return {
+        "x": x, "y": y, "xs": xs, "ys": ys,
+        "radius": rng.choice((8, 15, 100)),
+        "heading": rng.uniform(-2 * math.pi, 2 * math.pi),
+        "eye_angles": (-eye_pos * math.pi, eye_pos * math.pi),
+        "half_fov": math.radians(rng.choice((30, 60, 90))),
+        "max_range": 100,
+        "viewers": viewers,
+        "headings": [rng.uniform(-math.pi, math.pi) for _ in viewers],
+        "owners": [rng.randrange(len(viewers)) for _ in range(n)],
+        "sectors": rng.choice((8, 72, 360)),
+    }
+
+
+def _close(a, b):
+    return len(a) == len(b) and all(abs(p - q) <= TOLERANCE for p, q in zip(a, b))
+
+
+def compare(reference, candidate, case):
+    """Names of the kernels where candidate disagrees with reference on one case"""
+    x, y, xs, ys = case["x"], case["y"], case["xs"], case["ys"]
+    failures = []
+
+    if reference.radius_select(xs, ys, x, y, case["radius"]) != candidate.radius_select(xs, ys, x, y, case["radius"]):
+        failures.append("radius_select")
+
+    ref_best, ref_distance = reference.nearest(xs, ys, x, y)
+    best, distance = candidate.nearest(xs, ys, x, y)
+    if best != ref_best or not (distance == ref_distance or abs(distance - ref_distance) <= TOLERANCE):
+        failures.append("nearest")
+
+    dxs = [p - x for p in xs]
+    dys = [q - y for q in ys]
+    args = (dxs, dys, case["heading"], case["eye_angles"], case["half_fov"], case["max_range"])
+    ref_hits, ref_distances, ref_angles, ref_eyes = reference.vision_scan(*args)
+    hits, distances, angles, eyes = candidate.vision_scan(*args)
+    if (hits != ref_hits or eyes != ref_eyes
+            or not _close(distances, ref_distances) or not _close(angles, ref_angles)):
+        failures.append("vision_scan")
+
+    # Sector tables against the other backend, and against exact per-eye tests
+    sectors = case["sectors"]
+    layouts = [EyeLayout(angles, case["half_fov"], sectors) for angles in case["viewers"]]
+    args = (dxs, dys, case["owners"], case["headings"], [l.full for l in layouts], [l.edge for l in layouts],
+            [l.angles for l in layouts], case["half_fov"], case["max_range"], sectors)
+    ref = reference.sector_scan(*args)
+    got = candidate.sector_scan(*args)
+    if got[0] != ref[0] or got[3] != ref[3] or not _close(got[1], ref[1]) or not _close(got[2], ref[2]):
+        failures.append("sector_scan")
+    exact_hits, exact_eyes = [], []
+    for viewer, angles in enumerate(case["viewers"]):
+        mine = [i for i, owner in enumerate(case["owners"]) if owner == viewer]
+        hits, _, _, eyes = reference.vision_scan([dxs[i] for i in mine], [dys[i] for i in mine],
+                                                 case["headings"][viewer], angles,
+                                                 case["half_fov"], case["max_range"])
+        exact_hits += [mine[i] for i in hits]
+        exact_eyes += eyes
+    order = sorted(range(len(exact_hits)), key=exact_hits.__getitem__)
+    if ref[0] != [exact_hits[i] for i in order] or ref[3] != [exact_eyes[i] for i in order]:
+        failures.append("sector_tables")
+    return failures
+
+
+def check(cases=500, seed=0):
+    """
+    Compare every backend against the Python one; returns {backend: {kernel: mismatches}}.
+    "sector_tables" counts Python sector scans that differ from exact per-eye tests.
+    """
+    rng = random.Random(seed)
+    reference = kernels.get_backend("python")
+    others = [kernels.get_backend(name) for name in kernels.available_backends() if name != "python"]
+    mismatches = {backend.name: {} for backend in others}
+    for _ in range(cases):
+        case = random_case(rng)
+        for backend in others:
+            for kernel in compare(reference, backend, case):
+                counts = mismatches[backend.name]
+                counts[kernel] = counts.get(kernel, 0) + 1
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kernel backend equivalence check")
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"Backends: {', '.join(kernels.available_backends())} (active: {kernels.backend_name()})")
+    ok = True
+    for name, counts in check(args.cases, args.seed).items():
+        if counts:
+            ok = False
+            detail = ", ".join(f"{kernel} x{n}" for kernel, n in sorted(counts.items()))
+            print(f"{name:8s} MISMATCH {detail}")
+        else:
+            print(f"{name:8s} ok ({args.cases} cases)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from core.sim_config import SimConfig
+from core.world import World
+
+
+def seed_everything(seed):
+    """Seed every RNG the simulation draws from"""
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def make_world(width, height, n_plants, n_prey, n_predators, seed, **overrides):
+    """Build a seeded, populated headless world (overrides go to SimConfig)"""
+    seed_everything(seed)
+    config = SimConfig.from_module(world_width=width, world_height=height, **overrides)
+    world = World(width, height, config)
+    world.populate(n_plants, n_prey, n_predators)
+    return world
+
+
+def time_call(fn, min_time=0.2, repeats=3):
+    """
+    Time a zero-argument callable.
+    Returns the best per-call time in seconds over `repeats` rounds, each
+    running at least `min_time` seconds.
+    """
+    # Calibrate the number of calls per round
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10 or number >= 1 << 20:
+            break
+        number *= 2
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def environment_info():
+    info = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+    }
+    try:
+        info["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info["commit"] = None
+    return info
+
+
+def write_results(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# Metrics compared against a baseline, and whether higher is better
+COMPARED_METRICS = {
+    "steps_per_sec": True,
+    "us_per_call": False,
+    "ms_per_frame": False,
+}
+
+
+def compare_results(current, baseline, tolerance=0.1):
+    """
+    Compare two result files case by case.
+    Returns a list of (case, metric, baseline, current, change, regressed)
+    rows, where change is the relative improvement (positive = faster).
+    """
+    baseline_cases = {case["name"]: case for case in baseline.get("cases", [])}
+    rows = []
+    for case in current.get("cases", []):
+        old = baseline_cases.get(case["name"])
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in case or metric not in old or not old[metric]:
+                continue
+            if higher_is_better:
+                change = case[metric] / old[metric] - 1
+            else:
+                change = old[metric] / case[metric] - 1 if case[metric] else 0.0
+            rows.append((case["name"], metric, old[metric], case[metric], change, change < -tolerance))
+    return rows
+
+
+def print_comparison(rows):
+    for name, metric, old, new, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:40s} {metric:14s} {old:12.3f} -> {new:12.3f}  {change:+7.1%} {flag}")
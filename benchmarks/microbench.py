@@ -0,0 +1,139 @@
+import math
+import os
+import random
+
+from benchmarks.common import make_world, seed_everything, time_call
+from entities.plant import Plant
+from evolution.genome import Genome
+from systems import kernels
+from systems.vision import vision_system
+
+
+def bench_radius_query(seed, radius):
+    world = make_world(800, 500, 1000, 40, 4, seed)
+    points = [(random.uniform(0, world.width), random.uniform(0, world.height)) for _ in range(256)]
+    state = {"i": 0}
+
+    def query():
+        x, y = points[state["i"] & 255]
+        state["i"] += 1
+        world.get_entities_in_radius(x, y, radius)
+
+    return {"name": f"micro/get_entities_in_radius/r{radius:g}", "us_per_call": 1e6 * time_call(query)}
+
+
+def clustered_world(seed, n_plants=4000, clusters=12, spread=25.0):
+    """A world whose plants sit in a few tight gaussian clusters"""
+    world = make_world(800, 500, 0, 40, 4, seed)
+    centres = [(random.uniform(50, 750), random.uniform(50, 450)) for _ in range(clusters)]
+    for i in range(n_plants):
+        cx, cy = centres[i % clusters]
+        plant = Plant(world.config)
+        plant.x = min(max(random.gauss(cx, spread), 0), world.width)
+        plant.y = min(max(random.gauss(cy, spread), 0), world.height)
+        world.add_entity(plant)
+    return world
+
+
+def bench_spatial_index(seed, index, radius):
+    """Radius queries around plants of a clustered world with one spatial index setup"""
+    world = clustered_world(seed)
+    if index == "quadtree":
+        world.configure_spatial_index({"Plant": "quadtree"})
+    elif index == "tuned":
+        world.configure_spatial_index(tune_interval=1)
+    plants = list(world.get_all_entities_by_type("Plant"))
+    points = [(p.x, p.y) for p in random.sample(plants, 256)]
+    for x, y in points:
+        world.get_entities_in_radius(x, y, radius)
+    world.spatial.tune()
+    state = {"i": 0}
+
+    def query():
+        x, y = points[state["i"] & 255]
+        state["i"] += 1
+        world.get_entities_in_radius(x, y, radius)
+
+    return {"name": f"micro/clustered_radius/{index}/r{radius:g}", "us_per_call": 1e6 * time_call(query)}
+
+
+def bench_vision(seed):
+    world = make_world(800, 500, 1000, 40, 4, seed)
+    agents = [e for e in world.entities if hasattr(e, "genome")]
+    state = {"i": 0}
+
+    def look():
+        agent = agents[state["i"] % len(agents)]
+        state["i"] += 1
+        vision_system.get_visible_entities(agent)
+
+    return {"name": "micro/get_visible_entities", "us_per_call": 1e6 * time_call(look)}
+
+
+def bench_vision_kernel(seed, backend, n=300):
+    """One FOV scan of `n` offsets with a given kernel backend"""
+    rng = random.Random(seed)
+    impl = kernels.get_backend(backend)
+    dxs = [rng.uniform(-100, 100) for _ in range(n)]
+    dys = [rng.uniform(-100, 100) for _ in range(n)]
+    eyes = (-0.3 * math.pi, 0.3 * math.pi)
+
+    def scan():
+        impl.vision_scan(dxs, dys, 0.5, eyes, math.radians(30), 100)
+
+    return {"name": f"micro/vision_scan/{backend}", "us_per_call": 1e6 * time_call(scan)}
+
+
+def bench_genome(seed):
+    seed_everything(seed)
+    parents = [Genome() for _ in range(64)]
+    state = {"i": 0}
+
+    def breed():
+        i = state["i"]
+        state["i"] += 1
+        parents[i & 63].crossover_hybrid(parents[(i * 7 + 1) & 63]).mutate()
+
+    return {"name": "micro/crossover_hybrid_mutate", "us_per_call": 1e6 * time_call(breed)}
+
+
+def bench_draw(seed, frames=30):
+    """Time PygameDisplay.draw on an offscreen (dummy driver) surface"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    try:
+        from display.pygame_display import PygameDisplay
+    except ImportError as exc:
+        return {"name": "micro/pygame_draw", "skipped": str(exc)}
+
+    import pygame
+
+    world = make_world(800, 500, 1000, 40, 4, seed)
+    display = PygameDisplay(world)
+    display.max_fps = 0  # Don't let the frame limiter dominate the timing
+    try:
+        seconds = time_call(display.draw, min_time=0.5, repeats=3)
+    finally:
+        pygame.quit()
+    return {"name": "micro/pygame_draw", "ms_per_frame": 1000 * seconds}
+
+
+def run_micro(seed=0):
+    results = [
+        bench_radius_query(seed, 15),
+        bench_radius_query(seed, 100),
+        *[bench_spatial_index(seed, index, radius)
+          for index in ("grid", "quadtree", "tuned") for radius in (15, 100)],
+        bench_vision(seed),
+        *[bench_vision_kernel(seed, backend) for backend in kernels.available_backends()],
+        bench_genome(seed),
+        bench_draw(seed),
+    ]
+
+    for result in results:
+        if "us_per_call" in result:
+            print(f"{result['name']:40s} {result['us_per_call']:10.2f} us/call")
+        elif "ms_per_frame" in result:
+            print(f"{result['name']:40s} {result['ms_per_frame']:10.2f} ms/frame")
+        else:
+            print(f"{result['name']:40s} skipped ({result['skipped']})")
+    return results
@@ -0,0 +1,615 @@
+"""
+Batched simulation of many small worlds in one process.
+
+BatchedWorlds keeps the state of n worlds in arrays with a leading world
+axis: agents in (world, agent slot) arrays and plants in (world, plant
+slot) arrays, with an alive mask marking the used slots (slot capacity
+doubles when a world runs out). Every phase of a step runs for all worlds
+at once in a handful of NumPy operations, so the Python overhead of a
+step is shared by the whole batch. Spatial queries hash points into cells
+keyed by (world, cx, cy), so worlds never see each other's entities, and
+each world draws from its own random stream: a world's run is the same
+whichever other worlds share its batch.
+
+The phases follow World.step (reproduction, ageing and movement, hunting
+and feeding, plant spreads) with the changes batching needs:
+  - vision is not scanned, since nothing in a step reads it (a World
+    built by WorldView.to_world() can look around)
+  - reproduction tries are settled in rounds of pairs sharing no agent,
+    in random order, rather than one agent after the other
+  - a plant spreads to the first of its three candidate sites that was
+    clear at the start of the phase; of two new plants too close to each
+    other the later one is dropped
+so runs match World statistically, not step for step.
+
+view(i) gives one world through the read-only World API (step_count,
+population, compute_trait_averages, entity queries, ...), which is what
+batch.stopping and batch.runner.summarise read.
+"""
+import math
+import random
+from array import array
+
+import numpy as np
+
+from core.columns import (
+    AGENT_CLASSES, AGENT_COLUMNS, EMPTY, INITIAL_HEALTH, PLANT_CELL, PLANT_COLUMNS, SPREAD_CLEARANCE,
+    SPREAD_TRIES, CellIndex, Slots, derived_traits, group_rank, leading, nearest, next_spread, stage_values,
+)
+from core.sim_config import SPECIES, SPECIES_IDS, SimConfig
+from core.trait_stats import HUE_TRAIT
+from core.world import World
+from entities.plant import Plant
+from entities.predator import Predator
+from entities.prey import Prey
+from evolution.genome import TRAIT_INDEX, TRAIT_NAMES, Genome
+from systems.movement import blocked_moves
+
+PLANT = SPECIES_IDS["Plant"]
+PREY = SPECIES_IDS["Prey"]
+PREDATOR = SPECIES_IDS["Predator"]
+
+PLACEMENT_CLEARANCE = 5  # World.add_entity's is_occupied radius
+
+
+class BatchedWorlds:
+    """
+    n worlds stepped together. `config` is one SimConfig for every world
+    or a sequence with one per world (world sizes and parameters may
+    differ); `seeds` gives each world's random stream (default 0..n-1).
+    Worlds whose `active` flag is cleared are frozen and skipped by step().
+    """
+
+    def __init__(self, n_worlds, config=None, seeds=None):
+        if config is None or isinstance(config, SimConfig):
+            configs = [config or SimConfig.from_module()] * n_worlds
+        else:
+            configs = list(config)
+        if len(configs) != n_worlds:
+            raise ValueError(f"Expected {n_worlds} configs, got {len(configs)}")
+        seeds = range(n_worlds) if seeds is None else seeds
+        self.n_worlds = n_worlds
+        self.configs = configs
+        self.rngs = [np.random.default_rng(seed) for seed in seeds]
+        if len(self.rngs) != n_worlds:
+            raise ValueError(f"Expected {n_worlds} seeds, got {len(self.rngs)}")
+        self.step_count = np.zeros(n_worlds, dtype=np.int64)
+        self.active = np.ones(n_worlds, dtype=bool)
+        self.next_id = np.ones(n_worlds, dtype=np.int64)  # Entity ids start at 1 per world
+
+        def param(name):
+            return np.array([getattr(c, name) for c in configs], dtype=np.float64)
+
+        self.widths = param("world_width")
+        self.heights = param("world_height")
+        self.extent = (self.widths.max(), self.heights.max())  # Covers every world, for CellIndex
+        self.params = {
+            name: param(name) for name in (
+                "repro_distance", "repro_chance", "mutation_rate", "mutation_strength",
+                "max_energy", "hunger_threshold", "base_repro_threshold", "reproduction_energy",
+                "initial_energy", "energy_per_step", "prey_energy_value", "max_plants",
+                "plant_maturity_age", "plant_spread_chance", "plant_spread_radius",
+            )
+        }
+        # Per-species tables, (world, species id)
+        self.base_speed = np.array([c.base_speed for c in configs], dtype=np.float64)
+        self.base_turn_rate = np.array([c.base_turn_rate for c in configs], dtype=np.float64)
+        self.max_population = np.array([c.max_population for c in configs], dtype=np.float64)
+        # Plant energy by growth stage (index 1-3), as Plant.energy_value rounds it
+        self.plant_values = np.array([stage_values(c.plant_energy_value) for c in configs])
+        self.collisions = np.array([c.movement_collisions for c in configs])
+
+        agents = max(16, 2 * max(c.n_prey + c.n_predators for c in configs))
+        plants = max(16, max(c.n_plants for c in configs))
+        self.agents = Slots(n_worlds, agents, AGENT_COLUMNS)
+        self.plants = Slots(n_worlds, plants, PLANT_COLUMNS)
+        # Plants never move: one index of their flat slots is kept up to
+        # date as they are added (dead ones are skipped, then purged)
+        self.plant_index = CellIndex(PLANT_CELL, self.extent)
+
+    # === Random streams ===
+
+    def _random(self, worlds, shape=()):
+        """Uniform [0, 1) draws for items of the given (sorted) worlds, each from its world's stream"""
+        counts = np.bincount(worlds, minlength=self.n_worlds)
+        parts = [self.rngs[w].random((counts[w],) + shape) for w in np.flatnonzero(counts)]
+        return np.concatenate(parts) if parts else np.zeros((0,) + shape)
+
+    def _pairs(self, q_worlds, qx, qy, t_worlds, tx, ty, radius):
+        """CellIndex.pairs of queries against a one-off index of target points"""
+        if not len(qx) or not len(tx):
+            return EMPTY, EMPTY, np.zeros(0)
+        cell = float(np.max(radius)) or 1.0
+        return CellIndex(cell, self.extent).insert(t_worlds, tx, ty).pairs(q_worlds, qx, qy, radius)
+
+    def _new_ids(self, worlds):
+        counts = np.bincount(worlds, minlength=self.n_worlds)
+        ids = self.next_id[worlds] + np.arange(len(worlds)) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.next_id += counts
+        return ids
+
+    def _next_spread(self, worlds, after):
+        """Plant.next_spread_step for many plants (NEVER if plants don't spread)"""
+        return next_spread(after, self.params["plant_spread_chance"][worlds], self._random(worlds))
+
+    # === Adding entities ===
+
+    def populate(self, n_plants=None, n_prey=None, n_predators=None):
+        """Add plants, prey and predators at random clear positions (counts default to each config's)"""
+        def counts(n, name):
+            return np.array([getattr(c, name) if n is None else n for c in self.configs], dtype=np.int64)
+
+        worlds = np.repeat(np.arange(self.n_worlds), counts(n_plants, "n_plants"))
+        self._add_plants(worlds, *self._clear_positions(worlds))
+        for species, n, name in ((PREY, n_prey, "n_prey"), (PREDATOR, n_predators, "n_predators")):
+            wanted = counts(n, name)
+            # add_entity refuses agents beyond the population cap
+            room = self.max_population[:, species] - self.agents.counts(self._species_mask(species))
+            worlds = np.repeat(np.arange(self.n_worlds), np.minimum(wanted, room).astype(np.int64))
+            xs, ys = self._clear_positions(worlds)
+            genomes = self._random(worlds, (len(TRAIT_NAMES),))
+            angles = 2 * math.pi * self._random(worlds)
+            self._add_agents(worlds, np.full(len(worlds), species), xs, ys, genomes, angles,
+                             np.zeros((len(worlds), 2), dtype=np.int64))
+
+    def _points(self):
+        """(worlds, xs, ys) of every live entity"""
+        a, p = self.agents, self.plants
+        agents = np.flatnonzero(a.arrays["alive"])
+        plants = np.flatnonzero(p.arrays["alive"])
+        return (np.concatenate([a.world_of(agents), p.world_of(plants)]),
+                np.concatenate([a["x"][agents], p["x"][plants]]),
+                np.concatenate([a["y"][agents], p["y"][plants]]))
+
+    def _clear_positions(self, worlds, clearance=PLACEMENT_CLEARANCE, attempts=1000):
+        """
+        Uniform random positions for new entities of the given (sorted)
+        worlds, none within `clearance` of a live entity or of an earlier
+        new one; rejected positions are drawn again.
+        """
+        xs = np.zeros(len(worlds))
+        ys = np.zeros(len(worlds))
+        placed = self._points()
+        pending = np.arange(len(worlds))
+        for _ in range(attempts):
+            if not len(pending):
+                return xs, ys
+            pw = worlds[pending]
+            u = self._random(pw, (2,))
+            px = u[:, 0] * self.widths[pw]
+            py = u[:, 1] * self.heights[pw]
+            taken = np.zeros(len(pending), dtype=bool)
+            taken[self._pairs(pw, px, py, *placed, clearance)[0]] = True
+            first, second, _ = self._pairs(pw, px, py, pw, px, py, clearance)
+            taken[first[second < first]] = True
+            ok = ~taken
+            xs[pending[ok]] = px[ok]
+            ys[pending[ok]] = py[ok]
+            placed = tuple(np.concatenate([old, new[ok]]) for old, new in zip(placed, (pw, px, py)))
+            pending = pending[taken]
+        if len(pending):
+            raise RuntimeError("Could not find an empty space to add entity.")
+        return xs, ys
+
+    def _add_agents(self, worlds, species, xs, ys, genomes, angles, parents):
+        """Add agents with the given genomes; every derived column is computed here"""
+        ids = self._new_ids(worlds)
+        params = self.params
+        traits = derived_traits(
+            genomes, self.base_speed[worlds, species], self.base_turn_rate[worlds, species],
+            params["energy_per_step"][worlds], params["base_repro_threshold"][worlds], self.collisions[worlds],
+        )
+        flat = self.agents.allocate(worlds)
+        self.agents.fill(
+            flat, species=species, id=ids, parents=parents, x=xs, y=ys, angle=angles,
+            energy=params["initial_energy"][worlds], health=INITIAL_HEALTH[species],
+            born=self.step_count[worlds], genome=genomes, **traits,
+        )
+
+    def _add_plants(self, worlds, xs, ys):
+        ids = self._new_ids(worlds)
+        base_size = 3 + 5 * self._random(worlds)
+        now = self.step_count[worlds]
+        next_spread = self._next_spread(worlds, now + self.params["plant_maturity_age"][worlds])
+        p = self.plants
+        index = self.plant_index
+        index.keep(p["alive"][index.items])  # Before their slots are reused
+        capacity = p.capacity
+        flat = p.allocate(worlds)
+        p.fill(flat, id=ids, x=xs, y=ys, born=now, next_spread=next_spread, base_size=base_size)
+        if p.capacity != capacity:
+            # Growing renumbered the slots
+            plants = np.flatnonzero(p.arrays["alive"])
+            self.plant_index = CellIndex(PLANT_CELL, self.extent).insert(
+                p.world_of(plants), p["x"][plants], p["y"][plants], plants)
+        else:
+            index.insert(worlds, xs, ys, flat)
+
+    def _species_mask(self, species):
+        return self.agents.arrays["alive"] & (self.agents.arrays["species"] == species)
+
+    # === Stepping ===
+
+    def step(self):
+        """Advance every active world by one step"""
+        if not self.active.any():
+            return
+        self.step_count[self.active] += 1
+        self._reproduce()
+        self._update()
+        self._interact()
+        self._spread_plants()
+
+    def _acting(self):
+        """Agents of active worlds born before this step (births only act from the next one)"""
+        a = self.agents
+        return np.flatnonzero(a.arrays["alive"] & self.active[:, None]
+                        & (a.arrays["born"] < self.step_count[:, None]))
+
+    def _reproduce(self):
+        a = self.agents
+        acting = self._acting()
+        ready = acting[a["energy"][acting] >= a["threshold"][acting]]
+        if not len(ready):
+            return
+        # Mates: same world and species, within repro_distance, with at least the parent's threshold
+        worlds = a.world_of(ready)
+        first, second, _ = self._pairs(
+            worlds, a["x"][ready], a["y"][ready], a.world_of(acting), a["x"][acting], a["y"][acting],
+            self.params["repro_distance"][worlds],
+        )
+        candidates, options = ready[first], acting[second]
+        same = (candidates != options) & (a["species"][candidates] == a["species"][options])
+        candidates, options = candidates[same], options[same]
+        # As in Agent.reproduce, every ready agent tries once, as the parent,
+        # and may also be picked as a mate by others while its energy lasts.
+        # Tries are settled in rounds of pairs that share no agent, energy
+        # being rechecked each round; children are added at the end.
+        lucky = np.zeros(a.n_worlds * a.capacity, dtype=bool)  # Passed the repro_chance roll
+        bred = [(EMPTY, EMPTY)]
+        while True:
+            fit = ((a["energy"][candidates] >= a["threshold"][candidates])
+                   & (a["energy"][options] >= a["threshold"][candidates]))
+            candidates, options = candidates[fit], options[fit]
+            if not len(candidates):
+                break
+            # One random mate each, then (once per parent) the repro_chance roll
+            pick = np.lexsort((self._random(a.world_of(candidates)), candidates))
+            chosen = pick[leading(candidates[pick])]
+            parents, mates = candidates[chosen], options[chosen]
+            worlds = a.world_of(parents)
+            roll = self._random(worlds) <= self.params["repro_chance"][worlds]
+            lucky[parents] |= roll
+            failed = ~lucky[parents]
+            # Of the pairs sharing an agent, the one of lowest random priority goes
+            priority = np.where(failed, np.inf, self._random(worlds))
+            best = np.full(a.n_worlds * a.capacity, np.inf)
+            np.minimum.at(best, parents, priority)
+            np.minimum.at(best, mates, priority)
+            go = ~failed & (best[parents] == priority) & (best[mates] == priority)
+            # Parents pay even when the child is refused by the population cap
+            cost = self.params["reproduction_energy"][worlds[go]]
+            a["energy"][parents[go]] -= cost
+            a["energy"][mates[go]] -= cost
+            a["children"][parents[go]] += 1
+            a["children"][mates[go]] += 1
+            bred.append((parents[go], mates[go]))
+            # Unlucky parents and this round's are done
+            done = np.zeros(a.n_worlds * a.capacity, dtype=bool)
+            done[parents[failed | go]] = True
+            keep = ~done[candidates]
+            candidates, options = candidates[keep], options[keep]
+
+        parents, mates = (np.concatenate(column) for column in zip(*bred))
+        order = np.argsort(a.world_of(parents), kind="stable")
+        self._breed(parents[order], mates[order])
+
+    def _breed(self, parents, mates):
+        """Children of parent/mate pairs (sorted by world) that have paid, as in Agent.reproduce"""
+        a = self.agents
+        if not len(parents):
+            return
+        worlds = a.world_of(parents)
+        # Child genomes: crossover_hybrid, then mutate
+        mine, theirs = a["genome"][parents], a["genome"][mates]
+        u = self._random(worlds, (len(TRAIT_NAMES), 4))
+        genomes = np.where(u[..., 0] < 0.3, np.where(u[..., 1] >= 0.5, theirs, mine), (mine + theirs) / 2)
+        strength = self.params["mutation_strength"][worlds][:, None]
+        mutated = np.clip(genomes + strength * (2 * u[..., 3] - 1), 0.0, 1.0)
+        genomes = np.where(u[..., 2] < self.params["mutation_rate"][worlds][:, None], mutated, genomes)
+        angles = 2 * math.pi * self._random(worlds)
+
+        # The population cap refuses children beyond the room left
+        species = a["species"][parents].astype(np.int64)
+        population = np.stack([a.counts(self._species_mask(s)) for s in range(len(SPECIES))], axis=1)
+        room = self.max_population[worlds, species] - population[worlds, species]
+        born = group_rank(worlds * len(SPECIES) + species) < room
+        xs = (a["x"][parents] + a["x"][mates]) / 2
+        ys = (a["y"][parents] + a["y"][mates]) / 2
+        ids = np.stack([a["id"][parents], a["id"][mates]], axis=1)
+        self._add_agents(worlds[born], species[born], xs[born], ys[born], genomes[born], angles[born], ids[born])
+
+    def _update(self):
+        """Ageing, starvation and hunger damage, then movement, for every acting agent"""
+        a = self.agents
+        acting = self._acting()
+        worlds = a.world_of(acting)
+        a["age"][acting] += 1
+        energy = a["energy"][acting]
+        starving = energy <= 0
+        hungry = ~starving & (energy < self.params["hunger_threshold"][worlds])
+        a["health"][acting[hungry]] -= 1
+        dead = starving | (hungry & (a["health"][acting] <= 0))
+        a["alive"][acting[dead]] = False
+
+        movers, worlds = acting[~dead], worlds[~dead]
+        turn_rate = a["turn_rate"][movers]
+        angles = a["angle"][movers] + turn_rate * (2 * self._random(worlds) - 1)
+        a["angle"][movers] = angles
+        speed = a["speed"][movers]
+        old_xs, old_ys = a["x"][movers], a["y"][movers]
+        new_xs = (old_xs + np.cos(angles) * speed) % self.widths[worlds]
+        new_ys = (old_ys + np.sin(angles) * speed) % self.heights[worlds]
+        blocked = blocked_moves(old_xs, old_ys, new_xs, new_ys, a["reach"][movers], worlds)
+        moved = movers[~blocked]
+        a["x"][moved] = new_xs[~blocked]
+        a["y"][moved] = new_ys[~blocked]
+        a["energy"][movers] -= a["energy_cost"][movers]
+
+    def _interact(self):
+        """Hunting, then feeding, settled like systems.interactions (closest claim first, then id)"""
+        a, p = self.agents, self.plants
+        live = np.flatnonzero(a.arrays["alive"] & self.active[:, None])
+        species = a["species"][live]
+        hunters, prey = live[species == PREDATOR], live[species == PREY]
+
+        # Every predator attacks its nearest prey; hits land until the prey dies
+        q, t, distance = nearest(*self._pairs(
+            a.world_of(hunters), a["x"][hunters], a["y"][hunters],
+            a.world_of(prey), a["x"][prey], a["y"][prey], Predator.hunt_range,
+        ))
+        if len(q):
+            attackers, targets = hunters[q], prey[t]
+            order = np.lexsort((a["id"][attackers], distance, targets))
+            attackers, targets = attackers[order], targets[order]
+            rank = group_rank(targets)
+            needed = np.ceil(a["health"][targets] / Predator.attack_damage)
+            np.subtract.at(a["health"], targets[rank < needed], Predator.attack_damage)
+            kill = rank == needed - 1
+            killers, victims = attackers[kill], targets[kill]
+            a["alive"][victims] = False
+            worlds = a.world_of(killers)
+            a["energy"][killers] = np.minimum(self.params["max_energy"][worlds],
+                                              a["energy"][killers] + self.params["prey_energy_value"][worlds])
+            prey = prey[a["alive"][prey]]
+
+        # Every surviving prey claims its nearest plant in eating range
+        q, meals, distance = nearest(*self.plant_index.pairs(
+            a.world_of(prey), a["x"][prey], a["y"][prey], Prey.eating_range,
+        ))
+        live = p["alive"][meals]  # The index still holds plants eaten earlier
+        q, meals, distance = q[live], meals[live], distance[live]
+        if len(q):
+            eaters = prey[q]
+            order = np.lexsort((a["id"][eaters], distance, meals))
+            eaters, meals = eaters[order], meals[order]
+            won = leading(meals)
+            eaters, meals = eaters[won], meals[won]
+            worlds = a.world_of(eaters)
+            age = self.step_count[worlds] - p["born"][meals]
+            value = self.plant_values[worlds, np.minimum(3, 1 + age // 10)]
+            a["energy"][eaters] = np.minimum(self.params["max_energy"][worlds], a["energy"][eaters] + value)
+            p["alive"][meals] = False
+
+    def _spread_plants(self):
+        """
+        Plants whose spread is due are rescheduled and try SPREAD_TRIES
+        sites each; clear sites become new plants in spreader order until
+        their world is full
+        """
+        a, p = self.agents, self.plants
+        due = np.flatnonzero(p.arrays["alive"] & self.active[:, None]
+                             & (p.arrays["next_spread"] == self.step_count[:, None]))
+        if not len(due):
+            return
+        worlds = p.world_of(due)
+        p["next_spread"][due] = self._next_spread(worlds, self.step_count[worlds])
+        room = (self.params["max_plants"] - p.counts()).clip(0)
+        pending = due[room[worlds] > 0]
+        agents = np.flatnonzero(a.arrays["alive"] & self.active[:, None])
+        agent_index = CellIndex(PLANT_CELL, self.extent).insert(a.world_of(agents), a["x"][agents], a["y"][agents])
+        new_worlds, new_xs, new_ys = [EMPTY], [np.zeros(0)], [np.zeros(0)]
+
+        # Spreaders go in rounds sized by the room left in their world (the
+        # multiple growing each round, as most sites may be taken), so a
+        # nearly full world doesn't test every due plant's sites
+        share = 2
+        while len(pending):
+            worlds = p.world_of(pending)
+            turn = group_rank(worlds) < share * room[worlds]
+            share *= 4
+            spreaders, pending, worlds = pending[turn], pending[~turn], worlds[turn]
+
+            # Candidate sites at a random angle and a distance in [radius / 2, radius], wrapped
+            u = self._random(worlds, (SPREAD_TRIES, 2))
+            radius = self.params["plant_spread_radius"][worlds][:, None]
+            angles = 2 * math.pi * u[..., 0]
+            distances = radius * (0.5 + 0.5 * u[..., 1])
+            xs = (p["x"][spreaders][:, None] + np.cos(angles) * distances) % self.widths[worlds][:, None]
+            ys = (p["y"][spreaders][:, None] + np.sin(angles) * distances) % self.heights[worlds][:, None]
+
+            # Each spreader takes its first site clear of every live entity
+            site_worlds = np.repeat(worlds, SPREAD_TRIES)
+            sx, sy = xs.ravel(), ys.ravel()
+            occupied = np.zeros(len(sx), dtype=bool)
+            q, neighbours, _ = self.plant_index.pairs(site_worlds, sx, sy, SPREAD_CLEARANCE)
+            occupied[q[p["alive"][neighbours]]] = True  # Eaten plants are gone
+            occupied[agent_index.pairs(site_worlds, sx, sy, SPREAD_CLEARANCE)[0]] = True
+            occupied[self._pairs(site_worlds, sx, sy, np.concatenate(new_worlds), np.concatenate(new_xs),
+                                 np.concatenate(new_ys), SPREAD_CLEARANCE)[0]] = True
+            clear = ~occupied.reshape(xs.shape)
+            found = clear.any(axis=1)
+            site = clear.argmax(axis=1)[found]
+            worlds, xs, ys = worlds[found], xs[found, site], ys[found, site]
+
+            # A site crowding an earlier one of the round fails, and each
+            # world takes sites up to its room
+            first, second, _ = self._pairs(worlds, xs, ys, worlds, xs, ys, SPREAD_CLEARANCE)
+            keep = np.ones(len(worlds), dtype=bool)
+            keep[first[second < first]] = False
+            worlds, xs, ys = worlds[keep], xs[keep], ys[keep]
+            keep = group_rank(worlds) < room[worlds]
+            new_worlds.append(worlds[keep])
+            new_xs.append(xs[keep])
+            new_ys.append(ys[keep])
+            room -= np.bincount(worlds[keep], minlength=self.n_worlds)
+            pending = pending[room[p.world_of(pending)] > 0]
+
+        worlds = np.concatenate(new_worlds)
+        order = np.argsort(worlds, kind="stable")
+        self._add_plants(worlds[order], np.concatenate(new_xs)[order], np.concatenate(new_ys)[order])
+
+    # === Observation ===
+
+    def populations(self):
+        """{type: live count per world}"""
+        counts = {"Plant": self.plants.counts()}
+        for name in ("Prey", "Predator"):
+            counts[name] = self.agents.counts(self._species_mask(SPECIES_IDS[name]))
+        return counts
+
+    def view(self, index):
+        return WorldView(self, index)
+
+    def views(self):
+        return [WorldView(self, i) for i in range(self.n_worlds)]
+
+
+class WorldView:
+    """
+    One world of a BatchedWorlds through the read-only part of the World
+    API. Counts and trait means come straight from the arrays; entity
+    queries go to a World snapshot of the world, rebuilt after each step.
+    """
+
+    def __init__(self, batch, index):
+        self.batch = batch
+        self.index = index
+        self._snapshot = None
+        self._snapshot_step = None
+
+    @property
+    def config(self):
+        return self.batch.configs[self.index]
+
+    @property
+    def width(self):
+        return self.config.world_width
+
+    @property
+    def height(self):
+        return self.config.world_height
+
+    @property
+    def step_count(self):
+        return int(self.batch.step_count[self.index])
+
+    def population(self, entity_type):
+        """Number of live entities of a type"""
+        batch = self.batch
+        if entity_type == "Plant":
+            return int(batch.plants.arrays["alive"][self.index].sum())
+        return int(batch._species_mask(SPECIES_IDS[entity_type])[self.index].sum())
+
+    def _genomes(self, species):
+        """Genomes of the live agents of a species, (agents, traits)"""
+        mask = self.batch._species_mask(species)[self.index]
+        return self.batch.agents.arrays["genome"][self.index][mask]
+
+    def compute_trait_averages(self):
+        """Per-species trait means, like World.compute_trait_averages"""
+        averages = {}
+        hue = TRAIT_INDEX[HUE_TRAIT]
+        for kind in ("Prey", "Predator"):
+            genomes = self._genomes(SPECIES_IDS[kind])
+            if not len(genomes):
+                continue
+            means = dict(zip(TRAIT_NAMES, genomes.mean(axis=0).tolist()))
+            angles = 2 * np.pi * genomes[:, hue]
+            means[HUE_TRAIT] = math.atan2(np.sin(angles).sum(), np.cos(angles).sum()) / (2 * math.pi) % 1.0
+            averages[kind] = means
+        return averages
+
+    def world(self):
+        """The World snapshot behind entity queries (shared until the batch steps)"""
+        if self._snapshot is None or self._snapshot_step != self.step_count:
+            self._snapshot = self.to_world()
+            self._snapshot_step = self.step_count
+        return self._snapshot
+
+    @property
+    def entities(self):
+        return self.world().entities
+
+    @property
+    def entities_by_type(self):
+        return self.world().entities_by_type
+
+    def get_all_entities_by_type(self, entity_type):
+        return self.world().get_all_entities_by_type(entity_type)
+
+    def get_entities_in_radius(self, x, y, radius):
+        return self.world().get_entities_in_radius(x, y, radius)
+
+    def get_entities_in_rect(self, x0, y0, x1, y1):
+        return self.world().get_entities_in_rect(x0, y0, x1, y1)
+
+    def get_nearest_entities(self, entity, entity_type=None, count=5, max_distance=50):
+        return self.world().get_nearest_entities(entity, entity_type, count, max_distance)
+
+    def get_world_bounds(self):
+        return (0, 0, self.width, self.height)
+
+    def to_world(self):
+        """
+        A new World holding this world's current state (same ids,
+        positions, genomes, energy, ...), e.g. to display it or to carry
+        on stepping it on its own. Building it leaves the global random
+        state untouched.
+        """
+        batch, i = self.batch, self.index
+        config = self.config
+        world = World(config.world_width, config.world_height, config)
+        world.step_count = self.step_count
+        plants = {name: column[i] for name, column in batch.plants.arrays.items()}
+        agents = {name: column[i] for name, column in batch.agents.arrays.items()}
+        entities = [(int(plants["id"][s]), "plant", s) for s in np.flatnonzero(plants["alive"])]
+        entities += [(int(agents["id"][s]), "agent", s) for s in np.flatnonzero(agents["alive"])]
+
+        state = random.getstate()
+        try:
+            for entity_id, kind, s in sorted(entities):  # Registry order is id order
+                if kind == "plant":
+                    entity = Plant(config)
+                    entity.base_size = float(plants["base_size"][s])
+                else:
+                    genome = Genome.from_values(array('d', agents["genome"][s].tolist()))
+                    entity = AGENT_CLASSES[int(agents["species"][s])](genome=genome, config=config)
+                    entity.angle = float(agents["angle"][s])
+                    entity.energy = float(agents["energy"][s])
+                    entity.health = int(agents["health"][s])
+                    entity.age = int(agents["age"][s])
+                    entity.reproduction_count = int(agents["children"][s])
+                    entity.parent_ids = tuple(int(v) for v in agents["parents"][s])
+                source = plants if kind == "plant" else agents
+                world._next_id = entity_id
+                world.add_entity(entity, float(source["x"][s]), float(source["y"][s]))
+                if kind == "plant":
+                    entity.birth_step = int(plants["born"][s])
+                    world.scheduler.cancel(entity)
+                    if plants["next_spread"][s] > world.step_count:
+                        world.scheduler.schedule("plant_spread", entity, int(plants["next_spread"][s]))
+        finally:
+            random.setstate(state)
+        world._next_id = int(batch.next_id[i])
+        return world
@@ -0,0 +1,261 @@
+"""
+Column storage shared by BatchedWorlds and TileDomain.
+
+Both keep entity state in NumPy columns with a leading group axis (a
+world of the batch, or a tile of one world) instead of entity objects:
+Slots holds the columns and hands out free rows, CellIndex answers
+radius queries over points of the same group, and the helpers below
+rank and pick among the resulting (query, point) pairs.
+"""
+import numpy as np
+
+from core.sim_config import SPECIES_IDS
+from entities.agent import Agent
+from entities.predator import Predator
+from entities.prey import Prey
+from evolution.genome import TRAIT_INDEX, TRAIT_NAMES
+from systems.movement import OVERLAP
+
+NEVER = -1  # next_spread of plants that never spread
+
+# Starting health by species id, as set by the entity constructors
+INITIAL_HEALTH = np.array([0.0, 100.0, 150.0, 100.0])
+AGENT_CLASSES = {SPECIES_IDS["Prey"]: Prey, SPECIES_IDS["Predator"]: Predator, SPECIES_IDS["Agent"]: Agent}
+
+SPREAD_CLEARANCE = 8  # Plant.attempt_spread's is_occupied radius
+SPREAD_TRIES = 3
+PLANT_CELL = max(SPREAD_CLEARANCE, Prey.eating_range)  # Cell size of the per-step plant index
+
+# Column layouts: name -> (dtype, per-item shape)
+AGENT_COLUMNS = {
+    "species": (np.int8, ()), "id": (np.int64, ()), "parents": (np.int64, (2,)),
+    "x": (np.float64, ()), "y": (np.float64, ()), "angle": (np.float64, ()),
+    "energy": (np.float64, ()), "health": (np.float64, ()), "age": (np.int64, ()),
+    "born": (np.int64, ()), "children": (np.int64, ()), "genome": (np.float64, (len(TRAIT_NAMES),)),
+    # Derived from the genome at birth
+    "speed": (np.float64, ()), "turn_rate": (np.float64, ()), "energy_cost": (np.float64, ()),
+    "threshold": (np.float64, ()), "reach": (np.float64, ()),
+}
+PLANT_COLUMNS = {
+    "id": (np.int64, ()), "x": (np.float64, ()), "y": (np.float64, ()),
+    "born": (np.int64, ()), "next_spread": (np.int64, ()), "base_size": (np.float64, ()),
+}
+
+EMPTY = np.zeros(0, dtype=np.int64)
+
+
+class CellIndex:
+    """
+    Points hashed into square cells keyed by (world, cx, cy) and kept
+    sorted by key, answering radius queries (radius up to the cell size)
+    that only ever pair points of the same world. Each point carries an
+    item number (its flat slot, or its position in the inserted arrays).
+    `extent` (width, height) must cover every point and query.
+    """
+
+    def __init__(self, cell, extent):
+        self.cell = cell
+        # One free row/column around each world's cells keeps neighbours apart
+        self.ncx = int(extent[0] // cell) + 3
+        self.ncy = int(extent[1] // cell) + 3
+        self.keys = EMPTY
+        self.items = EMPTY
+        self.xs = np.zeros(0)
+        self.ys = np.zeros(0)
+
+    def _keys(self, worlds, xs, ys):
+        cx = (xs // self.cell).astype(np.int64) + 1
+        cy = (ys // self.cell).astype(np.int64) + 1
+        return (worlds * self.ncx + cx) * self.ncy + cy
+
+    def insert(self, worlds, xs, ys, items=None):
+        """Add points (items default to their positions in these arrays); returns self"""
+        items = np.arange(len(xs)) if items is None else items
+        keys = self._keys(worlds, xs, ys)
+        order = np.argsort(keys, kind="stable")
+        if not len(self.keys):
+            self.keys, self.items = keys[order], np.asarray(items)[order]
+            self.xs, self.ys = np.asarray(xs, dtype=np.float64)[order], np.asarray(ys, dtype=np.float64)[order]
+            return self
+        at = np.searchsorted(self.keys, keys[order], "right")
+        self.keys = np.insert(self.keys, at, keys[order])
+        self.items = np.insert(self.items, at, items[order])
+        self.xs = np.insert(self.xs, at, xs[order])
+        self.ys = np.insert(self.ys, at, ys[order])
+        return self
+
+    def keep(self, mask):
+        """Drop the points whose entry in `mask` (one per point, in index order) is False"""
+        self.keys, self.items = self.keys[mask], self.items[mask]
+        self.xs, self.ys = self.xs[mask], self.ys[mask]
+
+    def pairs(self, worlds, xs, ys, radius):
+        """
+        (query, item, distance) of queries and indexed points of the same
+        world at most `radius` apart (a scalar or one radius per query),
+        in query order.
+        """
+        radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), np.shape(xs))
+        n = len(xs)
+        firsts, seconds = [], []
+        if n and len(self.keys):
+            base = self._keys(worlds, xs, ys)
+            for ox in (-1, 0, 1):
+                # The three cells of a neighbour column have consecutive keys
+                column = base + ox * self.ncy
+                lo = np.searchsorted(self.keys, column - 1, "left")
+                counts = np.searchsorted(self.keys, column + 1, "right") - lo
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # Every (query, occupant of the column) combination
+                starts = np.cumsum(counts) - counts
+                firsts.append(np.repeat(np.arange(n), counts))
+                seconds.append(np.repeat(lo, counts) + np.arange(total) - np.repeat(starts, counts))
+        if not firsts:
+            return EMPTY, EMPTY, np.zeros(0)
+
+        first, second = np.concatenate(firsts), np.concatenate(seconds)
+        distance = np.hypot(xs[first] - self.xs[second], ys[first] - self.ys[second])
+        keep = distance <= radius[first]
+        first, second, distance = first[keep], second[keep], distance[keep]
+        order = np.argsort(first, kind="stable")
+        return first[order], self.items[second[order]], distance[order]
+
+
+def leading(keys):
+    """Mask of the first item of every run of equal keys"""
+    mask = np.ones(len(keys), dtype=bool)
+    mask[1:] = keys[1:] != keys[:-1]
+    return mask
+
+
+def nearest(first, second, distance, ties=None):
+    """
+    Closest point of each query of a CellIndex.pairs result: (queries,
+    points, distances). Equally close points go to the lowest `ties` key
+    (one per pair), or else to the first found.
+    """
+    keys = (distance, first) if ties is None else (ties, distance, first)
+    order = np.lexsort(keys)
+    first, second, distance = first[order], second[order], distance[order]
+    first_of_query = leading(first)
+    return first[first_of_query], second[first_of_query], distance[first_of_query]
+
+
+def group_rank(keys):
+    """Position of each item among the items with the same key (in the given order)"""
+    order = np.argsort(keys, kind="stable")
+    starts = np.flatnonzero(leading(keys[order]))
+    sizes = np.diff(np.append(starts, len(keys)))
+    rank = np.empty(len(keys), dtype=np.int64)
+    rank[order] = np.arange(len(keys)) - np.repeat(starts, sizes)
+    return rank
+
+
+def stage_values(value):
+    """Plant energy at growth stages 1-3 (index 0 unused)"""
+    values = [0, value]
+    for _ in range(2):
+        values.append(int(values[-1] * 1.2))
+    return values
+
+
+def next_spread(after, chance, u):
+    """Plant.next_spread_step for many plants from uniform draws `u` (NEVER if plants don't spread)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wait = np.floor(np.log1p(-u) / np.log1p(-chance))
+    due = after + 1 + np.where((chance > 0) & (chance < 1), wait, 0)
+    return np.where(chance > 0, due, NEVER).astype(np.int64)
+
+
+def derived_traits(genomes, base_speed, base_turn_rate, energy_per_step, base_repro_threshold, collisions):
+    """
+    Agent columns that only depend on the genome (speed, turn_rate,
+    energy_cost, threshold, reach), with the other arguments given per
+    agent or as scalars.
+    """
+    speed_factor = 0.5 + 1.5 * genomes[:, TRAIT_INDEX["speed"]]
+    size = np.trunc(5 * (0.5 + genomes[:, TRAIT_INDEX["size"]]))  # Size.get_size
+    collisions = np.asarray(collisions)
+    return {
+        "speed": base_speed * speed_factor,
+        "turn_rate": base_turn_rate * (0.5 + genomes[:, TRAIT_INDEX["neuroplasticity"]]),
+        "energy_cost": energy_per_step * speed_factor * size / 6,
+        "threshold": base_repro_threshold * (0.6 + 0.4 * genomes[:, TRAIT_INDEX["n_children"]]),
+        "reach": np.where(collisions == "bodies", size / 2, np.where(collisions == "none", 0.0, OVERLAP / 2)),
+    }
+
+
+class Slots:
+    """
+    Columns with a leading (world, slot) shape plus an alive mask. Items
+    are addressed by flat index (world * capacity + slot), so the world of
+    an item is its index // capacity and flat index order is world order.
+    """
+
+    def __init__(self, n_worlds, capacity, columns):
+        self.n_worlds = n_worlds
+        self.capacity = capacity
+        self.columns = dict(columns, alive=(bool, ()))
+        self.arrays = {
+            name: self._zeros((n_worlds, capacity) + shape, dtype)
+            for name, (dtype, shape) in self.columns.items()
+        }
+
+    def _zeros(self, shape, dtype):
+        """A new zeroed column (subclasses may place it elsewhere)"""
+        return np.zeros(shape, dtype=dtype)
+
+    def __getitem__(self, name):
+        """A column as a flat (world * capacity, ...) view"""
+        column = self.arrays[name]
+        return column.reshape((-1,) + column.shape[2:])
+
+    def world_of(self, flat):
+        return flat // self.capacity
+
+    def counts(self, mask=None):
+        """Items per world (alive ones, or those in a (world, slot) mask)"""
+        return (self.arrays["alive"] if mask is None else mask).sum(axis=1)
+
+    def allocate(self, worlds):
+        """
+        Free slots for new items of the given (sorted) worlds, growing the
+        capacity if needed; returns their flat indices. Growing renumbers
+        flat indices, so take them after any other index is used.
+        """
+        needed = np.bincount(worlds, minlength=self.n_worlds)
+        touched = np.flatnonzero(needed)  # Only these worlds' rows are scanned
+        used = self.arrays["alive"][touched].sum(axis=1)
+        if (used + needed[touched] > self.capacity).any():
+            self._grow(int((used + needed[touched]).max()))
+        # The k-th new item of a world takes that world's k-th free slot
+        free_first = np.argsort(self.arrays["alive"][touched], axis=1, kind="stable")
+        rank = np.arange(len(worlds)) - np.repeat(np.cumsum(needed) - needed, needed)
+        return worlds * self.capacity + free_first[np.searchsorted(touched, worlds), rank]
+
+    def fill(self, flat, **values):
+        """Initialise new items: every column is set (to 0 where not given) and marked alive"""
+        for name in self.columns:
+            if name != "alive":
+                self[name][flat] = values.get(name, 0)
+        self["alive"][flat] = True
+
+    def move(self, flat, worlds):
+        """Move items (sorted by destination world) to free slots of other worlds; returns their new flat indices"""
+        world, slot = np.divmod(flat, self.capacity)
+        new = self.allocate(worlds)
+        old = world * self.capacity + slot  # Allocating may have grown the capacity
+        for name in self.columns:
+            self[name][new] = self[name][old]
+        self["alive"][old] = False
+        return new
+
+    def _grow(self, minimum):
+        capacity = max(2 * self.capacity, minimum)
+        for name, column in self.arrays.items():
+            grown = self._zeros((self.n_worlds, capacity) + column.shape[2:], column.dtype)
+            grown[:, :self.capacity] = column
+            self.arrays[name] = grown
+        self.capacity = capacity
@@ -29,6 +29,8 @@ ENERGY_PER_STEP = 0.3    # Energy consumed per step
 DEFAULT_SPEED = 1
 DEFAULT_TURN_RATE = 0.3
 
+MOVEMENT_COLLISIONS = "overlap"  # "overlap" (exact overlaps), "bodies" (Size radii) or "none"
+
 # Predator-specific movement
 PREDATOR_SPEED = 1.5
 PREDATOR_TURN_RATE = 0.4
@@ -49,5 +51,47 @@ PLANT_MATURITY_AGE = 100      # Steps before a plant can spread
 PLANT_SPREAD_CHANCE = 0.1    # 10% chance per step for mature plants to spread
 PLANT_SPREAD_RADIUS = 10
 
+# === Terrain ===
+ROCKS_ENABLED = False    # Generate a Perlin rock map that blocks line of sight
+ROCK_TILE_SIZE = 4
+ROCK_SCALE = 30.0
+ROCK_THRESHOLD = 0.2
+ROCK_OCTAVES = 3
+
+# === Parallel stepping ===
+PARALLEL_TILES = None    # e.g. (4, 4) to step the world tile by tile on worker processes
+PARALLEL_WORKERS = None  # Worker processes (None = one per CPU, at most one per tile)
+
+# === Spatial index ===
+SPATIAL_INDEX = {}          # Per-type index, e.g. {"Plant": "quadtree"} for clustered plants
+SPATIAL_CELL_SIZE = 20      # Initial cell size of the shared grid
+SPATIAL_TUNE_INTERVAL = 0   # Steps between cell size retunes from observed queries (0 = fixed)
+
+# === Neighbour lists ===
+NEIGHBOUR_SKIN = 20.0  # Verlet skin for cached agent-centred queries (None = always query the hash)
+
+# === Kernels ===
+KERNEL_BACKEND = "auto"  # "numba", "numpy", "python" or "auto" (fastest available)
+KERNEL_MIN_BATCH = 32    # Smaller batches always use the plain Python loops
+
+# === Event log ===
+EVENT_LOG_PATH = None      # e.g. "events.ndjson"; None = no event log
+EVENT_LOG_FORMAT = "ndjson"  # "ndjson" or "binary"
+EVENT_LOG_LEVEL = "info"   # "info" (agents) or "debug" (adds plant events)
+EVENT_LOG_SAMPLE = None    # Fraction of events kept, or {kind: fraction}
+
+# === Display ===
+VIEW_MAX_WIDTH = 1280         # Larger worlds are scaled down to fit, then panned and zoomed
+VIEW_MAX_HEIGHT = 800
+LOD_ENTITY_BUDGET = 20000     # More entities in view than this are drawn as a density heatmap
+LOD_MIN_ZOOM = 0.25           # Below this zoom (pixels per world unit) always use the heatmap
+
+# === Trajectory recording ===
+TRAJECTORY_PATH = None       # e.g. "run.evtraj" to record entity state for replay
+TRAJECTORY_EVERY = 1         # Record every N steps
+TRAJECTORY_KEYFRAMES = 30    # Frames per chunk (a full frame starts each chunk)
+
 # === Genome ===
 GENOME_DEFAULTS = {}
+MUTATION_RATE = 0.1      # Probability of each trait mutating in a child
+MUTATION_STRENGTH = 0.1  # Maximum change of a mutated trait
@@ -0,0 +1,835 @@
+"""
+Tile-parallel stepping for large worlds.
+
+The world is cut into nx x ny tiles, and while a TileDomain is attached it
+holds the simulation state instead of the entity objects: agent and plant
+columns (core.columns.Slots) whose leading axis is the tile, in
+multiprocessing.shared_memory blocks that stay mapped in the coordinator
+and in every worker process. Each tile owns the rows of the entities
+inside it: a worker writes only its own tile's rows, reading those of
+other tiles within a halo, and an agent that moves across a tile edge has
+its row moved to the new tile.
+
+A step follows World.step, one round of tile tasks per phase:
+  - reproduction: workers list each ready agent's possible mates; the
+    coordinator settles the tries in rounds of pairs that share no agent
+    and adds the children
+  - updates: workers age their agents, apply starvation and hunger damage,
+    turn them and propose their moves
+  - movement: workers hold back conflicting moves (systems.movement over
+    their own movers and the halo's, in id order) and apply the others in
+    place; the coordinator moves the rows that left their tile
+  - interactions: workers claim each agent's nearest prey or plant; the
+    coordinator settles contested targets (closest claim first, then id)
+  - plant spreads: workers reschedule their due plants and find each
+    one's first clear site; the coordinator drops sites crowding an
+    earlier spreader's and caps the plant count, in spreader id order
+The coordinator only touches the rows named in the workers' results, so
+its share of a step grows with births, claims, spreads and migrations,
+not with the population. Random draws are hashed from (seed, step,
+purpose, entity id) instead of taken from a stream, so a run doesn't
+depend on the tiling or the number of workers (unless a chain of blocked
+moves reaches further than the halo). Vision is only scanned on request,
+since nothing in a step reads it. The rules are those of BatchedWorlds,
+so runs match World statistically, not step for step.
+
+Entity objects are brought up to date by pull(), which World.sync_domain()
+calls before a frame is drawn or recorded, and which runs once more when
+the domain is detached. Between pulls the objects, and what is kept from
+them (trait stats, lineage, fields, neighbour lists), show the state of
+the last pull; World.population() stays current. No events are logged
+while the domain runs.
+"""
+import math
+import os
+import random
+from array import array
+from multiprocessing import get_context, resource_tracker, shared_memory
+
+import numpy as np
+
+from core.columns import (
+    AGENT_CLASSES, AGENT_COLUMNS, EMPTY, INITIAL_HEALTH, NEVER, PLANT_COLUMNS, SPREAD_CLEARANCE,
+    SPREAD_TRIES, CellIndex, Slots, derived_traits, group_rank, leading, nearest, next_spread, stage_values,
+)
+from core.sim_config import SPECIES, SPECIES_IDS
+from entities.plant import Plant
+from entities.predator import Predator
+from entities.prey import Prey
+from evolution.genome import TRAIT_INDEX, TRAIT_NAMES, Genome
+from systems.movement import blocked_moves
+from systems.vision import NOTHING_VISIBLE, VisibleSet, eye_angles, is_binocular, vision_system
+
+PLANT = SPECIES_IDS["Plant"]
+PREY = SPECIES_IDS["Prey"]
+PREDATOR = SPECIES_IDS["Predator"]
+
+# Scratch columns of the movement phase: the position before the move and
+# the proposed one (read across tiles while the owners apply their moves)
+MOVE_COLUMNS = {
+    "from_x": (np.float64, ()), "from_y": (np.float64, ()),
+    "to_x": (np.float64, ()), "to_y": (np.float64, ()), "moving": (bool, ()),
+}
+MOVE_LINKS = 3  # Links of a chain of blocked moves the movement halo covers
+
+# Purposes of the hashed random draws; mate picks and pair priorities of
+# round r use PICK + 2 * r and PRIORITY + 2 * r
+TURN, WAIT, FIRST_WAIT, SITE, SIZE, GENOME, HEADING, ROLL, PICK, PRIORITY = range(10)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(z):
+    """splitmix64 finaliser, element-wise on a uint64 array"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _uniform(seed, step, purpose, *keys, count=None):
+    """
+    Uniform [0, 1) draws that only depend on (seed, step, purpose, keys):
+    one per key (entity ids, or several arrays for pairs), or with a count
+    a (keys, count) array of them.
+    """
+    z = _mix(np.array([seed], dtype=np.uint64))
+    for value in (step, purpose):
+        z = _mix(z ^ np.uint64(value))
+    for key in keys:
+        z = _mix(z ^ np.asarray(key, dtype=np.int64).astype(np.uint64))
+    if count is not None:
+        z = _mix(z[:, None] + _GOLDEN * np.arange(1, count + 1, dtype=np.uint64))
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+class SharedSlots(Slots):
+    """
+    Slots whose columns live in shared memory blocks. Workers map them by
+    the names in layout(), which change (with the generation) when the
+    capacity grows.
+    """
+
+    def __init__(self, n_worlds, capacity, columns):
+        self._created = []
+        self.generation = 0
+        super().__init__(n_worlds, capacity, columns)
+        self.blocks = self._take_created()
+
+    def _zeros(self, shape, dtype):
+        size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        block = shared_memory.SharedMemory(create=True, size=size)  # New blocks are zero-filled
+        self._created.append(block)
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def _take_created(self):
+        """Column name -> block of the columns just (re)allocated, in column order"""
+        blocks = dict(zip(self.arrays, self._created))
+        self._created = []
+        return blocks
+
+    def _grow(self, minimum):
+        super()._grow(minimum)
+        old, self.blocks = self.blocks, self._take_created()
+        for block in old.values():
+            block.close()
+            block.unlink()
+        self.generation += 1
+
+    def layout(self):
+        """(generation, {column: (block name, shape, dtype)}) for workers to map"""
+        return self.generation, {
+            name: (self.blocks[name].name, column.shape, column.dtype.str)
+            for name, column in self.arrays.items()
+        }
+
+    def close(self):
+        self.arrays = {}  # Drop the views before unmapping
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+
+# === Worker side ===
+
+_worker = {}  # Per-process parameters and the mapped columns
+
+
+def _init_worker(params):
+    _worker.clear()
+    _worker.update(params)
+
+
+def _attach(layout):
+    """
+    This process's flat (tile * capacity, ...) views of a SharedSlots'
+    columns and its (tile, slot) alive mask, mapped again after it grows
+    """
+    generation, spec = layout
+    kind = tuple(spec)  # Agent and plant columns differ
+    mapped = _worker.get(kind)
+    if mapped is None or mapped[0] != generation:
+        _detach(kind)
+        # Workers share the coordinator's resource tracker, which unlinks
+        # each block only once (when the coordinator releases it)
+        blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in spec.values()]
+        arrays = {
+            column: np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            for (column, (_, shape, dtype)), block in zip(spec.items(), blocks)
+        }
+        flat = {name: column.reshape((-1,) + column.shape[2:]) for name, column in arrays.items()}
+        _worker[kind] = (generation, (flat, arrays), blocks)
+    return _worker[kind][1]
+
+
+def _detach(kind=None):
+    """Unmap one SharedSlots' blocks (or all of them), dropping the views first"""
+    kinds = [kind] if kind is not None else [key for key in _worker if isinstance(key, tuple)]
+    for key in kinds:
+        if key in _worker:
+            blocks = _worker.pop(key)[2]
+            for block in blocks:
+                block.close()
+
+
+def _tile_index(xs, ys, tiles, tile_size):
+    """Tile of each position"""
+    nx, ny = tiles
+    tx = np.clip((xs // tile_size[0]).astype(np.int64), 0, nx - 1)
+    ty = np.clip((ys // tile_size[1]).astype(np.int64), 0, ny - 1)
+    return ty * nx + tx
+
+
+def _near(values, lo, span, radius, period):
+    """Mask of the values within `radius` of [lo, lo + span) on a circle of the given period"""
+    if span + 2 * radius >= period:
+        return np.ones(len(values), dtype=bool)
+    return (values - (lo - radius)) % period <= span + 2 * radius
+
+
+def _gather(mask, tile, radius, *positions):
+    """
+    (own, near): flat indices of the tile's rows set in `mask`, and of
+    those plus the masked rows of other tiles with one of their
+    `positions` (flat (xs, ys) pairs) within `radius` of the tile. Tiles
+    neighbour across the world's edges too, so wrapped moves and spread
+    sites find what is near them.
+    """
+    nx, ny = _worker["tiles"]
+    tile_w, tile_h = _worker["tile_size"]
+    width, height = _worker["extent"]
+    capacity = mask.shape[1]
+    tx, ty = tile % nx, tile // nx
+    rx, ry = math.ceil(radius / tile_w), math.ceil(radius / tile_h)
+    ring = {
+        (ty + oy) % ny * nx + (tx + ox) % nx
+        for oy in range(-ry, ry + 1) for ox in range(-rx, rx + 1)
+    }
+    own = np.flatnonzero(mask[tile]) + tile * capacity
+    others = np.array(sorted(ring - {tile}), dtype=np.int64)
+    if not len(others):
+        return own, own
+    which, slots = np.nonzero(mask[others])
+    rows = others[which] * capacity + slots
+    close = np.zeros(len(rows), dtype=bool)
+    for xs, ys in positions:
+        close |= (_near(xs[rows], tx * tile_w, tile_w, radius, width)
+                  & _near(ys[rows], ty * tile_h, tile_h, radius, height))
+    return own, np.concatenate([own, rows[close]])
+
+
+def _pairs(qx, qy, tx, ty, radius, extent):
+    """CellIndex.pairs of queries against a one-off index of target points"""
+    if not len(qx) or not len(tx):
+        return EMPTY, EMPTY, np.zeros(0)
+    index = CellIndex(radius, extent).insert(np.zeros(len(tx), dtype=np.int64), tx, ty)
+    return index.pairs(np.zeros(len(qx), dtype=np.int64), qx, qy, radius)
+
+
+def _mating_task(task):
+    """(candidates, options): each ready acting agent of the tile with every possible mate"""
+    layout, tile, now = task
+    a, arrays = _attach(layout)
+    config = _worker["config"]
+    own, near = _gather(arrays["alive"], tile, config.repro_distance, (a["x"], a["y"]))
+    own, near = own[a["born"][own] < now], near[a["born"][near] < now]
+    ready = own[a["energy"][own] >= a["threshold"][own]]
+    first, second, _ = _pairs(a["x"][ready], a["y"][ready], a["x"][near], a["y"][near],
+                              config.repro_distance, _worker["extent"])
+    candidates, options = ready[first], near[second]
+    same = (candidates != options) & (a["species"][candidates] == a["species"][options])
+    return candidates[same], options[same]
+
+
+def _update_task(task):
+    """Ageing, starvation, hunger damage and move proposals of the tile's acting agents; returns deaths per species"""
+    layout, tile, now, seed = task
+    a, arrays = _attach(layout)
+    config = _worker["config"]
+    arrays["moving"][tile] = False
+    own = np.flatnonzero(arrays["alive"][tile] & (arrays["born"][tile] < now)) + tile * arrays["alive"].shape[1]
+    a["age"][own] += 1
+    energy = a["energy"][own]
+    starving = energy <= 0
+    hungry = ~starving & (energy < config.hunger_threshold)
+    a["health"][own[hungry]] -= 1
+    dead = starving | (hungry & (a["health"][own] <= 0))
+    a["alive"][own[dead]] = False
+
+    movers = own[~dead]
+    angles = a["angle"][movers] + a["turn_rate"][movers] * (2 * _uniform(seed, now, TURN, a["id"][movers]) - 1)
+    a["angle"][movers] = angles
+    xs, ys, speed = a["x"][movers], a["y"][movers], a["speed"][movers]
+    a["from_x"][movers] = xs
+    a["from_y"][movers] = ys
+    a["to_x"][movers] = (xs + np.cos(angles) * speed) % config.world_width
+    a["to_y"][movers] = (ys + np.sin(angles) * speed) % config.world_height
+    a["moving"][movers] = True
+    a["energy"][movers] -= a["energy_cost"][movers]
+    return np.bincount(a["species"][own[dead]], minlength=len(SPECIES))
+
+
+def _move_task(task):
+    """
+    Settle the moves of the tile's agents against every mover near them
+    and apply the unblocked ones in place; returns (rows that left the
+    tile, moves, blocked moves)
+    """
+    layout, tile = task
+    a, arrays = _attach(layout)
+    own, near = _gather(arrays["moving"], tile, _worker["move_halo"],
+                        (a["from_x"], a["from_y"]), (a["to_x"], a["to_y"]))
+    if _worker["config"].movement_collisions == "none":
+        go = own
+    else:
+        movers = near[np.argsort(a["id"][near], kind="stable")]  # Later movers (higher ids) are held back
+        blocked = blocked_moves(a["from_x"][movers], a["from_y"][movers], a["to_x"][movers], a["to_y"][movers],
+                                a["reach"][movers])
+        go = movers[(movers // arrays["alive"].shape[1] == tile) & ~blocked]
+    a["x"][go] = a["to_x"][go]
+    a["y"][go] = a["to_y"][go]
+    tiles = _tile_index(a["x"][go], a["y"][go], _worker["tiles"], _worker["tile_size"])
+    return go[tiles != tile], len(own), len(own) - len(go)
+
+
+def _claims_task(task):
+    """
+    Each agent of the tile claims its nearest prey (predators, within
+    hunt_range) or plant (prey, within eating_range), ties going to the
+    lowest id; returns (attackers, targets, distances) and (eaters,
+    plants, distances)
+    """
+    layout, plant_layout, tile = task
+    a, arrays = _attach(layout)
+    p, plant_arrays = _attach(plant_layout)
+    extent = _worker["extent"]
+    own, near = _gather(arrays["alive"], tile, Predator.hunt_range, (a["x"], a["y"]))
+    hunters = own[a["species"][own] == PREDATOR]
+    prey = near[a["species"][near] == PREY]
+    first, second, distance = _pairs(a["x"][hunters], a["y"][hunters], a["x"][prey], a["y"][prey],
+                                     Predator.hunt_range, extent)
+    q, t, attack_distance = nearest(first, second, distance, ties=a["id"][prey[second]])
+    attacks = hunters[q], prey[t], attack_distance
+
+    eaters = own[a["species"][own] == PREY]
+    _, plants = _gather(plant_arrays["alive"], tile, Prey.eating_range, (p["x"], p["y"]))
+    first, second, distance = _pairs(a["x"][eaters], a["y"][eaters], p["x"][plants], p["y"][plants],
+                                     Prey.eating_range, extent)
+    q, t, meal_distance = nearest(first, second, distance, ties=p["id"][plants[second]])
+    return attacks, (eaters[q], plants[t], meal_distance)
+
+
+def _spread_task(task):
+    """
+    Reschedule the tile's plants whose spread is due and find the first
+    of each one's SPREAD_TRIES sites clear of every live entity; returns
+    (spreader ids, xs, ys) of those that found one
+    """
+    layout, plant_layout, tile, now, seed = task
+    a, arrays = _attach(layout)
+    p, plant_arrays = _attach(plant_layout)
+    config = _worker["config"]
+    extent = _worker["extent"]
+    capacity = plant_arrays["alive"].shape[1]
+    due = np.flatnonzero(plant_arrays["alive"][tile] & (plant_arrays["next_spread"][tile] == now)) + tile * capacity
+    if not len(due):
+        return EMPTY, np.zeros(0), np.zeros(0)
+    ids = p["id"][due]
+    p["next_spread"][due] = next_spread(now, config.plant_spread_chance, _uniform(seed, now, WAIT, ids))
+
+    # Candidate sites at a random angle and a distance in [radius / 2, radius], wrapped
+    u = _uniform(seed, now, SITE, ids, count=2 * SPREAD_TRIES).reshape(len(due), SPREAD_TRIES, 2)
+    angles = 2 * math.pi * u[..., 0]
+    distances = config.plant_spread_radius * (0.5 + 0.5 * u[..., 1])
+    xs = (p["x"][due][:, None] + np.cos(angles) * distances) % config.world_width
+    ys = (p["y"][due][:, None] + np.sin(angles) * distances) % config.world_height
+
+    # Each spreader takes its first site clear of every live entity
+    radius = config.plant_spread_radius + SPREAD_CLEARANCE
+    _, plants = _gather(plant_arrays["alive"], tile, radius, (p["x"], p["y"]))
+    _, agents = _gather(arrays["alive"], tile, radius, (a["x"], a["y"]))
+    sx, sy = xs.ravel(), ys.ravel()
+    occupied = np.zeros(len(sx), dtype=bool)
+    occupied[_pairs(sx, sy, p["x"][plants], p["y"][plants], SPREAD_CLEARANCE, extent)[0]] = True
+    occupied[_pairs(sx, sy, a["x"][agents], a["y"][agents], SPREAD_CLEARANCE, extent)[0]] = True
+    clear = ~occupied.reshape(xs.shape)
+    found = clear.any(axis=1)
+    site = clear.argmax(axis=1)[found]
+    return ids[found], xs[found, site], ys[found, site]
+
+
+def _wrap_angle(angle):
+    """Normalize angles to [-pi, pi)"""
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def _vision_task(task):
+    """Visible entities of each agent of the tile: [(agent id, ids, distances, angles, eye bitmasks)]"""
+    layout, plant_layout, tile = task
+    a, arrays = _attach(layout)
+    p, plant_arrays = _attach(plant_layout)
+    vision_range = vision_system.max_vision_range
+    half_fov = vision_system.eye_fov / 2
+    occlusion = _worker["occlusion"]
+    own, agents = _gather(arrays["alive"], tile, vision_range, (a["x"], a["y"]))
+    _, plants = _gather(plant_arrays["alive"], tile, vision_range, (p["x"], p["y"]))
+    xs = np.concatenate([a["x"][agents], p["x"][plants]])
+    ys = np.concatenate([a["y"][agents], p["y"][plants]])
+    ids = np.concatenate([a["id"][agents], p["id"][plants]])
+    first, second, distance = _pairs(a["x"][own], a["y"][own], xs, ys, vision_range, _worker["extent"])
+    starts = np.searchsorted(first, np.arange(len(own) + 1))
+    span = vision_system.max_eyes - vision_system.min_eyes
+
+    results = []
+    for i, row in enumerate(own.tolist()):
+        seen, dist = second[starts[i]:starts[i + 1]], distance[starts[i]:starts[i + 1]]
+        others = ids[seen] != a["id"][row]
+        seen, dist = seen[others], dist[others]
+        ax, ay = a["x"][row], a["y"][row]
+        angles = _wrap_angle(np.arctan2(ys[seen] - ay, xs[seen] - ax) - a["angle"][row])
+        genome = a["genome"][row]
+        n_eyes = vision_system.min_eyes + int(round(genome[TRAIT_INDEX["n_eyes"]] * span))  # eye_count
+        eyes = np.zeros(len(seen), dtype=np.int64)
+        # Exact per-eye tests: the same result as VisionSystem's sector tables
+        for e, eye in enumerate(eye_angles(n_eyes, genome[TRAIT_INDEX["eye_pos"]])):
+            eyes |= (np.abs(_wrap_angle(angles - eye)) <= half_fov).astype(np.int64) << e
+        keep = eyes != 0
+        seen, dist, angles, eyes = seen[keep], dist[keep], angles[keep], eyes[keep]
+        if occlusion is not None and len(seen):
+            clear = occlusion.visible_from(ax, ay, xs[seen], ys[seen])
+            seen, dist, angles, eyes = seen[clear], dist[clear], angles[clear], eyes[clear]
+        order = np.argsort(ids[seen], kind="stable")
+        results.append((int(a["id"][row]), ids[seen][order], dist[order], angles[order], eyes[order]))
+    return results
+
+
+# === Coordinator ===
+
+class TileDomain:
+    """
+    Steps a World on per-tile state in shared memory, the per-tile work
+    running on `workers` processes (in this process if 1).
+    """
+
+    def __init__(self, world, tiles=(2, 2), workers=None):
+        self.world = world
+        self.config = config = world.config
+        self.nx, self.ny = tiles
+        self.n_tiles = self.nx * self.ny
+        self.tile_w = world.width / self.nx
+        self.tile_h = world.height / self.ny
+        self.workers = workers or min(os.cpu_count() or 1, self.n_tiles)
+        self.seed = random.getrandbits(64)  # Of the hashed draws
+        # Each link of a chain of blocked moves spans up to two steps and two reaches
+        top = derived_traits(np.ones((1, len(TRAIT_NAMES))), max(config.base_speed), 0, 0, 0,
+                             config.movement_collisions)
+        self.move_halo = MOVE_LINKS * 2 * float(top["speed"][0] + top["reach"][0])
+        self.max_population = np.array(config.max_population, dtype=np.float64)
+        self.plant_values = np.array(stage_values(config.plant_energy_value))
+        self.counts = np.zeros(len(SPECIES), dtype=np.int64)  # Live entities per species id
+        self.next_id = world._next_id
+        self.migrations = 0
+
+        self.objects = {}  # Entity id -> entity object, as of the last pull
+        self.agents = SharedSlots(self.n_tiles, 16, dict(AGENT_COLUMNS, **MOVE_COLUMNS))
+        self.plants = SharedSlots(self.n_tiles, 16, PLANT_COLUMNS)
+        self._load()
+        self.pool = None
+        self._start_pool()
+
+    def _start_pool(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self._occlusion = self.world.occlusion
+        params = {
+            "config": self.config,
+            "tiles": (self.nx, self.ny),
+            "tile_size": (self.tile_w, self.tile_h),
+            "extent": (self.world.width, self.world.height),
+            "move_halo": self.move_halo,
+            "occlusion": self._occlusion,
+        }
+        if self.workers <= 1:
+            _init_worker(params)
+            return
+        # Start the tracker before forking so workers share it instead of
+        # each starting their own (which would unlink the blocks when they exit)
+        resource_tracker.ensure_running()
+        self.pool = get_context().Pool(self.workers, initializer=_init_worker, initargs=(params,))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        else:
+            _detach()
+        self.agents.close()
+        self.plants.close()
+
+    def _map(self, task, args):
+        if self.pool is None:
+            return [task(arg) for arg in args]
+        return self.pool.map(task, args)
+
+    def tile_of(self, xs, ys):
+        return _tile_index(np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64),
+                           (self.nx, self.ny), (self.tile_w, self.tile_h))
+
+    def population(self, entity_type):
+        return int(self.counts[SPECIES_IDS[entity_type]])
+
+    # === Tile state ===
+
+    def _load(self):
+        """Copy every entity of the world into the tile columns (once, when attached)"""
+        world = self.world
+        agents, plants = [], []
+        for entity in world.entities:
+            if entity.world is world:
+                self.objects[entity.id] = entity
+                (agents if hasattr(entity, 'genome') else plants).append(entity)
+
+        genomes = np.array([e.genome.values for e in agents], dtype=np.float64).reshape(-1, len(TRAIT_NAMES))
+        species = np.array([e.species_id for e in agents], dtype=np.int64)
+        self._insert(self.agents, dict(
+            species=species, id=np.array([e.id for e in agents], dtype=np.int64),
+            parents=np.array([e.parent_ids for e in agents], dtype=np.int64).reshape(-1, 2),
+            x=np.array([e.x for e in agents], dtype=np.float64), y=np.array([e.y for e in agents], dtype=np.float64),
+            angle=np.array([e.angle for e in agents], dtype=np.float64),
+            energy=np.array([e.energy for e in agents], dtype=np.float64),
+            health=np.array([e.health for e in agents], dtype=np.float64),
+            age=np.array([e.age for e in agents], dtype=np.int64),
+            born=np.full(len(agents), world.step_count, dtype=np.int64),
+            children=np.array([e.reproduction_count for e in agents], dtype=np.int64),
+            genome=genomes, **self._traits(genomes, species),
+        ))
+        spreads = [world.scheduler.due_tick("plant_spread", e) for e in plants]
+        self._insert(self.plants, dict(
+            id=np.array([e.id for e in plants], dtype=np.int64),
+            x=np.array([e.x for e in plants], dtype=np.float64), y=np.array([e.y for e in plants], dtype=np.float64),
+            born=np.array([e.birth_step for e in plants], dtype=np.int64),
+            next_spread=np.array([NEVER if due is None else due for due in spreads], dtype=np.int64),
+            base_size=np.array([e.base_size for e in plants], dtype=np.float64),
+        ))
+        self.counts[:] = np.bincount(species, minlength=len(SPECIES))
+        self.counts[PLANT] = len(plants)
+        world.scheduler.clear()  # The domain keeps the schedules until it is detached
+
+    def _traits(self, genomes, species):
+        config = self.config
+        return derived_traits(
+            genomes, np.array(config.base_speed)[species], np.array(config.base_turn_rate)[species],
+            config.energy_per_step, config.base_repro_threshold, config.movement_collisions,
+        )
+
+    def _insert(self, slots, columns):
+        """Add items ({column: values}) to the tiles their positions fall in"""
+        tiles = self.tile_of(columns["x"], columns["y"])
+        order = np.argsort(tiles, kind="stable")
+        flat = slots.allocate(tiles[order])
+        slots.fill(flat, **{name: values[order] for name, values in columns.items()})
+
+    def _new_ids(self, n):
+        ids = np.arange(self.next_id, self.next_id + n, dtype=np.int64)
+        self.next_id += n
+        return ids
+
+    # === Stepping ===
+
+    def step(self, now):
+        """One world step (called by World.step inside its "step" phase)"""
+        profiler = self.world.profiler
+        tiles = range(self.n_tiles)
+        with profiler.phase("reproduction"):
+            agents = self.agents.layout()
+            self._reproduce(now, self._map(_mating_task, [(agents, t, now) for t in tiles]))
+        with profiler.phase("movement"):
+            agents = self.agents.layout()  # Births may have grown the columns
+            deaths = self._map(_update_task, [(agents, t, now, self.seed) for t in tiles])
+            self.counts -= np.sum(deaths, axis=0)
+            moves = self._map(_move_task, [(agents, t) for t in tiles])
+            emigrants = np.concatenate([part[0] for part in moves])
+            self._migrate(emigrants)
+        if profiler.enabled:
+            profiler.count("moves", sum(part[1] for part in moves))
+            profiler.count("blocked_moves", sum(part[2] for part in moves))
+            profiler.count("domain_migrations", len(emigrants))
+        agents, plants = self.agents.layout(), self.plants.layout()
+        with profiler.phase("interactions"):
+            self._interact(now, self._map(_claims_task, [(agents, plants, t) for t in tiles]))
+        with profiler.phase("plant_spread"):
+            self._spread(now, self._map(_spread_task, [(agents, plants, t, now, self.seed) for t in tiles]))
+
+    def _reproduce(self, now, parts):
+        """
+        Settle the mating tries listed by the workers as BatchedWorlds
+        does: rounds of pairs sharing no agent, energy being rechecked
+        each round; children are added at the end
+        """
+        a, config = self.agents, self.config
+        candidates = np.concatenate([part[0] for part in parts])
+        options = np.concatenate([part[1] for part in parts])
+        if not len(candidates):
+            return
+        # Only the agents involved are worked on, numbered 0..n-1
+        involved, inverse = np.unique(np.concatenate([candidates, options]), return_inverse=True)
+        candidates, options = inverse[:len(candidates)], inverse[len(candidates):]
+        ids = a["id"][involved]
+        energy = a["energy"][involved]
+        threshold = a["threshold"][involved]
+        children = np.zeros(len(involved), dtype=np.int64)
+        lucky = np.zeros(len(involved), dtype=bool)  # Passed the repro_chance roll
+        bred = [(EMPTY, EMPTY)]
+        rounds = 0
+        while True:
+            fit = (energy[candidates] >= threshold[candidates]) & (energy[options] >= threshold[candidates])
+            candidates, options = candidates[fit], options[fit]
+            if not len(candidates):
+                break
+            # One random mate each, then (once per parent) the repro_chance roll
+            u = _uniform(self.seed, now, PICK + 2 * rounds, ids[candidates], ids[options])
+            pick = np.lexsort((u, ids[candidates]))
+            chosen = pick[leading(candidates[pick])]
+            parents, mates = candidates[chosen], options[chosen]
+            lucky[parents] |= _uniform(self.seed, now, ROLL, ids[parents]) <= config.repro_chance
+            failed = ~lucky[parents]
+            # Of the pairs sharing an agent, the one of lowest random priority goes
+            priority = np.where(failed, np.inf, _uniform(self.seed, now, PRIORITY + 2 * rounds, ids[parents]))
+            best = np.full(len(involved), np.inf)
+            np.minimum.at(best, parents, priority)
+            np.minimum.at(best, mates, priority)
+            go = ~failed & (best[parents] == priority) & (best[mates] == priority)
+            # Parents pay even when the child is refused by the population cap
+            energy[parents[go]] -= config.reproduction_energy
+            energy[mates[go]] -= config.reproduction_energy
+            children[parents[go]] += 1
+            children[mates[go]] += 1
+            bred.append((parents[go], mates[go]))
+            # Unlucky parents and this round's are done
+            done = np.zeros(len(involved), dtype=bool)
+            done[parents[failed | go]] = True
+            keep = ~done[candidates]
+            candidates, options = candidates[keep], options[keep]
+            rounds += 1
+
+        a["energy"][involved] = energy
+        a["children"][involved] += children
+        parents, mates = (np.concatenate(column) for column in zip(*bred))
+        self._breed(now, involved[parents], involved[mates])
+
+    def _breed(self, now, parents, mates):
+        """Children of parent/mate pairs that have paid, in parent id order, as in Agent.reproduce"""
+        a, config = self.agents, self.config
+        if not len(parents):
+            return
+        order = np.argsort(a["id"][parents])
+        parents, mates = parents[order], mates[order]
+        parent_ids = a["id"][parents]
+        # Child genomes: crossover_hybrid, then mutate
+        mine, theirs = a["genome"][parents], a["genome"][mates]
+        u = _uniform(self.seed, now, GENOME, parent_ids, count=4 * len(TRAIT_NAMES)).reshape(len(parents), -1, 4)
+        genomes = np.where(u[..., 0] < 0.3, np.where(u[..., 1] >= 0.5, theirs, mine), (mine + theirs) / 2)
+        mutated = np.clip(genomes + config.mutation_strength * (2 * u[..., 3] - 1), 0.0, 1.0)
+        genomes = np.where(u[..., 2] < config.mutation_rate, mutated, genomes)
+        angles = 2 * math.pi * _uniform(self.seed, now, HEADING, parent_ids)
+
+        # The population cap refuses children beyond the room left
+        species = a["species"][parents].astype(np.int64)
+        born = group_rank(species) < self.max_population[species] - self.counts[species]
+        species, genomes = species[born], genomes[born]
+        n = len(species)
+        self._insert(a, dict(
+            species=species, id=self._new_ids(n),
+            parents=np.stack([parent_ids, a["id"][mates]], axis=1)[born],
+            x=((a["x"][parents] + a["x"][mates]) / 2)[born], y=((a["y"][parents] + a["y"][mates]) / 2)[born],
+            angle=angles[born], energy=np.full(n, float(config.initial_energy)), health=INITIAL_HEALTH[species],
+            age=np.zeros(n, dtype=np.int64), born=np.full(n, now, dtype=np.int64),
+            children=np.zeros(n, dtype=np.int64), genome=genomes, **self._traits(genomes, species),
+        ))
+        self.counts += np.bincount(species, minlength=len(SPECIES))
+
+    def _migrate(self, rows):
+        """Move the rows of agents that left their tile to their new tile's rows"""
+        if not len(rows):
+            return
+        a = self.agents
+        tiles = self.tile_of(a["x"][rows], a["y"][rows])
+        order = np.argsort(tiles, kind="stable")
+        a.move(rows[order], tiles[order])
+        self.migrations += len(rows)
+
+    def _interact(self, now, parts):
+        """Hunting, then feeding, settled like systems.interactions (closest claim first, then id)"""
+        a, p, config = self.agents, self.plants, self.config
+        attackers, targets, distance = (np.concatenate(column) for column in zip(*(part[0] for part in parts)))
+        if len(attackers):
+            # Hits land in claim order until the prey dies
+            order = np.lexsort((a["id"][attackers], distance, a["id"][targets]))
+            attackers, targets = attackers[order], targets[order]
+            rank = group_rank(targets)
+            needed = np.ceil(a["health"][targets] / Predator.attack_damage)
+            np.subtract.at(a["health"], targets[rank < needed], Predator.attack_damage)
+            kill = rank == needed - 1
+            killers, victims = attackers[kill], targets[kill]
+            a["alive"][victims] = False
+            self.counts[PREY] -= len(victims)
+            a["energy"][killers] = np.minimum(config.max_energy, a["energy"][killers] + config.prey_energy_value)
+
+        eaters, meals, distance = (np.concatenate(column) for column in zip(*(part[1] for part in parts)))
+        fed = a["alive"][eaters]  # Prey killed above don't eat
+        eaters, meals, distance = eaters[fed], meals[fed], distance[fed]
+        if len(eaters):
+            order = np.lexsort((a["id"][eaters], distance, p["id"][meals]))
+            eaters, meals = eaters[order], meals[order]
+            won = leading(meals)
+            eaters, meals = eaters[won], meals[won]
+            value = self.plant_values[np.minimum(3, 1 + (now - p["born"][meals]) // 10)]
+            a["energy"][eaters] = np.minimum(config.max_energy, a["energy"][eaters] + value)
+            p["alive"][meals] = False
+            self.counts[PLANT] -= len(meals)
+
+    def _spread(self, now, parts):
+        """New plants at the sites the workers found, in spreader order until the world is full"""
+        config = self.config
+        spreaders, xs, ys = (np.concatenate(column) for column in zip(*parts))
+        room = int(min(config.max_plants - self.counts[PLANT], len(spreaders)))
+        if room <= 0:
+            return
+        order = np.argsort(spreaders)
+        xs, ys = xs[order], ys[order]
+        # A site crowding an earlier spreader's fails
+        first, second, _ = _pairs(xs, ys, xs, ys, SPREAD_CLEARANCE, (self.world.width, self.world.height))
+        keep = np.ones(len(xs), dtype=bool)
+        keep[first[second < first]] = False
+        xs, ys = xs[keep][:room], ys[keep][:room]
+        ids = self._new_ids(len(xs))
+        self._insert(self.plants, dict(
+            id=ids, x=xs, y=ys, born=np.full(len(ids), now, dtype=np.int64),
+            next_spread=next_spread(now + config.plant_maturity_age, config.plant_spread_chance,
+                                    _uniform(self.seed, now, FIRST_WAIT, ids)),
+            base_size=3 + 5 * _uniform(self.seed, now, SIZE, ids),
+        ))
+        self.counts[PLANT] += len(ids)
+
+    # === Entity objects ===
+
+    def pull(self, vision=False, reschedule=False):
+        """
+        Bring the world's entity objects up to date: dead ones are removed,
+        new ones added (with their ids) and the others updated. With
+        `vision` the agents' visible entities are scanned again (on the
+        workers); with `reschedule` the world's scheduler gets back every
+        pending vision, reproduction and spread event (before detaching).
+        """
+        world = self.world
+        a, p = self.agents, self.plants
+        agents = np.flatnonzero(a["alive"])
+        plants = np.flatnonzero(p["alive"])
+        agent_ids, plant_ids = a["id"][agents], p["id"][plants]
+        known = np.fromiter(self.objects, dtype=np.int64, count=len(self.objects))
+        for entity_id in np.setdiff1d(known, np.concatenate([agent_ids, plant_ids])).tolist():
+            world.remove_entity(self.objects.pop(entity_id))
+
+        old = np.isin(agent_ids, known)
+        rows = agents[old]
+        columns = zip(a["id"][rows].tolist(), a["x"][rows].tolist(), a["y"][rows].tolist(),
+                      a["angle"][rows].tolist(), a["energy"][rows].tolist(), a["health"][rows].tolist(),
+                      a["age"][rows].tolist(), a["children"][rows].tolist())
+        for entity_id, x, y, angle, energy, health, age, children in columns:
+            agent = self.objects[entity_id]
+            if x != agent.x or y != agent.y:
+                world._relocate(agent, x, y)
+            agent.angle = angle
+            agent.energy = energy
+            agent.health = int(health)
+            agent.age = age
+            agent.reproduction_count = children
+
+        # New entities in id order, the order World.add_entity numbers them in
+        new_plants = ~np.isin(plant_ids, known)
+        new = [(i, "agent", s) for i, s in zip(agent_ids[~old].tolist(), agents[~old].tolist())]
+        new += [(i, "plant", s) for i, s in zip(plant_ids[new_plants].tolist(), plants[new_plants].tolist())]
+        config = self.config
+        for entity_id, kind, s in sorted(new):
+            if kind == "plant":
+                entity = Plant(config)
+                entity.base_size = float(p["base_size"][s])
+                source = p
+            else:
+                genome = Genome.from_values(array('d', a["genome"][s].tolist()))
+                entity = AGENT_CLASSES[int(a["species"][s])](genome=genome, config=config)
+                entity.angle = float(a["angle"][s])
+                entity.energy = float(a["energy"][s])
+                entity.health = int(a["health"][s])
+                entity.age = int(a["age"][s])
+                entity.reproduction_count = int(a["children"][s])
+                entity.parent_ids = tuple(int(v) for v in a["parents"][s])
+                source = a
+            world._next_id = entity_id
+            world.add_entity(entity, float(source["x"][s]), float(source["y"][s]))
+            if kind == "plant":
+                entity.birth_step = int(p["born"][s])
+            self.objects[entity_id] = entity
+        world._next_id = self.next_id
+        world.scheduler.clear()  # Drops add_entity's schedules; the domain keeps its own
+
+        if vision:
+            self._pull_vision()
+        if reschedule:
+            self._reschedule(agents, plants)
+
+    def _pull_vision(self):
+        if self.world.occlusion is not self._occlusion:
+            self._start_pool()  # Workers hold their own copy of the rock map
+        tasks = [(self.agents.layout(), self.plants.layout(), t) for t in range(self.n_tiles)]
+        objects = self.objects
+        for part in self._map(_vision_task, tasks):
+            for agent_id, ids, distances, angles, masks in part:
+                agent = objects[agent_id]
+                if not len(ids):
+                    agent.visible_entities = NOTHING_VISIBLE
+                    continue
+                true_distances = distances.tolist()
+                masks = masks.tolist()
+                agent.visible_entities = VisibleSet(
+                    [objects[i] for i in ids.tolist()],
+                    [vision_system._apply_depth_noise(d, is_binocular(m)) for d, m in zip(true_distances, masks)],
+                    true_distances, angles.tolist(), masks,
+                )
+
+    def _reschedule(self, agents, plants):
+        """Hand the pending events of the pulled entities back to the world's scheduler"""
+        world = self.world
+        now = world.step_count
+        a, p = self.agents, self.plants
+        for entity_id in a["id"][agents].tolist():
+            agent = self.objects[entity_id]
+            world.scheduler.schedule("vision", agent, vision_system.first_refresh(agent, now))
+            if agent.energy >= agent.reproduction_threshold():
+                world.schedule_reproduction(agent)
+        for entity_id, due in zip(p["id"][plants].tolist(), p["next_spread"][plants].tolist()):
+            if due > now:
+                world.scheduler.schedule("plant_spread", self.objects[entity_id], due)
@@ -0,0 +1,186 @@
+import json
+import random
+import struct
+
+from core.sim_config import SPECIES_IDS
+from evolution.genome import TRAIT_NAMES
+
+# === Levels ===
+DEBUG = 10
+INFO = 20
+LEVEL_NAMES = {"debug": DEBUG, "info": INFO}
+
+# === Codes shared by both formats ===
+SPECIES_CODES = dict(SPECIES_IDS)
+DEATH_CAUSES = {
+    "unknown": 0,
+    "starvation": 1,   # energy ran out
+    "hunger": 2,       # health worn down while energy was low
+    "predation": 3,    # killed by a predator
+}
+
+# kind -> (record code, default level, [(field, struct format)])
+# Every record also carries the step it happened on. Entity ids start at 1,
+# 0 means "none" (e.g. parents of the initial population).
+EVENT_SCHEMAS = {
+    "birth": (1, INFO, [
+        ("id", "q"), ("parent1", "q"), ("parent2", "q"), ("species", "B"),
+        ("x", "f"), ("y", "f"),
+    ] + [(trait, "f") for trait in TRAIT_NAMES]),
+    "death": (2, INFO, [
+        ("id", "q"), ("species", "B"), ("cause", "B"), ("by", "q"),
+        ("age", "I"), ("x", "f"), ("y", "f"),
+    ]),
+    "predation": (3, INFO, [
+        ("predator", "q"), ("prey", "q"), ("damage", "f"), ("killed", "?"),
+        ("x", "f"), ("y", "f"),
+    ]),
+    "plant_spread": (4, DEBUG, [
+        ("parent", "q"), ("id", "q"), ("x", "f"), ("y", "f"),
+    ]),
+    "plant_eaten": (5, DEBUG, [
+        ("id", "q"), ("by", "q"), ("energy", "f"), ("x", "f"), ("y", "f"),
+    ]),
+}
+
+# Fields passed as names and stored as codes in binary logs
+_ENCODED_FIELDS = {"species": SPECIES_CODES, "cause": DEATH_CAUSES}
+_DECODED_FIELDS = {
+    field: {code: name for name, code in codes.items()}
+    for field, codes in _ENCODED_FIELDS.items()
+}
+
+BINARY_MAGIC = b"EVLOG1\n"
+_RECORD_HEAD = struct.Struct("<BI")  # kind code, step
+
+
+class NullEventLog:
+    """Stand-in used when event logging is off"""
+    enabled = False
+
+    def wants(self, kind):
+        return False
+
+    def emit(self, kind, step, **fields):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_EVENT_LOG = NullEventLog()
+
+
+class EventLog:
+    """
+    Buffered structured event writer (NDJSON or compact binary records).
+
+    level:  minimum level recorded ("info" = agent births, deaths and
+            predation; "debug" adds plant spread and plants being eaten)
+    sample: fraction of events kept, either one float for every kind or a
+            {kind: fraction} mapping. Sampling uses its own RNG so it never
+            perturbs the simulation.
+    """
+    enabled = True
+
+    def __init__(self, path, fmt="ndjson", level="info", sample=None, buffer_size=4096, seed=None):
+        if fmt not in ("ndjson", "binary"):
+            raise ValueError(f"Unknown event log format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.level = LEVEL_NAMES[level] if isinstance(level, str) else level
+        self.buffer_size = buffer_size
+        self._rng = random.Random(seed)
+        self._buffer = []
+        self.counts = {kind: 0 for kind in EVENT_SCHEMAS}
+
+        # Per-kind keep probability (0 = kind disabled)
+        self._keep = {}
+        for kind, (_, kind_level, _) in EVENT_SCHEMAS.items():
+            if isinstance(sample, dict):
+                rate = sample.get(kind, 1.0)
+            else:
+                rate = 1.0 if sample is None else sample
+            self._keep[kind] = rate if kind_level >= self.level else 0.0
+
+        self._structs = {
+            kind: (code, struct.Struct("<" + "".join(f for _, f in fields)), [name for name, _ in fields])
+            for kind, (code, _, fields) in EVENT_SCHEMAS.items()
+        }
+
+        self._file = open(path, "wb")
+        if fmt == "binary":
+            header = json.dumps({
+                kind: {"code": code, "fields": fields}
+                for kind, (code, _, fields) in EVENT_SCHEMAS.items()
+            }).encode()
+            self._file.write(BINARY_MAGIC + struct.pack("<I", len(header)) + header)
+
+    def wants(self, kind):
+        """Cheap pre-check so callers can skip building a record"""
+        rate = self._keep[kind]
+        return rate >= 1.0 or (rate > 0.0 and self._rng.random() < rate)
+
+    def emit(self, kind, step, **fields):
+        """Record one event (call wants() first to honour level and sampling)"""
+        if self.fmt == "ndjson":
+            record = {"event": kind, "step": step}
+            record.update(fields)
+            self._buffer.append(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        else:
+            code, packer, names = self._structs[kind]
+            values = [
+                _ENCODED_FIELDS[name][fields[name]] if name in _ENCODED_FIELDS else fields[name]
+                for name in names
+            ]
+            self._buffer.append(_RECORD_HEAD.pack(code, step) + packer.pack(*values))
+        self.counts[kind] += 1
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def read_events(path):
+    """Iterate over the records of an event log written in either format"""
+    with open(path, "rb") as f:
+        head = f.read(len(BINARY_MAGIC))
+        if head != BINARY_MAGIC:
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len))
+        decoders = {}
+        for kind, spec in header.items():
+            packer = struct.Struct("<" + "".join(fmt for _, fmt in spec["fields"]))
+            decoders[spec["code"]] = (kind, packer, [name for name, _ in spec["fields"]])
+
+        data = f.read()
+        offset = 0
+        while offset < len(data):
+            code, step = _RECORD_HEAD.unpack_from(data, offset)
+            offset += _RECORD_HEAD.size
+            kind, packer, names = decoders[code]
+            record = {"event": kind, "step": step}
+            record.update(zip(names, packer.unpack_from(data, offset)))
+            for field, codes in _DECODED_FIELDS.items():
+                if field in record:
+                    record[field] = codes[record[field]]
+            offset += packer.size
+            yield record
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+
+from core.sim_config import SPECIES
+from core.trait_stats import HUE_TRAIT
+from evolution.genome import TRAIT_INDEX
+
+
+class TraitFields:
+    """
+    Spatial fields of the population: accumulators over a coarse grid of
+    `cell_size` cells, kept in step by the world as entities are placed,
+    cross into another cell or are removed. Each cell holds a count per
+    species and, over the agents in it, the sum of each tracked trait
+    (the hue trait as sums of the sine and cosine of its angle, since it
+    is circular). Maps of density and mean traits are then a division
+    away, with no pass over the entities. Genomes are assumed not to
+    change while their agent is in the world.
+    """
+
+    def __init__(self, width, height, cell_size=20, traits=("speed", "size", HUE_TRAIT)):
+        self.cell_size = cell_size
+        self.nx = max(1, math.ceil(width / cell_size))
+        self.ny = max(1, math.ceil(height / cell_size))
+        self.traits = tuple(t for t in traits if t != HUE_TRAIT)
+        self.tracks_hue = HUE_TRAIT in traits
+        self._columns = [TRAIT_INDEX[name] for name in self.traits]  # Into Genome.values
+        self._hue_column = TRAIT_INDEX[HUE_TRAIT]
+        shape = (self.nx, self.ny)
+        self.counts = np.zeros((len(SPECIES),) + shape, dtype=np.int32)
+        self.agents = np.zeros(shape, dtype=np.int32)  # Entities with a genome (trait denominators)
+        self.sums = np.zeros((len(self.traits),) + shape)
+        self.hue_cos = np.zeros(shape)
+        self.hue_sin = np.zeros(shape)
+        self.version = 0  # Bumped on every change, for caches of derived maps
+
+    def _cell(self, x, y):
+        return (min(max(int(x // self.cell_size), 0), self.nx - 1),
+                min(max(int(y // self.cell_size), 0), self.ny - 1))
+
+    def _update(self, entity, cell, sign):
+        cx, cy = cell
+        self.counts[entity.species_id, cx, cy] += sign
+        genome = getattr(entity, 'genome', None)
+        if genome is not None:
+            values = genome.values
+            self.agents[cx, cy] += sign
+            for i, column in enumerate(self._columns):
+                self.sums[i, cx, cy] += sign * values[column]
+            if self.tracks_hue:
+                angle = 2 * math.pi * values[self._hue_column]
+                self.hue_cos[cx, cy] += sign * math.cos(angle)
+                self.hue_sin[cx, cy] += sign * math.sin(angle)
+        self.version += 1
+
+    # === Kept in step by the World ===
+
+    def placed(self, entity):
+        self._update(entity, self._cell(entity.x, entity.y), 1)
+
+    def removed(self, entity):
+        self._update(entity, self._cell(entity.x, entity.y), -1)
+
+    def moved(self, entity, old_x, old_y):
+        old_cell = self._cell(old_x, old_y)
+        new_cell = self._cell(entity.x, entity.y)
+        if old_cell != new_cell:
+            self._update(entity, old_cell, -1)
+            self._update(entity, new_cell, 1)
+
+    # === Maps (nx x ny arrays, indexed [cx, cy]) ===
+
+    def density(self, species=None):
+        """Entities per cell, of one species name or all of them"""
+        if species is None:
+            return self.counts.sum(axis=0)
+        return self.counts[SPECIES.index(species)]
+
+    def mean(self, trait):
+        """Mean trait value of the agents in each cell (NaN where there are none)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if trait == HUE_TRAIT:
+                return np.where(self.agents > 0, np.arctan2(self.hue_sin, self.hue_cos) / (2 * np.pi) % 1.0, np.nan)
+            return np.where(self.agents > 0, self.sums[self.traits.index(trait)] / self.agents, np.nan)
+
+    def cells_in(self, x0, y0, x1, y1):
+        """(cx0, cy0, cx1, cy1) cell index range (end exclusive) covering a world rectangle"""
+        size = self.cell_size
+        return (min(max(int(x0 // size), 0), self.nx), min(max(int(y0 // size), 0), self.ny),
+                min(max(math.ceil(x1 / size), 0), self.nx), min(max(math.ceil(y1 / size), 0), self.ny))
@@ -0,0 +1,140 @@
+import math
+
+from systems import kernels
+
+
+class NeighbourLists:
+    """
+    Verlet-style neighbour lists for entity-centred radius queries.
+
+    Entities that never move (`mobile` False, i.e. plants) are answered
+    from a list of those within `radius + skin` of where the querying
+    entity stood when the list was built, kept with their coordinates as
+    arrays. Nothing static can come within `radius` until the querier
+    itself has moved more than the skin, so the list is only rebuilt from
+    the spatial hash then, or once too many entities have been placed
+    since the build (newer ones are checked separately). Removed entities
+    are filtered out by their `world`.
+
+    Mobile entities are few, so instead of bounding their drift they are
+    kept in a coarse grid of their own and looked up fresh every query.
+    Queries smaller than a spatial hash cell skip the lists: the hash
+    already answers those from a 3x3 block of cells.
+    """
+
+    def __init__(self, world, skin=20.0, max_births=64, cell_size=50):
+        self.world = world
+        self.skin = skin
+        self.max_births = max_births  # Static entities placed since a build after which it is rebuilt
+        self.cell_size = cell_size
+        self.builds = 0
+        self.hits = 0
+        self._lists = {}  # entity id -> {radius: _List}
+        self._births = []  # The most recently placed static entities
+        self._birth_count = 0  # Static entities ever placed (index of the next one)
+        self._mobile = {}  # Cell key -> {id: mobile entity}
+        for entity in world.entities:
+            self.placed(entity)
+
+    def _key(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    # === Kept in step by the World ===
+
+    def placed(self, entity):
+        if entity.mobile:
+            key = self._key(entity.x, entity.y)
+            if key not in self._mobile:
+                self._mobile[key] = {}
+            self._mobile[key][entity.id] = entity
+        else:
+            self._births.append(entity)
+            self._birth_count += 1
+
+    def moved(self, entity, old_x, old_y):
+        old_key = self._key(old_x, old_y)
+        new_key = self._key(entity.x, entity.y)
+        if old_key != new_key:
+            cell = self._mobile[old_key]
+            del cell[entity.id]
+            if not cell:
+                del self._mobile[old_key]
+            if new_key not in self._mobile:
+                self._mobile[new_key] = {}
+            self._mobile[new_key][entity.id] = entity
+
+    def removed(self, entity):
+        self._lists.pop(entity.id, None)
+        if entity.mobile:
+            key = self._key(entity.x, entity.y)
+            cell = self._mobile[key]
+            del cell[entity.id]
+            if not cell:
+                del self._mobile[key]
+
+    def end_step(self):
+        # Older births are never needed: lists that far behind are rebuilt
+        if len(self._births) > self.max_births:
+            del self._births[:-self.max_births]
+
+    # === Queries ===
+
+    def query(self, entity, radius):
+        """Entities within radius of `entity` (the entity itself included)"""
+        world = self.world
+        x, y = entity.x, entity.y
+        if radius < world.grid_size:
+            return world.get_entities_in_radius(x, y, radius)
+
+        lists = self._lists.get(entity.id)
+        if lists is None:
+            lists = self._lists[entity.id] = {}
+        cached = lists.get(radius)
+        if (cached is None
+                or math.hypot(x - cached.x, y - cached.y) > self.skin
+                or self._birth_count - cached.births > self.max_births):
+            candidates = world.get_entities_in_radius(x, y, radius + self.skin)
+            cached = lists[radius] = _List(x, y, self._birth_count, [e for e in candidates if not e.mobile])
+            self.builds += 1
+        else:
+            self.hits += 1
+
+        static = cached.static
+        result = [
+            static[i] for i in kernels.points_in_radius(cached.xs, cached.ys, x, y, radius)
+            if static[i].world is world
+        ]
+        new = self._birth_count - cached.births
+        if new:
+            for born in kernels.entities_in_radius(self._births[len(self._births) - new:], x, y, radius):
+                if born.world is world:
+                    result.append(born)
+        result.extend(kernels.entities_in_radius(self._mobile_near(x, y, radius), x, y, radius))
+        return result
+
+    def _mobile_near(self, x, y, radius):
+        """Mobile entities in the grid cells overlapping the query circle"""
+        size = self.cell_size
+        cx0, cy0 = int((x - radius) // size), int((y - radius) // size)
+        cx1, cy1 = int((x + radius) // size), int((y + radius) // size)
+        mobile = self._mobile
+        found = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = mobile.get((cx, cy))
+                if cell:
+                    found.extend(cell.values())
+        return found
+
+
+class _List:
+    """Static neighbours cached around (x, y), with their coordinates"""
+    __slots__ = ("x", "y", "births", "static", "xs", "ys")
+
+    def __init__(self, x, y, births, static):
+        self.x = x
+        self.y = y
+        self.births = births
+        self.static = static
+        self.xs = kernels.points([e.x for e in static])
+        self.ys = kernels.points([e.y for e in static])
@@ -0,0 +1,159 @@
+from collections import defaultdict, deque
+from time import perf_counter
+
+# Phases recorded by the built-in instrumentation. Phases may nest (agent
+# phases run inside "step", spatial hash maintenance inside movement and
+# reproduction), so times are inclusive and do not add up.
+PHASES = (
+    "step",
+    "vision",
+    "feeding",
+    "hunting",
+    "interactions",
+    "reproduction",
+    "movement",
+    "plant_spread",
+    "spatial_hash",
+    "render",
+)
+
+
+class _PhaseTimer:
+    __slots__ = ("profiler", "name", "t0")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        profiler = self.profiler
+        profiler._times[self.name] += perf_counter() - self.t0
+        profiler._calls[self.name] += 1
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off: every hook is a no-op"""
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_TIMER
+
+    def count(self, name, n=1):
+        pass
+
+    def end_step(self, world):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    """
+    Lightweight per-phase instrumentation for World.step.
+    Collects wall time and call counts per phase plus free-form counters
+    for the current step, then keeps the last `window` steps for summaries.
+    """
+    enabled = True
+
+    def __init__(self, window=100):
+        self.window = window
+        self.history = deque(maxlen=window)
+        self.total_steps = 0
+        self._times = defaultdict(float)
+        self._calls = defaultdict(int)
+        self._counters = defaultdict(int)
+
+    def phase(self, name):
+        """Context manager timing one call of a phase"""
+        return _PhaseTimer(self, name)
+
+    def count(self, name, n=1):
+        """Add to a per-step counter (e.g. spatial query candidates)"""
+        self._counters[name] += n
+
+    def end_step(self, world):
+        """Close the current step record and start a new one"""
+        self.history.append({
+            "step": world.step_count,
+            "times": dict(self._times),
+            "calls": dict(self._calls),
+            "counters": dict(self._counters),
+            "entities": {kind: len(group) for kind, group in world.entities_by_type.items()},
+        })
+        self.total_steps += 1
+        self._times.clear()
+        self._calls.clear()
+        self._counters.clear()
+
+    def summary(self):
+        """
+        Rolling averages over the recorded window.
+        Times are in milliseconds per step, calls and counters per step.
+        """
+        n = len(self.history)
+        if n == 0:
+            return {"steps": 0, "phases": {}, "counters": {}, "entities": {}}
+
+        times = defaultdict(float)
+        calls = defaultdict(int)
+        counters = defaultdict(int)
+        for record in self.history:
+            for name, value in record["times"].items():
+                times[name] += value
+            for name, value in record["calls"].items():
+                calls[name] += value
+            for name, value in record["counters"].items():
+                counters[name] += value
+
+        phases = {
+            name: {
+                "ms_per_step": 1000.0 * times[name] / n,
+                "calls_per_step": calls[name] / n,
+                "us_per_call": 1e6 * times[name] / calls[name] if calls[name] else 0.0,
+            }
+            for name in sorted(times, key=times.get, reverse=True)
+        }
+        return {
+            "steps": n,
+            "phases": phases,
+            "counters": {name: value / n for name, value in counters.items()},
+            "entities": dict(self.history[-1]["entities"]),
+        }
+
+    def format_summary(self):
+        """Summary as short text lines (used by the display overlay)"""
+        summary = self.summary()
+        lines = [f"Profile (last {summary['steps']} steps)"]
+        for name, stats in summary["phases"].items():
+            lines.append(
+                f"{name}: {stats['ms_per_step']:.2f} ms  x{stats['calls_per_step']:.0f}"
+            )
+        for name, value in summary["counters"].items():
+            lines.append(f"{name}: {value:.0f}/step")
+        return lines
+
+    def reset(self):
+        self.history.clear()
+        self.total_steps = 0
+        self._times.clear()
+        self._calls.clear()
+        self._counters.clear()
@@ -0,0 +1,51 @@
+class EntityRegistry:
+    """
+    Unordered entity list with O(1) membership and removal.
+    Each entity's position is tracked by id, and removal swaps the last
+    entity into the freed slot before popping, so nothing is ever shifted
+    or scanned. Iteration order is therefore not insertion order.
+    """
+
+    def __init__(self):
+        self._items = []
+        self._slots = {}  # entity id -> index in _items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __contains__(self, entity):
+        slot = self._slots.get(entity.id)
+        return slot is not None and self._items[slot] is entity
+
+    def add(self, entity):
+        self._slots[entity.id] = len(self._items)
+        self._items.append(entity)
+
+    def discard(self, entity_id):
+        """Swap-and-pop removal by id; returns the removed entity (None if absent)"""
+        slot = self._slots.pop(entity_id, None)
+        if slot is None:
+            return None
+        items = self._items
+        removed = items[slot]
+        last = items.pop()
+        if last is not removed:
+            items[slot] = last
+            self._slots[last.id] = slot
+        return removed
+
+    def stable(self, count=None):
+        """
+        Iterate over the first `count` entities (default: all present now)
+        without copying. Entities appended meanwhile are not visited, so
+        this is safe while removals are deferred.
+        """
+        items = self._items
+        for i in range(len(items) if count is None else count):
+            yield items[i]
@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+class Scheduler:
+    """
+    Buckets entities by the tick their next event on a channel is due
+    (e.g. "vision", "reproduction", "plant_spread"), so each step only the
+    due cohort is touched. An entity has at most one pending tick per
+    channel; rescheduling or cancelling just updates that record and the
+    stale bucket entry is skipped when its tick comes up.
+    """
+
+    def __init__(self):
+        self._buckets = defaultdict(dict)  # channel -> {tick: [entity, ...]}
+        self._due = defaultdict(dict)  # channel -> {entity id: tick}
+
+    def schedule(self, channel, entity, tick):
+        """Make `entity` due on `channel` at `tick` (replaces any earlier tick)"""
+        due = self._due[channel]
+        if due.get(entity.id) == tick:
+            return
+        due[entity.id] = tick
+        buckets = self._buckets[channel]
+        if tick not in buckets:
+            buckets[tick] = []
+        buckets[tick].append(entity)
+
+    def cancel(self, entity, channel=None):
+        """Drop the entity's pending events (on one channel or all of them)"""
+        channels = (channel,) if channel is not None else self._due.keys()
+        for name in channels:
+            self._due[name].pop(entity.id, None)
+
+    def clear(self):
+        """Drop every pending event"""
+        self._buckets.clear()
+        self._due.clear()
+
+    def due_tick(self, channel, entity):
+        return self._due[channel].get(entity.id)
+
+    def pop_due(self, channel, tick):
+        """Remove and return the entities due on `channel` at `tick`"""
+        bucket = self._buckets[channel].pop(tick, None)
+        if not bucket:
+            return []
+        due = self._due[channel]
+        cohort = []
+        for entity in bucket:
+            if due.get(entity.id) == tick:
+                del due[entity.id]
+                cohort.append(entity)
+        return cohort
+
+    def pending(self, channel):
+        """Number of entities with an event pending on `channel`"""
+        return len(self._due[channel])
+
+    def load(self, channel, start, ticks):
+        """Cohort sizes for the next `ticks` ticks (to check load is spread out)"""
+        due = self._due[channel]
+        buckets = self._buckets[channel]
+        return [
+            sum(1 for e in buckets.get(tick, ()) if due.get(e.id) == tick)
+            for tick in range(start, start + ticks)
+        ]
@@ -0,0 +1,105 @@
+import math
+from dataclasses import dataclass, field, fields, replace
+from functools import lru_cache
+
+from core import config as config_module
+
+# Species ids index the per-species parameter tables below (same codes as
+# the event log)
+SPECIES = ("Plant", "Prey", "Predator", "Agent")
+SPECIES_IDS = {name: i for i, name in enumerate(SPECIES)}
+
+
+@dataclass(frozen=True)
+class SimConfig:
+    """
+    Immutable per-world simulation parameters.
+    Built from the module-level defaults in core/config.py (field names are
+    the lower-case config names), so several worlds with different
+    parameters can coexist in one process. Per-species values are resolved
+    once into tuples indexed by species id, which hot paths read directly.
+    """
+    world_width: float
+    world_height: float
+    growth_rate: int
+    plant_growth_interval: int
+    repro_chance: float
+    repro_distance: float
+    n_predators: int
+    max_predators: float
+    n_prey: int
+    max_prey: float
+    n_plants: int
+    max_plants: float
+    max_energy: float
+    max_health: float
+    energy_per_step: float
+    default_speed: float
+    default_turn_rate: float
+    predator_speed: float
+    predator_turn_rate: float
+    prey_speed: float
+    prey_turn_rate: float
+    movement_collisions: str
+    starvation_damage: float
+    plant_energy_value: float
+    prey_energy_value: float
+    plant_maturity_age: int
+    plant_spread_chance: float
+    plant_spread_radius: float
+    mutation_rate: float
+    mutation_strength: float
+
+    # Derived per-species tables (indexed by SPECIES_IDS)
+    base_speed: tuple = field(init=False, repr=False, compare=False)
+    base_turn_rate: tuple = field(init=False, repr=False, compare=False)
+    max_population: tuple = field(init=False, repr=False, compare=False)
+    # Derived energy thresholds
+    hunger_threshold: float = field(init=False, repr=False, compare=False)
+    base_repro_threshold: float = field(init=False, repr=False, compare=False)
+    reproduction_energy: float = field(init=False, repr=False, compare=False)
+    initial_energy: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        derived = {
+            # Plants never move; plain "Agent"s use the defaults
+            "base_speed": (0.0, self.prey_speed, self.predator_speed, self.default_speed),
+            "base_turn_rate": (0.0, self.prey_turn_rate, self.predator_turn_rate, self.default_turn_rate),
+            # Plant growth is capped by spreading, not on insertion
+            "max_population": (math.inf, self.max_prey, self.max_predators, math.inf),
+            "hunger_threshold": self.max_energy // 2,
+            "base_repro_threshold": self.max_energy * 0.8,
+            "reproduction_energy": self.max_energy // 3,
+            "initial_energy": self.max_energy // 2,
+        }
+        for name, value in derived.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_module(cls, module=config_module, **overrides):
+        """Snapshot the module-level config, applying keyword overrides"""
+        values = {
+            f.name: getattr(module, f.name.upper())
+            for f in fields(cls) if f.init
+        }
+        unknown = set(overrides) - set(values)
+        if unknown:
+            raise TypeError(f"Unknown config parameters: {', '.join(sorted(unknown))}")
+        values.update(overrides)
+        return cls(**values)
+
+    def replace(self, **overrides):
+        """Copy with some parameters changed (derived tables are rebuilt)"""
+        return replace(self, **overrides)
+
+    def to_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+
+
+@lru_cache(maxsize=1)
+def default_config():
+    """
+    Config used by entities created outside any world. Snapshot of the
+    module defaults taken on first use.
+    """
+    return SimConfig.from_module()
@@ -0,0 +1,340 @@
+"""
+Spatial indexes behind World.get_entities_in_radius.
+
+Every index answers candidates(x, y, radius, out): it appends to `out` at
+least every entity within radius of (x, y) (the caller does the exact
+distance test), in a deterministic order. candidates_in_rect(x0, y0, x1,
+y1, out) does the same for an axis-aligned rectangle.
+
+  GridIndex     - uniform grid of dict cells; the cell size can be retuned
+  QuadtreeIndex - bucket quadtree that splits crowded leaves, for heavily
+                  clustered types such as spreading plants
+
+SpatialIndex routes each entity type to one of them: types without an
+explicit choice share a single grid, and with auto-tuning that grid's
+cell size follows the observed query radii and entity density.
+"""
+from collections import Counter
+
+
+class GridIndex:
+    """Uniform grid: cell key -> {entity id: entity}"""
+    kind = "grid"
+
+    def __init__(self, cell_size=20):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+
+    def _key(self, x, y):
+        size = self.cell_size
+        return (int(x // size), int(y // size))
+
+    def add(self, entity):
+        key = self._key(entity.x, entity.y)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = {}
+        cell[entity.id] = entity
+        self.count += 1
+
+    def remove(self, entity):
+        key = self._key(entity.x, entity.y)
+        cell = self.cells.get(key)
+        if cell is not None and cell.pop(entity.id, None) is not None:
+            self.count -= 1
+            if not cell:
+                del self.cells[key]
+
+    def move(self, entity, old_x, old_y):
+        old_key = self._key(old_x, old_y)
+        new_key = self._key(entity.x, entity.y)
+        if old_key != new_key:
+            cell = self.cells.get(old_key)
+            if cell is not None and cell.pop(entity.id, None) is not None and not cell:
+                del self.cells[old_key]
+            cell = self.cells.get(new_key)
+            if cell is None:
+                cell = self.cells[new_key] = {}
+            cell[entity.id] = entity
+
+    def candidates(self, x, y, radius, out):
+        # Only the cells the query square overlaps, columns then rows
+        size = self.cell_size
+        cells = self.cells
+        cx0, cx1 = int((x - radius) // size), int((x + radius) // size)
+        cy0, cy1 = int((y - radius) // size), int((y + radius) // size)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is not None:
+                    out.extend(cell.values())
+
+    def candidates_in_rect(self, x0, y0, x1, y1, out):
+        size = self.cell_size
+        cells = self.cells
+        cx0, cx1 = int(x0 // size), int(x1 // size)
+        cy0, cy1 = int(y0 // size), int(y1 // size)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(cells):
+            # Covers more cells than are occupied: walk the occupied ones
+            for (cx, cy), cell in sorted(cells.items()):
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    out.extend(cell.values())
+            return
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is not None:
+                    out.extend(cell.values())
+
+    def entities(self):
+        for cell in self.cells.values():
+            yield from cell.values()
+
+    def resize(self, cell_size):
+        """Rebuild with a new cell size"""
+        entities = list(self.entities())
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+        for entity in entities:
+            self.add(entity)
+
+    def crowding(self):
+        """Entity-weighted mean cell occupancy (sum of n^2 / sum of n)"""
+        if not self.count:
+            return 0.0
+        return sum(len(cell) ** 2 for cell in self.cells.values()) / self.count
+
+
+class _Node:
+    __slots__ = ("x0", "y0", "x1", "y1", "depth", "parent", "items", "children")
+
+    def __init__(self, x0, y0, x1, y1, depth, parent):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.depth = depth
+        self.parent = parent
+        self.items = {}  # Leaf contents (entity id -> entity); None once split
+        self.children = None  # Four quadrants once split
+
+
+class QuadtreeIndex:
+    """
+    Bucket quadtree over the world rectangle. A leaf holding more than
+    `capacity` entities splits into quadrants (down to `max_depth`), and
+    quadrants whose total drops to a quarter of that merge back, so dense
+    clusters get small leaves while empty space stays coarse.
+    """
+    kind = "quadtree"
+
+    def __init__(self, width, height, capacity=16, max_depth=10):
+        self.capacity = capacity
+        self.max_depth = max_depth
+        self.root = _Node(0.0, 0.0, float(width), float(height), 0, None)
+        self.count = 0
+        self._leaf_of = {}  # entity id -> leaf holding it
+
+    def _leaf(self, x, y):
+        node = self.root
+        while node.children is not None:
+            mx = (node.x0 + node.x1) / 2
+            my = (node.y0 + node.y1) / 2
+            node = node.children[(x >= mx) * 2 + (y >= my)]
+        return node
+
+    def add(self, entity):
+        leaf = self._leaf(entity.x, entity.y)
+        leaf.items[entity.id] = entity
+        self._leaf_of[entity.id] = leaf
+        self.count += 1
+        if len(leaf.items) > self.capacity and leaf.depth < self.max_depth:
+            self._split(leaf)
+
+    def _split(self, leaf):
+        x0, y0, x1, y1 = leaf.x0, leaf.y0, leaf.x1, leaf.y1
+        mx, my = (x0 + x1) / 2, (y0 + y1) / 2
+        depth = leaf.depth + 1
+        leaf.children = (
+            _Node(x0, y0, mx, my, depth, leaf),
+            _Node(x0, my, mx, y1, depth, leaf),
+            _Node(mx, y0, x1, my, depth, leaf),
+            _Node(mx, my, x1, y1, depth, leaf),
+        )
+        items, leaf.items = leaf.items, None
+        for entity in items.values():
+            child = leaf.children[(entity.x >= mx) * 2 + (entity.y >= my)]
+            child.items[entity.id] = entity
+            self._leaf_of[entity.id] = child
+        for child in leaf.children:
+            if len(child.items) > self.capacity and child.depth < self.max_depth:
+                self._split(child)
+
+    def remove(self, entity):
+        leaf = self._leaf_of.pop(entity.id, None)
+        if leaf is None:
+            return
+        del leaf.items[entity.id]
+        self.count -= 1
+        self._merge(leaf.parent)
+
+    def _merge(self, node):
+        """Collapse sparse quadrants back into their parent, walking up"""
+        while node is not None:
+            children = node.children
+            if any(child.children is not None for child in children):
+                return
+            total = sum(len(child.items) for child in children)
+            if total > self.capacity // 4:
+                return
+            node.items = {}
+            for child in children:
+                for entity_id, entity in child.items.items():
+                    node.items[entity_id] = entity
+                    self._leaf_of[entity_id] = node
+            node.children = None
+            node = node.parent
+
+    def move(self, entity, old_x, old_y):
+        leaf = self._leaf_of.get(entity.id)
+        if leaf is not self._leaf(entity.x, entity.y):
+            self.remove(entity)
+            self.add(entity)
+
+    def candidates(self, x, y, radius, out):
+        self.candidates_in_rect(x - radius, y - radius, x + radius, y + radius, out)
+
+    def candidates_in_rect(self, qx0, qy0, qx1, qy1, out):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.x1 < qx0 or node.x0 > qx1 or node.y1 < qy0 or node.y0 > qy1:
+                continue
+            if node.children is None:
+                out.extend(node.items.values())
+            else:
+                stack.extend(reversed(node.children))
+
+    def entities(self):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.children is None:
+                yield from node.items.values()
+            else:
+                stack.extend(reversed(node.children))
+
+    def depth(self):
+        """Depth of the deepest leaf"""
+        return max((leaf.depth for leaf in self._leaf_of.values()), default=0)
+
+
+# Relative cost of visiting a grid cell vs testing one candidate (measured
+# on the dict-of-dicts grid: a cell lookup costs about two distance tests)
+CELL_COST = 2.0
+CELL_SIZES = (5, 7, 10, 14, 20, 28, 40, 56, 80)
+
+
+def best_cell_size(radii, crowding, cell_size, sizes=CELL_SIZES):
+    """
+    Cell size with the lowest modelled cost for the observed query radii.
+    A query of radius r on cells of size c visits about (2r/c + 1)^2 cells
+    and tests about rho * (2r + c)^2 candidates, where rho is the density
+    around entities (crowding / current cell area).
+    """
+    if not radii:
+        return cell_size
+    rho = crowding / (cell_size * cell_size)
+    total = sum(radii.values())
+
+    def cost(c):
+        return sum(
+            n * (CELL_COST * (2 * r / c + 1) ** 2 + rho * (2 * r + c) ** 2)
+            for r, n in radii.items()
+        ) / total
+
+    return min(sizes, key=cost)
+
+
+class SpatialIndex:
+    """
+    Per-type spatial indexes. `kinds` maps an entity type to "grid" or
+    "quadtree"; all other types share one default grid. With `autotune`,
+    tune() picks the default grid's cell size from the query radii seen
+    since the previous call and how crowded its cells are.
+    """
+
+    def __init__(self, width, height, kinds=None, cell_size=20, autotune=True):
+        self.width = width
+        self.height = height
+        self.kinds = dict(kinds or {})
+        self.autotune = autotune
+        self.default = GridIndex(cell_size)
+        self.indexes = {}  # type -> its own index (types listed in kinds)
+        self.radii = Counter()  # Query radius -> count since the last tune
+        self.retunes = 0
+
+    def _make(self, kind):
+        if kind == "grid":
+            return GridIndex(self.default.cell_size)
+        if kind == "quadtree":
+            return QuadtreeIndex(self.width, self.height)
+        raise ValueError(f"Unknown spatial index kind {kind!r} (use 'grid' or 'quadtree')")
+
+    def index_for(self, entity_type):
+        if entity_type not in self.kinds:
+            return self.default
+        index = self.indexes.get(entity_type)
+        if index is None:
+            index = self.indexes[entity_type] = self._make(self.kinds[entity_type])
+        return index
+
+    def add(self, entity):
+        self.index_for(entity.type).add(entity)
+
+    def remove(self, entity):
+        self.index_for(entity.type).remove(entity)
+
+    def move(self, entity, old_x, old_y):
+        self.index_for(entity.type).move(entity, old_x, old_y)
+
+    def query(self, x, y, radius):
+        """Candidate entities for a radius query (default grid first, then per-type indexes)"""
+        self.radii[radius] += 1
+        out = []
+        self.default.candidates(x, y, radius, out)
+        for index in self.indexes.values():
+            index.candidates(x, y, radius, out)
+        return out
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Candidate entities for a rectangle (not recorded for tuning)"""
+        out = []
+        self.default.candidates_in_rect(x0, y0, x1, y1, out)
+        for index in self.indexes.values():
+            index.candidates_in_rect(x0, y0, x1, y1, out)
+        return out
+
+    def tune(self):
+        """Resize the default grid if another cell size is clearly cheaper; True if it changed"""
+        radii, self.radii = self.radii, Counter()
+        if not self.autotune or not self.default.count:
+            return False
+        current = self.default.cell_size
+        best = best_cell_size(radii, self.default.crowding(), current)
+        if abs(best - current) / current < 0.25:
+            return False
+        self.default.resize(best)
+        self.retunes += 1
+        return True
+
+    def stats(self):
+        """Per-index summary (for the profiler and benchmarks)"""
+        stats = {"default": {"kind": "grid", "cell_size": self.default.cell_size,
+                             "entities": self.default.count, "cells": len(self.default.cells)}}
+        for entity_type, index in self.indexes.items():
+            if index.kind == "grid":
+                stats[entity_type] = {"kind": "grid", "cell_size": index.cell_size,
+                                      "entities": index.count, "cells": len(index.cells)}
+            else:
+                stats[entity_type] = {"kind": "quadtree", "entities": index.count, "depth": index.depth()}
+        return stats
@@ -0,0 +1,130 @@
+import math
+
+from evolution.genome import TRAIT_INDEX, TRAIT_NAMES
+
+HUE_TRAIT = 'colour'  # Stored as a hue in [0, 1), so it needs a circular mean
+
+class TraitStats:
+    """
+    Running per-species statistics of genome traits.
+    The world updates them in O(traits) whenever an agent is added or
+    removed, so means, variances and histograms are O(1) to read instead of
+    a pass over every entity. Genomes are assumed not to change while
+    their agent is in the world.
+    """
+
+    def __init__(self, trait_names=TRAIT_NAMES, bins=20):
+        self.trait_names = tuple(trait_names)
+        self.bins = bins
+        self._index = {name: i for i, name in enumerate(self.trait_names)}
+        self._hue_index = self._index.get(HUE_TRAIT)
+        self._columns = [TRAIT_INDEX[name] for name in self.trait_names]  # Into Genome.values
+        self.clear()
+
+    def clear(self):
+        self._count = {}
+        self._sum = {}
+        self._sumsq = {}
+        self._hist = {}
+        self._hue_sin = {}
+        self._hue_cos = {}
+
+    def _ensure(self, species):
+        if species not in self._count:
+            n = len(self.trait_names)
+            self._count[species] = 0
+            self._sum[species] = [0.0] * n
+            self._sumsq[species] = [0.0] * n
+            self._hist[species] = [[0] * self.bins for _ in range(n)] if self.bins else None
+            self._hue_sin[species] = 0.0
+            self._hue_cos[species] = 0.0
+
+    def _update(self, species, genome, sign):
+        self._ensure(species)
+        sums = self._sum[species]
+        sumsq = self._sumsq[species]
+        hist = self._hist[species]
+        bins = self.bins
+        values = genome.values
+
+        for i, column in enumerate(self._columns):
+            value = values[column]
+            sums[i] += sign * value
+            sumsq[i] += sign * value * value
+            if hist is not None:
+                hist[i][min(int(value * bins), bins - 1)] += sign
+
+        if self._hue_index is not None:
+            angle = 2 * math.pi * values[self._columns[self._hue_index]]
+            self._hue_sin[species] += sign * math.sin(angle)
+            self._hue_cos[species] += sign * math.cos(angle)
+
+        self._count[species] += sign
+        if self._count[species] == 0:
+            # Drop accumulated rounding error once a species empties out
+            del self._count[species]
+
+    def add(self, species, genome):
+        self._update(species, genome, 1)
+
+    def remove(self, species, genome):
+        self._update(species, genome, -1)
+
+    def rebuild(self, entities):
+        """Recompute everything from scratch (e.g. after editing genomes)"""
+        self.clear()
+        for entity in entities:
+            if hasattr(entity, 'genome'):
+                self.add(entity.type, entity.genome)
+
+    # === Reads ===
+
+    def count(self, species):
+        return self._count.get(species, 0)
+
+    def mean(self, species, trait):
+        """Mean trait value (circular mean for the hue trait)"""
+        n = self._count.get(species, 0)
+        if n == 0:
+            return None
+        i = self._index[trait]
+        if i == self._hue_index:
+            return self.hue_mean(species)
+        return self._sum[species][i] / n
+
+    def variance(self, species, trait):
+        """Population variance (linear, also for the hue trait)"""
+        n = self._count.get(species, 0)
+        if n == 0:
+            return None
+        i = self._index[trait]
+        mean = self._sum[species][i] / n
+        return max(0.0, self._sumsq[species][i] / n - mean * mean)
+
+    def hue_mean(self, species):
+        """Circular mean hue in [0, 1), same result as Colour.average_hues"""
+        if self._count.get(species, 0) == 0:
+            return None
+        angle = math.atan2(self._hue_sin[species], self._hue_cos[species])
+        if angle < 0:
+            angle += 2 * math.pi
+        return angle / (2 * math.pi)
+
+    def hue_concentration(self, species):
+        """Mean resultant length in [0, 1]: 1 = every hue identical, 0 = spread evenly"""
+        n = self._count.get(species, 0)
+        if n == 0:
+            return None
+        return math.hypot(self._hue_sin[species], self._hue_cos[species]) / n
+
+    def histogram(self, species, trait):
+        """Fixed-bin counts over [0, 1] for one trait"""
+        if self._count.get(species, 0) == 0 or not self.bins:
+            return None
+        return list(self._hist[species][self._index[trait]])
+
+    def means(self, species):
+        """{trait: mean} for one species (None if it has no members)"""
+        if self._count.get(species, 0) == 0:
+            return None
+        return {trait: self.mean(species, trait) for trait in self.trait_names}
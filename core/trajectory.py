@@ -0,0 +1,272 @@
+"""
+Trajectory files: per-step entity state for replaying a run without a World.
+
+Layout: MAGIC, a u32 length and a JSON header (world size, quantisation,
+rock map), then one frame per recorded step. Each frame is a fixed-size
+head (step, entity count, payload length, keyframe flag, per-species
+counts) followed by a zlib-compressed payload of integer columns:
+
+  ids      int64   gaps between the sorted entity ids
+  matched  bits    entities also present in the previous frame
+  species  uint8   SPECIES_IDS code
+  x, y     int32   position * POS_SCALE
+  angle    uint16  heading as a fraction of a turn
+  hue      uint16  colour trait * 65535 (0 for plants)
+  size     uint16  size trait * 65535 (0 for plants)
+  energy   uint16  energy / max_energy * 65535
+
+In a delta frame, each column of a matched entity holds the difference
+from that entity's previous value, with wrap-around in the column's dtype.
+Most of those differences are zero or tiny, so they compress well. Every
+`keyframe_interval`-th frame is stored whole. The frames between two
+keyframes form a chunk, and seeking decodes at most one chunk. The reader
+memory-maps the file and rebuilds its frame index from the frame heads,
+so a file cut short by a crash is still readable up to its last complete
+frame.
+"""
+import json
+import mmap
+import struct
+import zlib
+
+import numpy as np
+
+from core.sim_config import SPECIES
+
+MAGIC = b"EVTRAJ1\n"
+POS_SCALE = 64  # Positions are stored in 1/64ths of a world unit
+_HEADER_LENGTH = struct.Struct("<I")
+_FRAME_HEAD = struct.Struct("<IIIB%dI" % len(SPECIES))  # step, n, payload bytes, keyframe, counts
+
+# Stored columns after ids and the matched bits, in payload order
+COLUMNS = (
+    ("species", np.uint8),
+    ("x", np.int32),
+    ("y", np.int32),
+    ("angle", np.uint16),
+    ("hue", np.uint16),
+    ("size", np.uint16),
+    ("energy", np.uint16),
+)
+
+
+class Frame:
+    """One recorded step, as arrays sorted by entity id"""
+    __slots__ = ("step", "ids", "species", "x", "y", "angle", "hue", "size", "energy")
+
+    def __init__(self, step, ids, columns, max_energy):
+        self.step = step
+        self.ids = ids
+        self.species = columns["species"]
+        self.x = columns["x"] / POS_SCALE
+        self.y = columns["y"] / POS_SCALE
+        self.angle = columns["angle"] * (2 * np.pi / 65536)
+        self.hue = columns["hue"] / 65535
+        self.size = columns["size"] / 65535
+        self.energy = columns["energy"] * (max_energy / 65535)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _entity_columns(world):
+    """Integer columns (and ids) of every entity in the world, sorted by id"""
+    max_energy = world.config.max_energy
+    ids, species, xs, ys, angles, hues, sizes, energies = [], [], [], [], [], [], [], []
+    for entity_type, registry in world.entities_by_type.items():
+        entities = list(registry)
+        if not entities:
+            continue
+        n = len(entities)
+        ids.append(np.fromiter((e.id for e in entities), np.int64, n))
+        species.append(np.full(n, entities[0].species_id, np.uint8))
+        xs.append(np.fromiter((e.x for e in entities), np.float64, n))
+        ys.append(np.fromiter((e.y for e in entities), np.float64, n))
+        if entities[0].mobile:
+            angles.append(np.fromiter((e.angle for e in entities), np.float64, n))
+            hues.append(np.fromiter((e.genome.get_trait('colour') for e in entities), np.float64, n))
+            sizes.append(np.fromiter((e.genome.get_trait('size') for e in entities), np.float64, n))
+            energies.append(np.fromiter((e.energy for e in entities), np.float64, n))
+        else:
+            for column in (angles, hues, sizes, energies):
+                column.append(np.zeros(n))
+    if not ids:
+        return np.zeros(0, np.int64), {name: np.zeros(0, dtype) for name, dtype in COLUMNS}
+
+    ids = np.concatenate(ids)
+    order = np.argsort(ids, kind="stable")
+    turns = np.concatenate(angles) / (2 * np.pi) % 1.0
+    columns = {
+        "species": np.concatenate(species),
+        "x": np.round(np.concatenate(xs) * POS_SCALE).astype(np.int32),
+        "y": np.round(np.concatenate(ys) * POS_SCALE).astype(np.int32),
+        "angle": (np.round(turns * 65536).astype(np.int64) % 65536).astype(np.uint16),
+        "hue": np.round(np.clip(np.concatenate(hues), 0, 1) * 65535).astype(np.uint16),
+        "size": np.round(np.clip(np.concatenate(sizes), 0, 1) * 65535).astype(np.uint16),
+        "energy": np.round(np.clip(np.concatenate(energies) / max_energy, 0, 1) * 65535).astype(np.uint16),
+    }
+    return ids[order], {name: column[order] for name, column in columns.items()}
+
+
+def _match(ids, previous_ids):
+    """(matched mask, index of each matched id in previous_ids)"""
+    if not len(previous_ids):
+        return np.zeros(len(ids), bool), np.zeros(len(ids), np.intp)
+    where = np.minimum(np.searchsorted(previous_ids, ids), len(previous_ids) - 1)
+    return previous_ids[where] == ids, where
+
+
+class TrajectoryRecorder:
+    """Appends a frame of every entity's state every `every` steps"""
+
+    def __init__(self, path, world, every=1, keyframe_interval=30, compression=1):
+        self.path = path
+        self.every = every
+        self.keyframe_interval = keyframe_interval
+        self.compression = compression
+        self.frames = 0
+        self._previous = None  # (ids, columns) of the last frame written
+        header = {
+            "width": world.width,
+            "height": world.height,
+            "species": list(SPECIES),
+            "max_energy": world.config.max_energy,
+            "every": every,
+            "keyframe_interval": keyframe_interval,
+        }
+        occlusion = world.occlusion
+        if occlusion is not None:
+            header["rock_map"] = occlusion.grid.astype(int).tolist()
+            header["tile_size"] = occlusion.tile_size
+        data = json.dumps(header).encode()
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + _HEADER_LENGTH.pack(len(data)) + data)
+
+    def record(self, world):
+        """Write the world's current state if this step is due"""
+        if world.step_count % self.every:
+            return
+        ids, columns = _entity_columns(world)
+        keyframe = self._previous is None or self.frames % self.keyframe_interval == 0
+        if keyframe:
+            matched = np.zeros(len(ids), bool)
+            stored = columns
+        else:
+            previous_ids, previous = self._previous
+            matched, where = _match(ids, previous_ids)
+            stored = {}
+            for name, column in columns.items():
+                delta = column.copy()
+                delta[matched] -= previous[name][where[matched]]  # Wraps in the column's dtype
+                stored[name] = delta
+        gaps = np.diff(ids, prepend=np.int64(0))
+        payload = zlib.compress(b"".join(
+            [gaps.tobytes(), np.packbits(matched).tobytes()]
+            + [stored[name].tobytes() for name, _ in COLUMNS]
+        ), self.compression)
+        counts = np.bincount(columns["species"], minlength=len(SPECIES))[:len(SPECIES)]
+        self._file.write(_FRAME_HEAD.pack(world.step_count, len(ids), len(payload), keyframe, *counts.tolist()))
+        self._file.write(payload)
+        self._previous = (ids, columns)
+        self.frames += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class TrajectoryReader:
+    """
+    Random access to the frames of a trajectory file (memory-mapped).
+    frame(i) decodes from the keyframe of frame i's chunk, reusing frames
+    of that chunk already decoded, so playing forward or backward within
+    a chunk costs one decode per frame or less.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a trajectory file")
+        start = len(MAGIC)
+        (length,) = _HEADER_LENGTH.unpack_from(self._map, start)
+        start += _HEADER_LENGTH.size
+        self.header = json.loads(bytes(self._map[start:start + length]))
+        self.width = self.header["width"]
+        self.height = self.header["height"]
+        self.max_energy = self.header["max_energy"]
+
+        # Frame index from the frame heads (stops at a truncated last frame)
+        steps, offsets, sizes, counts, keyframes, species = [], [], [], [], [], []
+        position = start + length
+        end = len(self._map)
+        while position + _FRAME_HEAD.size <= end:
+            step, n, size, keyframe, *per_species = _FRAME_HEAD.unpack_from(self._map, position)
+            if position + _FRAME_HEAD.size + size > end:
+                break
+            steps.append(step)
+            offsets.append(position + _FRAME_HEAD.size)
+            sizes.append(size)
+            counts.append(n)
+            keyframes.append(keyframe)
+            species.append(per_species)
+            position += _FRAME_HEAD.size + size
+        self.steps = np.array(steps, dtype=np.int64)
+        self.counts = np.array(counts, dtype=np.int64)
+        self.species_counts = np.array(species, dtype=np.int64).reshape(len(steps), len(SPECIES))
+        self._offsets = offsets
+        self._sizes = sizes
+        self._keyframes = np.flatnonzero(np.array(keyframes, dtype=bool))
+        self._chunk = None  # Keyframe index of the chunk in _decoded
+        self._decoded = {}  # Frame index -> (ids, integer columns) within that chunk
+
+    def __len__(self):
+        return len(self.steps)
+
+    def index_of(self, step):
+        """Index of the last frame recorded at or before `step` (0 if none)"""
+        return max(0, int(np.searchsorted(self.steps, step, "right")) - 1)
+
+    def frame(self, i):
+        """Frame number i (0 <= i < len(self))"""
+        if not 0 <= i < len(self):
+            raise IndexError(f"frame {i} out of range (0-{len(self) - 1})")
+        key = int(self._keyframes[np.searchsorted(self._keyframes, i, "right") - 1])
+        if key != self._chunk:
+            self._chunk = key
+            self._decoded = {}
+        start = max((j for j in self._decoded if j <= i), default=key - 1)
+        for j in range(start + 1, i + 1):
+            self._decoded[j] = self._decode(j, self._decoded.get(j - 1))
+        ids, columns = self._decoded[i]
+        return Frame(int(self.steps[i]), ids, columns, self.max_energy)
+
+    def _decode(self, i, previous):
+        n = int(self.counts[i])
+        offset, size = self._offsets[i], self._sizes[i]
+        data = zlib.decompress(self._map[offset:offset + size])
+        position = 0
+
+        def take(dtype, count):
+            nonlocal position
+            array = np.frombuffer(data, dtype, count, position)
+            position += array.nbytes
+            return array
+
+        ids = np.cumsum(take(np.int64, n))
+        matched = np.unpackbits(take(np.uint8, (n + 7) // 8), count=n).astype(bool)
+        columns = {name: take(dtype, n).copy() for name, dtype in COLUMNS}
+        if matched.any():
+            previous_ids, previous_columns = previous
+            _, where = _match(ids, previous_ids)
+            for name, column in columns.items():
+                column[matched] += previous_columns[name][where[matched]]
+        return ids, columns
+
+    def close(self):
+        self._map.close()
+        self._file.close()
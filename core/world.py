@@ -3,56 +3,74 @@ from random import randint, uniform
 import random
 import re
 import math
-from core import config
+from core.sim_config import SimConfig
 from entities.plant import Plant
+from entities.prey import Prey
+from entities.predator import Predator
+from systems.occlusion import OcclusionGrid
+from core.profiler import NULL_PROFILER, Profiler
+from core.events import NULL_EVENT_LOG, EventLog
+from core.trajectory import TrajectoryRecorder
+from evolution.lineage import Genealogy
+from core.trait_stats import TraitStats
+from core.scheduler import Scheduler
+from core.registry import EntityRegistry
+from core.neighbours import NeighbourLists
+from core.fields import TraitFields
+from core.spatial import SpatialIndex
+from systems.vision import vision_system
+from systems import kernels
+from core.domain import TileDomain
+from systems.interactions import apply_intents, collect_intents
+from systems.movement import apply_moves
 
 class World:
-    def __init__(self, width, height):
+    def __init__(self, width, height, config=None):
         self.width = width
         self.height = height
-        self.spatial_hash = {}  # For efficient spatial queries
+        # Immutable simulation parameters for this world (module defaults if not given)
+        self.config = config or SimConfig.from_module(world_width=width, world_height=height)
+        self.spatial = SpatialIndex(width, height)  # For efficient spatial queries
+        self.spatial_tune_interval = 0  # Steps between cell size retunes (0 = fixed)
         self.step_count = 0
-        self.grid_size = 20  # Size of spatial hash grid cells
-        self.entities = []
-        self.entities_by_type = defaultdict(list)
+        self.entities = EntityRegistry()
+        self.entities_by_type = defaultdict(EntityRegistry)
+        self.agents = EntityRegistry()  # Prey and predators: all that updates and emits intents each step
+        self._population = defaultdict(int)  # Live count per type (excludes pending removals)
+        self._pending_removals = []  # (type, id) dropped from the registries at the next flush
+        self._defer_removals = False  # True while a step is running
+        self._proposed_moves = None  # [(entity, x, y)] queued by propose_move during agent updates
+        self.occlusion = None  # Optional OcclusionGrid used for line-of-sight
+        self.profiler = NULL_PROFILER  # Replaced by a Profiler when enabled
+        self.events = NULL_EVENT_LOG  # Structured event log, off by default
+        self.trajectory = None  # Optional TrajectoryRecorder writing per-step entity state
+        self._next_id = 1  # Entity ids start at 1 (0 = none)
+        self.lineage = None  # Optional Genealogy of every agent ever added
+        self.scheduler = Scheduler()  # Due ticks for vision, reproduction and plant spread
+        self.domain = None  # Optional TileDomain holding the state while it steps the world on worker processes
+        self.neighbours = None  # Optional NeighbourLists caching agent-centred queries
+        self.fields = None  # Optional TraitFields: per-cell density and trait accumulators
+        self.trait_stats = TraitStats()  # Running trait sums, kept in step with add/remove
 
-    def _get_grid_key(self, x, y):
-        """Get the grid key for spatial hashing"""
-        grid_x = int(x // self.grid_size)
-        grid_y = int(y // self.grid_size)
-        return (grid_x, grid_y)
+    @property
+    def grid_size(self):
+        """Cell size of the shared spatial grid"""
+        return self.spatial.default.cell_size
 
     def _add_to_spatial_hash(self, entity):
-        """Add entity to spatial hash"""
-        key = self._get_grid_key(entity.x, entity.y)
-        if key not in self.spatial_hash:
-            self.spatial_hash[key] = []
-        self.spatial_hash[key].append(entity)
+        """Add entity to the spatial index"""
+        with self.profiler.phase("spatial_hash"):
+            self.spatial.add(entity)
 
     def _remove_from_spatial_hash(self, entity):
-        """Remove entity from spatial hash"""
-        key = self._get_grid_key(entity.x, entity.y)
-        if key in self.spatial_hash and entity in self.spatial_hash[key]:
-            self.spatial_hash[key].remove(entity)
-            if not self.spatial_hash[key]:
-                del self.spatial_hash[key]
+        """Remove entity from the spatial index"""
+        with self.profiler.phase("spatial_hash"):
+            self.spatial.remove(entity)
 
     def _update_spatial_hash(self, entity, old_x, old_y):
-        """Update entity position in spatial hash"""
-        old_key = self._get_grid_key(old_x, old_y)
-        new_key = self._get_grid_key(entity.x, entity.y)
-        
-        if old_key != new_key:
-            # Remove from old position
-            if old_key in self.spatial_hash and entity in self.spatial_hash[old_key]:
-                self.spatial_hash[old_key].remove(entity)
-                if not self.spatial_hash[old_key]:
-                    del self.spatial_hash[old_key]
-            
-            # Add to new position
-            if new_key not in self.spatial_hash:
-                self.spatial_hash[new_key] = []
-            self.spatial_hash[new_key].append(entity)
+        """Update entity position in the spatial index"""
+        with self.profiler.phase("spatial_hash"):
+            self.spatial.move(entity, old_x, old_y)
 
     def is_occupied(self, x, y, radius=5, exclude_entity=None):
         entities = self.get_entities_in_radius(x, y, radius)
@@ -64,10 +82,8 @@ class World:
     def add_entity(self, entity, x=None, y=None):
         """Add entity to world at specified or random position"""
         
-        # Check population limits for prey and predators
-        if entity.type == "Prey" and len(self.entities_by_type.get("Prey", [])) >= config.MAX_PREY:
-            return False  # Don't add if at max capacity
-        elif entity.type == "Predator" and len(self.entities_by_type.get("Predator", [])) >= config.MAX_PREDATORS:
+        # Check population limits (only prey and predators are capped here)
+        if self._population[entity.type] >= self.config.max_population[entity.species_id]:
             return False  # Don't add if at max capacity
         
         if x is None or y is None:
@@ -91,18 +107,75 @@ class World:
         entity.x = x
         entity.y = y
         entity.world = self
-        self.entities.append(entity)
-        self.entities_by_type[entity.type].append(entity)  # Add to type dict
+        entity.config = self.config
+        entity.id = self._next_id
+        self._next_id += 1
+        if hasattr(entity, 'genome'):
+            entity.get_energy_cost()  # Depends on the config just assigned
+            self.trait_stats.add(entity.type, entity.genome)
+            if self.lineage is not None:
+                self.lineage.record_birth(entity, self.step_count)
+        if entity.type == "Plant":
+            # Plants are only touched again when their next spread is due
+            entity.birth_step = self.step_count
+            self._schedule_plant_spread(entity, self.step_count + self.config.plant_maturity_age)
+        elif hasattr(entity, 'genome'):
+            self.scheduler.schedule("vision", entity, vision_system.first_refresh(entity, self.step_count))
+            if entity.energy >= entity.reproduction_threshold():
+                self.schedule_reproduction(entity)
+        self.entities.add(entity)
+        self.entities_by_type[entity.type].add(entity)  # Add to type dict
+        if hasattr(entity, 'genome'):
+            self.agents.add(entity)
+        if self.neighbours is not None:
+            self.neighbours.placed(entity)
+        if self.fields is not None:
+            self.fields.placed(entity)
+        self._population[entity.type] += 1
         self._add_to_spatial_hash(entity)
         
         return True  # Successfully added
 
     def remove_entity(self, entity):
-        if entity in self.entities:
-            self.entities.remove(entity)
-            self.entities_by_type[entity.type].remove(entity)  # Remove from type dict
-            self._remove_from_spatial_hash(entity)
-            entity.world = None
+        """
+        Remove an entity. It leaves the spatial hash (and stops acting) at
+        once, but during a step it stays in the entity registries until the
+        next flush_removals(), so running iterations are not disturbed.
+        """
+        if entity.world is not self or entity not in self.entities:
+            return
+        self._remove_from_spatial_hash(entity)
+        self.scheduler.cancel(entity)
+        if self.neighbours is not None:
+            self.neighbours.removed(entity)
+        if self.fields is not None:
+            self.fields.removed(entity)
+        entity.world = None
+        self._population[entity.type] -= 1
+        if hasattr(entity, 'genome'):
+            self.trait_stats.remove(entity.type, entity.genome)
+            if self.lineage is not None:
+                self.lineage.record_death(entity.id, self.step_count)
+        self._pending_removals.append((entity.type, entity.id))
+        if not self._defer_removals:
+            self.flush_removals()
+
+    def flush_removals(self):
+        """Drop removed entities from the registries (called between step phases)"""
+        pending = self._pending_removals
+        if not pending:
+            return
+        for entity_type, entity_id in pending:
+            self.entities.discard(entity_id)
+            self.entities_by_type[entity_type].discard(entity_id)
+            self.agents.discard(entity_id)
+        pending.clear()
+
+    def population(self, entity_type):
+        """Number of live entities of a type (up to date even mid-step)"""
+        if self.domain is not None:
+            return self.domain.population(entity_type)
+        return self._population[entity_type]
 
     def move_entity(self, entity, new_x, new_y):
         """Move entity to new position with wrapping"""
@@ -115,31 +188,57 @@ class World:
         # Check if target position is occupied
         if self.is_occupied(new_x, new_y, radius=0.01):
             return False
-        
+
+        self._relocate(entity, new_x, new_y)
+        return True
+
+    def propose_move(self, entity, new_x, new_y):
+        """
+        Move entity (with wrapping). During agent updates the move is only
+        queued, and all of them are settled together by systems.movement
+        when the updates finish; outside a step it is applied at once.
+        """
+        if self._proposed_moves is None:
+            return self.move_entity(entity, new_x, new_y)
+        self._proposed_moves.append((entity, new_x, new_y))
+        return True
+
+    def _relocate(self, entity, new_x, new_y):
+        """Set an (already wrapped, unobstructed) position and update the indexes"""
+        old_x, old_y = entity.x, entity.y
         entity.x = new_x
         entity.y = new_y
         self._update_spatial_hash(entity, old_x, old_y)
-        return True
+        if self.neighbours is not None:
+            self.neighbours.moved(entity, old_x, old_y)
+        if self.fields is not None:
+            self.fields.moved(entity, old_x, old_y)
 
     def get_entities_in_radius(self, x, y, radius):
         """Get all entities within radius of (x,y)"""
-        entities = []
-        
-        # Check multiple grid cells around the point
-        grid_radius = int(radius // self.grid_size) + 1
-        center_key = self._get_grid_key(x, y)
-        
-        for dx in range(-grid_radius, grid_radius + 1):
-            for dy in range(-grid_radius, grid_radius + 1):
-                key = (center_key[0] + dx, center_key[1] + dy)
-                if key in self.spatial_hash:
-                    for entity in self.spatial_hash[key]:
-                        distance = math.sqrt((entity.x - x)**2 + (entity.y - y)**2)
-                        if distance <= radius:
-                            entities.append(entity)
+        candidates = self.spatial.query(x, y, radius)
+        entities = kernels.entities_in_radius(candidates, x, y, radius)
+
+        if self.profiler.enabled:
+            self.profiler.count("radius_queries")
+            self.profiler.count("radius_candidates", len(candidates))
+            self.profiler.count("radius_hits", len(entities))
         
         return entities
 
+    def get_entities_in_rect(self, x0, y0, x1, y1):
+        """Get all entities with x0 <= x <= x1 and y0 <= y <= y1"""
+        return [
+            e for e in self.spatial.query_rect(x0, y0, x1, y1)
+            if x0 <= e.x <= x1 and y0 <= e.y <= y1
+        ]
+
+    def neighbours_of(self, entity, radius):
+        """Entities within radius of an entity (itself included), from its neighbour list if enabled"""
+        if self.neighbours is not None:
+            return self.neighbours.query(entity, radius)
+        return self.get_entities_in_radius(entity.x, entity.y, radius)
+
     def get_nearest_entities(self, entity, entity_type=None, count=5, max_distance=50):
         """Get nearest entities of specified type"""
         candidates = self.get_entities_in_radius(entity.x, entity.y, max_distance)
@@ -156,32 +255,240 @@ class World:
         
         return candidates[:count]
 
+    def populate(self, n_plants, n_prey, n_predators):
+        """Add freshly created plants, prey and predators at random positions"""
+        for _ in range(n_plants):
+            self.add_entity(Plant(self.config))
+        for _ in range(n_prey):
+            self.add_entity(Prey(config=self.config))
+        for _ in range(n_predators):
+            self.add_entity(Predator(config=self.config))
+
     def get_all_entities_by_type(self, entity_type):
         return self.entities_by_type.get(entity_type, [])
     def step(self):
         """Advance world simulation by one step"""
         self.step_count += 1
-        # Let all entities step (make a copy to avoid modification during iteration)
-        for entity in self.entities[:]:
-            if hasattr(entity, 'step'):
-                entity.step()
+        now = self.step_count
+        # Removals are queued during the step and flushed between phases
+        self._defer_removals = True
+        try:
+            with self.profiler.phase("step"):
+                if self.domain is not None:
+                    self.domain.step(now)
+                else:
+                    # Entities added this step (births) only start acting next step
+                    count = len(self.agents)
+                    self._run_vision(now)
+                    self._run_reproduction(now)
+                    self._run_updates(count)
+                    self.flush_removals()
+                    self._run_interactions()
+                    self.flush_removals()
+                    self._run_plant_spreads(now)
+        finally:
+            self._defer_removals = False
+            self._proposed_moves = None
+            self.flush_removals()
+            if self.neighbours is not None:
+                self.neighbours.end_step()
+            if self.spatial_tune_interval and now % self.spatial_tune_interval == 0:
+                with self.profiler.phase("spatial_hash"):
+                    self.spatial.tune()
+        self.profiler.end_step(self)
+        if self.trajectory is not None:
+            if self.domain is not None and now % self.trajectory.every == 0:
+                self.sync_domain()
+            self.trajectory.record(self)
+
+    # === Scheduled sub-behaviours (only the cohort due this tick is touched) ===
+
+    def _run_updates(self, count):
+        """Update the first `count` agents, then apply all their moves as one batch"""
+        self._proposed_moves = []
+        for agent in self.agents.stable(count):
+            agent.update()
+        moves, self._proposed_moves = self._proposed_moves, None
+        with self.profiler.phase("movement"):
+            apply_moves(self, moves)
+
+    def schedule_reproduction(self, agent):
+        """Check the agent for reproduction next step"""
+        self.scheduler.schedule("reproduction", agent, self.step_count + 1)
+
+    def _schedule_plant_spread(self, plant, after):
+        due = plant.next_spread_step(after)
+        if due is not None:
+            self.scheduler.schedule("plant_spread", plant, due)
+
+    def _run_vision(self, now):
+        cohort = self.scheduler.pop_due("vision", now)
+        if self.profiler.enabled:
+            self.profiler.count("due_vision", len(cohort))
+        interval = vision_system.refresh_interval
+        with self.profiler.phase("vision"):
+            vision_system.refresh(cohort)
+            for agent in cohort:
+                self.scheduler.schedule("vision", agent, now + interval)
+
+    def _run_reproduction(self, now):
+        cohort = self.scheduler.pop_due("reproduction", now)
+        if self.profiler.enabled:
+            self.profiler.count("due_reproduction", len(cohort))
+        with self.profiler.phase("reproduction"):
+            for agent in cohort:
+                if agent.world is not self:
+                    continue
+                agent.reproduce()
+                # Between meals energy only drains (energy_cost per step), so keep
+                # checking only while the next step's energy still clears the
+                # threshold; eat() reschedules the agent once it is fed again
+                if agent.world is self and agent.energy - agent.energy_cost >= agent.reproduction_threshold():
+                    self.scheduler.schedule("reproduction", agent, now + 1)
+
+    def _run_interactions(self):
+        """Collect every agent's feeding/hunting intent, then settle them together"""
+        with self.profiler.phase("interactions"):
+            intents = collect_intents(self.agents)
+            apply_intents(self, intents)
+
+    def _run_plant_spreads(self, now):
+        """Let every plant whose spread is due try to spread, then reschedule it"""
+        cohort = self.scheduler.pop_due("plant_spread", now)
+        if self.profiler.enabled:
+            self.profiler.count("due_plant_spread", len(cohort))
+        for plant in cohort:
+            if plant.world is not self:
+                continue
+            with self.profiler.phase("plant_spread"):
+                plant.attempt_spread()
+            self._schedule_plant_spread(plant, now)
+
+    def enable_profiling(self, window=100):
+        """Start recording per-phase timings; returns the Profiler"""
+        if not self.profiler.enabled:
+            self.profiler = Profiler(window)
+        return self.profiler
+
+    def disable_profiling(self):
+        self.profiler = NULL_PROFILER
+
+    def enable_domain_decomposition(self, tiles=(2, 2), workers=None):
+        """
+        Hand the world's state to a TileDomain that steps it tile by tile
+        on worker processes; returns the TileDomain. Entity objects only
+        follow it at sync_domain() (and when it is disabled).
+        """
+        self.disable_domain_decomposition()
+        self.domain = TileDomain(self, tiles, workers)
+        return self.domain
+
+    def disable_domain_decomposition(self):
+        """Take the state back from the TileDomain (entity objects and schedules) and stop its workers"""
+        if self.domain is not None:
+            self.domain.pull(reschedule=True)
+            self.domain.close()
+            self.domain = None
+
+    def sync_domain(self, vision=False):
+        """
+        Bring the entity objects up to date with the TileDomain's state
+        (with `vision`, their visible sets too); nothing to do without one
+        """
+        if self.domain is not None:
+            self.domain.pull(vision)
+
+    def enable_neighbour_lists(self, skin=20.0):
+        """
+        Answer agent-centred radius queries from Verlet neighbour lists;
+        returns the NeighbourLists. Results are the same entities the spatial
+        hash would return, though not necessarily in the same order.
+        """
+        self.neighbours = NeighbourLists(self, skin)
+        return self.neighbours
+
+    def disable_neighbour_lists(self):
+        self.neighbours = None
+
+    def enable_trait_fields(self, cell_size=20):
+        """
+        Start keeping per-cell density and trait sums (for heatmap
+        overlays); returns the TraitFields.
+        """
+        if self.fields is None or self.fields.cell_size != cell_size:
+            self.fields = TraitFields(self.width, self.height, cell_size)
+            for entity in self.entities:
+                if entity.world is self:
+                    self.fields.placed(entity)
+        return self.fields
+
+    def disable_trait_fields(self):
+        self.fields = None
+
+    def configure_spatial_index(self, kinds=None, cell_size=20, tune_interval=0):
+        """
+        Rebuild the spatial index; returns the SpatialIndex. `kinds` gives
+        entity types their own "grid" or "quadtree" (e.g. {"Plant":
+        "quadtree"} for clustered plants), and with a tune_interval the
+        shared grid's cell size is retuned from the observed query radii
+        every that many steps.
+        """
+        self.spatial = SpatialIndex(self.width, self.height, kinds, cell_size, autotune=bool(tune_interval))
+        self.spatial_tune_interval = tune_interval
+        for entity in self.entities:
+            self.spatial.add(entity)
+        return self.spatial
+
+    def enable_lineage(self):
+        """
+        Start tracking agent ancestry; returns the Genealogy.
+        Agents already in the world are recorded as founders.
+        """
+        if self.lineage is None:
+            self.lineage = Genealogy()
+            for entity in sorted(self.entities, key=lambda e: e.id):
+                if hasattr(entity, 'genome'):
+                    self.lineage.record_birth(entity, self.step_count)
+        return self.lineage
+
+    def enable_event_log(self, path, fmt="ndjson", level="info", sample=None):
+        """Start writing birth/death/predation/spread events; returns the EventLog"""
+        self.close_event_log()
+        self.events = EventLog(path, fmt=fmt, level=level, sample=sample)
+        return self.events
+
+    def close_event_log(self):
+        self.events.close()
+        self.events = NULL_EVENT_LOG
+
+    def enable_trajectory(self, path, every=1, keyframe_interval=30):
+        """
+        Start recording entity state every `every` steps to a trajectory
+        file for replay (the current state is the first frame); returns
+        the TrajectoryRecorder.
+        """
+        self.close_trajectory()
+        self.trajectory = TrajectoryRecorder(path, self, every, keyframe_interval)
+        self.trajectory.record(self)
+        return self.trajectory
+
+    def close_trajectory(self):
+        if self.trajectory is not None:
+            self.trajectory.close()
+            self.trajectory = None
+
+    def set_rock_map(self, rock_map, tile_size):
+        """Attach a rock occupancy grid (rows x cols, 1 = rock) that blocks vision"""
+        self.occlusion = OcclusionGrid(rock_map, tile_size)
 
     def get_world_bounds(self):
         """Get world dimensions"""
         return (0, 0, self.width, self.height)
     def compute_trait_averages(self):
-        species = {"Prey": [], "Predator": []}
-        for entity in self.entities:
-            if hasattr(entity, "genome"):
-                species.get(entity.type, []).append(entity.genome)
-
+        """Per-species trait means from the running stats (hue uses a circular mean)"""
         averages = {}
-        for kind, genomes in species.items():
-            if not genomes:
-                continue
-            trait_keys = genomes[0].trait_names
-            averages[kind] = {
-                trait: sum(g.get_trait(trait) for g in genomes) / len(genomes)
-                for trait in trait_keys
-            }
+        for kind in ("Prey", "Predator"):
+            means = self.trait_stats.means(kind)
+            if means:
+                averages[kind] = means
         return averages
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class Camera:
+    """
+    Maps world coordinates to the view area of the window: the world point
+    at the view's top-left corner (x0, y0) and a zoom in pixels per world
+    unit. Zoom never goes below what fits the whole world in the view, and
+    the view is kept over the world (centred when it is larger).
+    """
+
+    def __init__(self, world_width, world_height, view_width, view_height, max_zoom=8.0):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.view_width = view_width
+        self.view_height = view_height
+        self.min_zoom = min(view_width / world_width, view_height / world_height)
+        self.max_zoom = max(max_zoom, self.min_zoom)
+        self.zoom = self.min_zoom
+        self.x0 = 0.0
+        self.y0 = 0.0
+        self.version = 0  # Bumped on every change, for caches keyed on the view
+        self.fit()
+
+    def fit(self):
+        """Show the whole world"""
+        self.zoom = self.min_zoom
+        self._clamp()
+
+    @property
+    def shows_everything(self):
+        x0, y0, x1, y1 = self.visible_rect()
+        return x0 <= 0 and y0 <= 0 and x1 >= self.world_width and y1 >= self.world_height
+
+    def visible_rect(self):
+        """World rectangle (x0, y0, x1, y1) covered by the view"""
+        return (self.x0, self.y0,
+                self.x0 + self.view_width / self.zoom, self.y0 + self.view_height / self.zoom)
+
+    def to_screen(self, x, y):
+        """View pixel position of a world point (floats; works on arrays too)"""
+        return (x - self.x0) * self.zoom, (y - self.y0) * self.zoom
+
+    def to_world(self, sx, sy):
+        return self.x0 + sx / self.zoom, self.y0 + sy / self.zoom
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) screen pixels"""
+        self.x0 += dx / self.zoom
+        self.y0 += dy / self.zoom
+        self._clamp()
+
+    def zoom_at(self, factor, sx, sy):
+        """Zoom by `factor`, keeping the world point under view pixel (sx, sy) in place"""
+        wx, wy = self.to_world(sx, sy)
+        self.zoom = float(np.clip(self.zoom * factor, self.min_zoom, self.max_zoom))
+        self.x0 = wx - sx / self.zoom
+        self.y0 = wy - sy / self.zoom
+        self._clamp()
+
+    def _clamp(self):
+        span_x = self.view_width / self.zoom
+        span_y = self.view_height / self.zoom
+        if span_x >= self.world_width:
+            self.x0 = (self.world_width - span_x) / 2
+        else:
+            self.x0 = min(max(self.x0, 0.0), self.world_width - span_x)
+        if span_y >= self.world_height:
+            self.y0 = (self.world_height - span_y) / 2
+        else:
+            self.y0 = min(max(self.y0, 0.0), self.world_height - span_y)
+        self.version += 1
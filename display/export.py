@@ -0,0 +1,128 @@
+"""
+Frame export for videos of (usually headless) runs.
+
+FrameExporter copies each captured frame out of the display surface with
+surfarray and hands it to background threads, so the simulation loop only
+pays for the copy:
+
+  PNG sequence  - a thread pool encodes frame_0000000.png, frame_0000001.png,
+                  ... in capture order (zlib releases the GIL, so the
+                  workers compress in parallel)
+  encoder pipe  - one writer thread streams raw RGB frames to the stdin of
+                  an encoder process such as ffmpeg
+
+At most `max_pending` frames wait for the workers; beyond that capture()
+blocks, so no frame is ever dropped.
+"""
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pygame
+
+
+def encode_png(rgb, compression=6):
+    """PNG file bytes of an (height, width, 3) uint8 array"""
+    height, width, _ = rgb.shape
+    # Every scanline starts with filter type 0 (none)
+    raw = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8-bit RGB
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), compression)) + chunk(b"IEND", b""))
+
+
+def ffmpeg_command(path, width, height, fps=30):
+    """Command line for an ffmpeg process turning raw RGB frames on stdin into a video"""
+    executable = shutil.which("ffmpeg")
+    if executable is None:
+        raise RuntimeError("ffmpeg not found on PATH (export PNG frames instead)")
+    return [
+        executable, "-loglevel", "error", "-y",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+        "-i", "-", "-pix_fmt", "yuv420p", path,
+    ]
+
+
+class FrameExporter:
+    """
+    Writes captured frames as a PNG sequence in `directory`, or pipes them
+    to `command` (a subprocess argument list reading raw RGB24 frames).
+    """
+
+    def __init__(self, directory=None, command=None, workers=2, max_pending=16, compression=6):
+        if (directory is None) == (command is None):
+            raise ValueError("Give exactly one of directory (PNG frames) or command (encoder pipe)")
+        self.directory = directory
+        self.compression = compression
+        self.frames = 0
+        self._slots = threading.Semaphore(max_pending)
+        self._errors = []
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="png")
+            self._process = None
+        else:
+            self._pool = None
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_frames, name="encoder-pipe", daemon=True)
+            self._writer.start()
+
+    def capture(self, surface, area=None):
+        """Copy a frame (optionally a sub-rectangle) and queue it for encoding"""
+        if self._errors:
+            raise self._errors[0]
+        if area is not None:
+            surface = surface.subsurface(area)
+        # surfarray is (width, height, 3); encoders want rows first
+        rgb = pygame.surfarray.array3d(surface).transpose(1, 0, 2)
+        self._slots.acquire()
+        if self._pool is not None:
+            path = os.path.join(self.directory, f"frame_{self.frames:07d}.png")
+            self._pool.submit(self._write_png, path, rgb)
+        else:
+            self._queue.put(rgb)
+        self.frames += 1
+
+    def _write_png(self, path, rgb):
+        try:
+            with open(path, "wb") as f:
+                f.write(encode_png(rgb, self.compression))
+        except Exception as exc:
+            self._errors.append(exc)
+        finally:
+            self._slots.release()
+
+    def _write_frames(self):
+        while True:
+            rgb = self._queue.get()
+            if rgb is None:
+                return
+            try:
+                self._process.stdin.write(np.ascontiguousarray(rgb).tobytes())
+            except Exception as exc:
+                self._errors.append(exc)
+            finally:
+                self._slots.release()
+
+    def close(self):
+        """Wait for every queued frame to be written"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        elif self._process.stdin is not None and not self._process.stdin.closed:
+            self._queue.put(None)
+            self._writer.join()
+            self._process.stdin.close()
+            self._process.wait()
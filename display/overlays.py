@@ -0,0 +1,57 @@
+"""
+Heatmap overlays drawn from a world's TraitFields: one RGBA texel per
+field cell in view, scaled up and blitted over the entities.
+"""
+import numpy as np
+
+from display.heatmap import hsv_to_rgb
+
+# (label, map, argument), cycled with G in the display
+OVERLAYS = (
+    ("Prey density", "density", "Prey"),
+    ("Predator density", "density", "Predator"),
+    ("Plant density", "density", "Plant"),
+    ("Mean speed", "mean", "speed"),
+    ("Mean size", "mean", "size"),
+    ("Mean colour", "mean", "colour"),
+)
+
+
+def overlay_image(fields, overlay, cells, colors):
+    """(columns, rows, 4) uint8 RGBA image of one overlay over a cell range (cx0, cy0, cx1, cy1)"""
+    _, kind, arg = overlay
+    cx0, cy0, cx1, cy1 = cells
+    view = (slice(cx0, cx1), slice(cy0, cy1))
+    image = np.zeros((cx1 - cx0, cy1 - cy0, 4), dtype=np.uint8)
+
+    if kind == "density":
+        density = fields.density(arg)
+        # Scaled by the whole field's peak, so panning doesn't change the colours
+        peak = np.log1p(density.max()) or 1.0
+        image[..., :3] = colors.get(arg, (255, 255, 255))
+        image[..., 3] = (200 * np.log1p(density[view]) / peak).astype(np.uint8)
+        return image
+
+    mean = fields.mean(arg)[view]
+    known = ~np.isnan(mean)
+    values = np.where(known, mean, 0.0)
+    if arg == "colour":
+        image[..., :3] = hsv_to_rgb(values, 0.9, 0.9)
+    else:
+        # Low values blue, high values red
+        image[..., :3] = hsv_to_rgb(0.66 * (1 - values), 0.85, 0.95)
+    image[..., 3] = np.where(known, 170, 0)
+    return image
+
+
+def legend(fields, overlay):
+    """One line describing the overlay's range"""
+    label, kind, arg = overlay
+    if kind == "density":
+        return f"{label}: up to {int(fields.density(arg).max())} per cell"
+    if arg == "colour":
+        return f"{label} (hue)"
+    mean = fields.mean(arg)
+    if np.isnan(mean).all():
+        return f"{label}: no agents"
+    return f"{label}: {np.nanmin(mean):.2f} (blue) - {np.nanmax(mean):.2f} (red)"
@@ -1,3 +1,4 @@
+import os
 import pygame
 import math
 from core import config
@@ -5,14 +6,54 @@ from systems.vision import vision_system
 import colorsys
 from systems.colour import Colour
 from systems.size import Size
+from core.sim_config import SPECIES
+import numpy as np
+from display.camera import Camera
+from display.heatmap import density_image, hue_image
+from display.overlays import OVERLAYS, legend, overlay_image
 class PygameDisplay:
-    def __init__(self, world):
+    """
+    Live view of a World, or (replay mode) playback of a recorded
+    trajectory through a TrajectoryReader, with no World at all.
+    Headless displays render offscreen through SDL's dummy video driver
+    (no window, no frame rate cap), typically to feed a FrameExporter.
+    Worlds larger than VIEW_MAX_WIDTH x VIEW_MAX_HEIGHT are scaled to fit;
+    a Camera pans and zooms the view, only entities inside it are fetched
+    (from the world's spatial index), and when too many would be visible
+    a density heatmap coloured by mean hue is drawn instead.
+    """
+    def __init__(self, world=None, replay=None, headless=False):
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
 
         self.draw_fov = False
+        self.show_profile = False  # Profiler overlay, toggled with P
+        self.max_fps = config.FPS or 30  # 0 = render as fast as possible
 
         self.world = world
-        self.width = int(world.width)
-        self.height = int(world.height)
+        self.replay = replay  # TrajectoryReader in replay mode, else None
+        self.replay_position = 0.0  # Current frame index (fractional at slow speeds)
+        self.replay_speed = 1.0  # Frames advanced per drawn frame; negative plays backward
+        self.replay_paused = False
+        self.replay_plot_rect = None  # Sidebar plot area, clickable to seek
+        self.render_every = 1  # Live mode draws only every N world steps
+        self.exporter = None  # Optional FrameExporter fed every drawn frame
+        source = world if world is not None else replay
+        # The view keeps the world's aspect ratio, shrunk to fit the maximum size
+        scale = min(1.0, config.VIEW_MAX_WIDTH / source.width, config.VIEW_MAX_HEIGHT / source.height)
+        self.width = int(source.width * scale)
+        self.height = int(source.height * scale)
+        self.camera = Camera(source.width, source.height, self.width, self.height)
+        self.lod_budget = config.LOD_ENTITY_BUDGET  # More entities in view than this -> heatmap
+        self.lod_min_zoom = config.LOD_MIN_ZOOM  # Below this zoom -> heatmap
+        self.lod_cell = 4  # Heatmap cell size in screen pixels
+        self.lod_refresh = 5  # Drawn frames a live heatmap is reused for (unless the view moves)
+        self._heatmap = None  # (camera version, frame drawn, scaled surface)
+        self._rock_view = None  # (camera version, rock surface scaled to the view)
+        self._frames_drawn = 0
+        self.overlay = None  # Index into OVERLAYS of the heatmap overlay shown (G cycles)
+        self._drag = False
         self.clock = pygame.time.Clock()
         # Add extra space at the top for UI elements
         self.ui_height = 60
@@ -47,7 +88,9 @@ class PygameDisplay:
             "UI_Background": (50, 50, 50),  # dark gray for UI
             "Text": (255, 255, 255),    # white text
             "Grid": (60, 60, 60),       # subtle grid lines
+            "Rock": (70, 70, 70),       # terrain that blocks vision
         }
+        self.rock_surface = None  # Pre-rendered rock map (built on first draw)
 
         # Entity display properties
         self.entity_sizes = {
@@ -57,15 +100,35 @@ class PygameDisplay:
         }
 
     def draw(self):
+        if self.replay is not None:
+            self._draw_replay_frame()
+        else:
+            if self.world.step_count % self.render_every:
+                return
+            self.world.sync_domain(vision=self.draw_fov)
+            with self.world.profiler.phase("render"):
+                self._draw_frame()
+        self._frames_drawn += 1
+        if self.exporter is not None:
+            self.exporter.capture(self.screen)
+
+        self.clock.tick(0 if self.headless else self.max_fps)
+
+    def _draw_frame(self):
         # Fill the entire screen with background
         self.screen.fill(self.colors["Background"])
         
         # Draw optional grid for reference (background layer)
         self.draw_grid()
+        self.draw_rocks()
         
         # Draw all entities (main simulation layer)
         self.draw_entities()
         
+        # Density / trait heatmap overlay
+        if self.overlay is not None:
+            self.draw_overlay()
+
         # Draw all agents' FOVs (overlay on entities)
         if self.draw_fov:
             for agent in self.world.entities:
@@ -79,6 +142,8 @@ class PygameDisplay:
         # Draw UI elements on top (foreground layer)
         self.draw_sidebar(self.screen, self.font, trait_averages, self.width)
         self.draw_ui()
+        if self.show_profile:
+            self.draw_profile_overlay()
 
 
         pygame.display.flip()
@@ -86,28 +151,196 @@ class PygameDisplay:
         fps_text = self.font.render(f'FPS: {fps:.2f}', True, pygame.Color('white'))
         self.screen.blit(fps_text, (10, 10))  # draw at top-left corner
 
-        self.clock.tick(config.FPS or 30)
-
     def draw_grid(self):
-        """Draw subtle grid lines for reference"""
+        """Draw subtle grid lines for reference (every 50 world units)"""
         grid_size = 50  # Grid spacing
         grid_y_offset = self.ui_height
+        camera = self.camera
+        if grid_size * camera.zoom < 8:
+            return  # Too dense to be useful
+        x0, y0, x1, y1 = camera.visible_rect()
         
         # Vertical lines
-        for x in range(0, self.width, grid_size):
+        for gx in range(max(0, math.ceil(x0 / grid_size) * grid_size), int(min(x1, camera.world_width)), grid_size):
+            x = int((gx - x0) * camera.zoom)
             pygame.draw.line(self.screen, self.colors["Grid"], 
                            (x, grid_y_offset), (x, self.total_height), 1)
         
         # Horizontal lines
-        for y in range(grid_y_offset, self.total_height, grid_size):
+        for gy in range(max(0, math.ceil(y0 / grid_size) * grid_size), int(min(y1, camera.world_height)), grid_size):
+            y = int((gy - y0) * camera.zoom) + grid_y_offset
             pygame.draw.line(self.screen, self.colors["Grid"], 
                            (0, y), (self.width, y), 1)
 
+    def draw_rocks(self):
+        """Draw the world's rock map, if any (rendered once, then blitted)"""
+        if self.rock_surface is None:
+            rocks = self._rock_map()
+            if rocks is None:
+                return
+            rock_map, tile = rocks
+            tile = int(tile)
+            surface = pygame.Surface((len(rock_map[0]) * tile, len(rock_map) * tile), pygame.SRCALPHA)
+            for row, cells in enumerate(rock_map):
+                for col, rock in enumerate(cells):
+                    if rock:
+                        pygame.draw.rect(surface, self.colors["Rock"], (col * tile, row * tile, tile, tile))
+            self.rock_surface = surface
+
+        camera = self.camera
+        if camera.zoom == 1.0 and camera.x0 == 0 and camera.y0 == 0:
+            self.screen.blit(self.rock_surface, (0, self.ui_height))
+            return
+        # Scale only the visible part of the rock map (cached until the view moves)
+        if self._rock_view is None or self._rock_view[0] != camera.version:
+            x0, y0, x1, y1 = camera.visible_rect()
+            area = pygame.Rect(int(x0), int(y0), math.ceil(x1 - int(x0)), math.ceil(y1 - int(y0)))
+            area = area.clip(self.rock_surface.get_rect())
+            if area.width and area.height:
+                scaled = pygame.transform.scale(
+                    self.rock_surface.subsurface(area),
+                    (math.ceil(area.width * camera.zoom), math.ceil(area.height * camera.zoom))
+                )
+            else:
+                scaled = None
+            self._rock_view = (camera.version, scaled, camera.to_screen(area.x, area.y))
+        _, scaled, (sx, sy) = self._rock_view
+        if scaled is not None:
+            self.screen.blit(scaled, (int(sx), int(sy) + self.ui_height))
+
+    def _rock_map(self):
+        """(rows of 0/1 cells, tile size) from the world or the replay header, or None"""
+        if self.replay is not None:
+            if "rock_map" not in self.replay.header:
+                return None
+            return self.replay.header["rock_map"], self.replay.header["tile_size"]
+        occlusion = self.world.occlusion
+        if occlusion is None:
+            return None
+        return occlusion.grid.tolist(), occlusion.tile_size
+
+    def _use_heatmap(self, total):
+        """Whether `total` entities spread over the world are too many to draw in the current view"""
+        camera = self.camera
+        if camera.zoom < self.lod_min_zoom:
+            return True
+        x0, y0, x1, y1 = camera.visible_rect()
+        shown = (min(x1, camera.world_width) - max(x0, 0)) * (min(y1, camera.world_height) - max(y0, 0))
+        return total * shown / (camera.world_width * camera.world_height) > self.lod_budget
+
+    def _visible_entities(self):
+        """World entities inside the view (plus a margin for their shapes)"""
+        camera = self.camera
+        if camera.shows_everything:
+            return self.world.entities
+        margin = 2 * max(self.entity_sizes.values()) / camera.zoom
+        x0, y0, x1, y1 = camera.visible_rect()
+        return self.world.get_entities_in_rect(x0 - margin, y0 - margin, x1 + margin, y1 + margin)
+
+    def draw_heatmap(self, points):
+        """
+        Blit the density/hue heatmap of the view. `points` returns the
+        (xs, ys, hues) arrays to bin; the image is rebuilt when the view
+        moves, or when it is `lod_refresh` frames old.
+        """
+        camera = self.camera
+        cached = self._heatmap
+        if (cached is None or cached[0] != camera.version
+                or self._frames_drawn - cached[1] >= self.lod_refresh):
+            xs, ys, hues = points()
+            shape = (max(1, self.width // self.lod_cell), max(1, self.height // self.lod_cell))
+            image = density_image(xs, ys, hues, camera.visible_rect(), shape, self.colors["Background"])
+            surface = pygame.transform.scale(pygame.surfarray.make_surface(image), (self.width, self.height))
+            self._heatmap = cached = (camera.version, self._frames_drawn, surface)
+        self.screen.blit(cached[2], (0, self.ui_height))
+
+    def _blit_cells(self, image, cells, cell_size):
+        """Scale an image with one texel per grid cell over the cells' place in the view, and blit it"""
+        cx0, cy0, cx1, cy1 = cells
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        camera = self.camera
+        sx, sy = camera.to_screen(cx0 * cell_size, cy0 * cell_size)
+        width = math.ceil((cx1 - cx0) * cell_size * camera.zoom)
+        height = math.ceil((cy1 - cy0) * cell_size * camera.zoom)
+        if image.shape[2] == 4:
+            rows = np.ascontiguousarray(image.transpose(1, 0, 2))
+            surface = pygame.image.frombuffer(rows.tobytes(), (cx1 - cx0, cy1 - cy0), "RGBA")
+        else:
+            surface = pygame.surfarray.make_surface(image)
+        self.screen.set_clip(pygame.Rect(0, self.ui_height, self.width, self.height))
+        self.screen.blit(pygame.transform.scale(surface, (width, height)), (int(sx), int(sy) + self.ui_height))
+        self.screen.set_clip(None)
+
+    def draw_fields_heatmap(self):
+        """Level-of-detail heatmap straight from the world's TraitFields"""
+        fields = self.world.fields
+        cells = fields.cells_in(*self.camera.visible_rect())
+        view = (slice(cells[0], cells[2]), slice(cells[1], cells[3]))
+        counts = fields.counts[:, view[0], view[1]]
+        # Agents contribute their genome hues; plants their display colour's hue
+        plants = counts[SPECIES.index("Plant")]
+        angle = 2 * math.pi * self._type_hue("Plant")
+        cos_sums = fields.hue_cos[view] + plants * math.cos(angle)
+        sin_sums = fields.hue_sin[view] + plants * math.sin(angle)
+        image = hue_image(counts.sum(axis=0), cos_sums, sin_sums, self.colors["Background"])
+        self._blit_cells(image, cells, fields.cell_size)
+
+    def draw_overlay(self):
+        """Blit the selected density/trait overlay over the view, with its legend"""
+        fields = self.world.fields
+        overlay = OVERLAYS[self.overlay]
+        cells = fields.cells_in(*self.camera.visible_rect())
+        self._blit_cells(overlay_image(fields, overlay, cells, self.colors), cells, fields.cell_size)
+        text = self.small_font.render(legend(fields, overlay), True, self.colors["Text"])
+        self.screen.blit(text, (10, self.ui_height + self.height - 24))
+
+    def cycle_overlay(self):
+        """Show the next overlay (after the last one, none)"""
+        if self.overlay is None:
+            self.world.enable_trait_fields()
+            self.overlay = 0
+        elif self.overlay + 1 < len(OVERLAYS):
+            self.overlay += 1
+        else:
+            self.overlay = None
+
+    def _world_points(self):
+        """Positions and hues of every world entity (plants take their display colour's hue)"""
+        xs, ys, hues = [], [], []
+        for registry in self.world.entities_by_type.values():
+            entities = list(registry)
+            if not entities:
+                continue
+            n = len(entities)
+            xs.append(np.fromiter((e.x for e in entities), np.float64, n))
+            ys.append(np.fromiter((e.y for e in entities), np.float64, n))
+            if hasattr(entities[0], 'genome'):
+                hues.append(np.fromiter((e.genome.get_trait('colour') for e in entities), np.float64, n))
+            else:
+                hues.append(np.full(n, self._type_hue(entities[0].type)))
+        if not xs:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        return np.concatenate(xs), np.concatenate(ys), np.concatenate(hues)
+
+    def _type_hue(self, entity_type):
+        r, g, b = self.colors.get(entity_type, (169, 169, 169))
+        return colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)[0]
+
     def draw_entities(self):
-        """Draw all entities in the world"""
+        """Draw the entities in view (or their heatmap when there are too many)"""
         grid_y_offset = self.ui_height
+        if self._use_heatmap(len(self.world.entities)):
+            if self.world.fields is not None:
+                self.draw_fields_heatmap()  # Already binned, no pass over the entities
+            else:
+                self.draw_heatmap(self._world_points)
+            return
+        camera = self.camera
+        zoom = camera.zoom
+        self.screen.set_clip(pygame.Rect(0, grid_y_offset, self.width, self.height))
         
-        for entity in self.world.entities:
+        for entity in self._visible_entities():
             entity_type = getattr(entity, 'type', 'Unknown')
             
            # Get color based on genome or fallback to default
@@ -126,22 +359,11 @@ class PygameDisplay:
 
 
             
-            # Position with UI offset
-            x = int(entity.x)
-            y = int(entity.y) + grid_y_offset
+            # Position in the view, with UI offset
+            x = int((entity.x - camera.x0) * zoom)
+            y = int((entity.y - camera.y0) * zoom) + grid_y_offset
             
-            # Draw entity based on type
-            if entity_type == 'Predator':
-                self.draw_triangle(x, y, size, color, entity)
-            elif entity_type == 'Plant':
-                self.draw_plant_rect(x, y, size, color)
-            else:
-                # Draw as circle for Prey and other entities
-                pygame.draw.circle(self.screen, color, (x, y), size)
-                
-                # Draw border for better visibility
-                border_color = tuple(max(0, c - 50) for c in color)
-                pygame.draw.circle(self.screen, border_color, (x, y), size, 2)
+            self.draw_entity(entity_type, x, y, max(1, int(size * zoom)), color, getattr(entity, 'angle', 0))
             
             # Draw health bar for agents
             #if hasattr(entity, 'health') and entity_type in ['Prey', 'Predator']:
@@ -151,6 +373,22 @@ class PygameDisplay:
             #if hasattr(entity, 'energy') and entity_type in ['Prey', 'Predator']:
                # self.draw_energy_indicator(entity, x, y, size)
 
+        self.screen.set_clip(None)
+
+    def draw_entity(self, entity_type, x, y, size, color, angle=0):
+        """Draw one entity's shape at screen position (x, y)"""
+        if entity_type == 'Predator':
+            self.draw_triangle(x, y, size, color, angle)
+        elif entity_type == 'Plant':
+            self.draw_plant_rect(x, y, size, color)
+        else:
+            # Draw as circle for Prey and other entities
+            pygame.draw.circle(self.screen, color, (x, y), size)
+
+            # Draw border for better visibility
+            border_color = tuple(max(0, c - 50) for c in color)
+            pygame.draw.circle(self.screen, border_color, (x, y), size, 2)
+
     ''''def get_genome_color(self, entity):
         """Convert genome color trait to RGB color using HSV"""
         if not hasattr(entity, 'genome') or not hasattr(entity.genome, 'get_trait'):
@@ -185,11 +423,8 @@ class PygameDisplay:
         border_color = tuple(max(0, c - 50) for c in color)
         pygame.draw.rect(self.screen, border_color, rect, 1)
 
-    def draw_triangle(self, x, y, size, color, entity):
+    def draw_triangle(self, x, y, size, color, angle):
         """Draw a triangle for predators, pointing in the direction they're facing"""
-        # Get the entity's angle (direction it's facing)
-        angle = getattr(entity, 'angle', 0)
-        
         # Calculate triangle points relative to center
         # Base triangle pointing right (0 radians)
         points = [
@@ -236,7 +471,7 @@ class PygameDisplay:
     def draw_energy_indicator(self, entity, x, y, size):
         """Draw energy level as inner circle brightness"""
         if hasattr(entity, 'energy'):
-            max_energy = getattr(config, 'MAX_ENERGY', 100)
+            max_energy = self.world.config.max_energy
             energy_ratio = max(0, min(1, entity.energy / max_energy))
 
             # Draw inner circle with brightness based on energy
@@ -293,12 +528,224 @@ class PygameDisplay:
         fps_text = self.small_font.render(f"FPS: {int(self.clock.get_fps())}", True, self.colors["Text"])
         self.screen.blit(fps_text, (self.width - 80, 35))
 
+    def draw_profile_overlay(self):
+        """Draw the world profiler's rolling summary over the simulation area"""
+        lines = self.world.profiler.format_summary()
+        line_height = 18
+        panel = pygame.Surface((260, line_height * len(lines) + 10), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            text = self.small_font.render(line, True, self.colors["Text"])
+            panel.blit(text, (5, 5 + i * line_height))
+        self.screen.blit(panel, (10, self.ui_height + 10))
+
+    # === Replay mode ===
+
+    def advance_replay(self):
+        """Move the playback position by the current speed (pauses at either end)"""
+        if self.replay_paused or not len(self.replay):
+            return
+        last = len(self.replay) - 1
+        self.replay_position = min(max(self.replay_position + self.replay_speed, 0.0), float(last))
+        if self.replay_position in (0.0, last):
+            self.replay_paused = True
+
+    def seek(self, step):
+        """Jump to the last frame recorded at or before a world step"""
+        self.replay_position = float(self.replay.index_of(step))
+
+    def _draw_replay_frame(self):
+        self.screen.fill(self.colors["Background"])
+        self.draw_grid()
+        self.draw_rocks()
+        if len(self.replay):
+            frame = self.replay.frame(int(self.replay_position))
+            self.draw_frame_entities(frame)
+        else:
+            frame = None
+        self.draw_replay_sidebar()
+        self.draw_replay_ui(frame)
+        pygame.display.flip()
+
+    def draw_frame_entities(self, frame):
+        """Draw a recorded Frame (same shapes and colours as the live view)"""
+        grid_y_offset = self.ui_height
+        camera = self.camera
+        if self._use_heatmap(len(frame)):
+            self.draw_heatmap(lambda: self._frame_points(frame))
+            return
+        # Cull to the view, then convert to screen coordinates in one go
+        sx, sy = camera.to_screen(frame.x, frame.y)
+        margin = 2 * max(self.entity_sizes.values())
+        keep = (sx >= -margin) & (sx <= self.width + margin) & (sy >= -margin) & (sy <= self.height + margin)
+        zoom = camera.zoom
+        columns = (frame.species[keep].tolist(), sx[keep].tolist(), sy[keep].tolist(),
+                   frame.angle[keep].tolist(), frame.hue[keep].tolist(), frame.size[keep].tolist())
+        self.screen.set_clip(pygame.Rect(0, grid_y_offset, self.width, self.height))
+        for code, x, y, angle, hue, size_trait in zip(*columns):
+            entity_type = SPECIES[code]
+            base_size = self.entity_sizes.get(entity_type, 5)
+            if entity_type == 'Plant':
+                color = self.colors["Plant"]
+                size = base_size
+            else:
+                color = Colour.hue_to_rgb(hue)
+                size = Size.from_trait(size_trait, base_size)
+            self.draw_entity(entity_type, int(x), int(y) + grid_y_offset, max(1, int(size * zoom)), color, angle)
+        self.screen.set_clip(None)
+
+    def _frame_points(self, frame):
+        """Positions and hues of a recorded Frame (plants take their display colour's hue)"""
+        plant_hue = self._type_hue("Plant")
+        hues = np.where(frame.species == SPECIES.index("Plant"), plant_hue, frame.hue)
+        return frame.x, frame.y, hues
+
+    def draw_replay_ui(self, frame):
+        """Top bar in replay mode: step, counts and playback state"""
+        ui_rect = pygame.Rect(0, 0, self.width, self.ui_height)
+        pygame.draw.rect(self.screen, self.colors["UI_Background"], ui_rect)
+        if frame is None:
+            text = self.font.render("Empty trajectory", True, self.colors["Text"])
+            self.screen.blit(text, (10, 10))
+            return
+
+        index = int(self.replay_position)
+        state = "paused" if self.replay_paused else f"x{self.replay_speed:g}"
+        step_text = self.font.render(
+            f"Step: {frame.step}  [{index + 1}/{len(self.replay)}  {state}]", True, self.colors["Text"]
+        )
+        self.screen.blit(step_text, (10, 10))
+        counts = self.replay.species_counts[index]
+        counts_text = self.small_font.render(
+            "  ".join(f"{name}: {counts[i]}" for i, name in enumerate(SPECIES) if name in self.entity_sizes)
+            + f"  Total: {len(frame)}",
+            True, self.colors["Text"]
+        )
+        self.screen.blit(counts_text, (10, 35))
+
+    def draw_replay_sidebar(self):
+        """Whole-run population plot with the playback position, and the controls"""
+        padding_x = 10
+        plot_width = self.sidebar_width - 2 * padding_x
+        plot_height = 150
+        plot_x = self.width + padding_x
+        plot_y = self.ui_height
+        self.replay_plot_rect = pygame.Rect(plot_x, plot_y, plot_width, plot_height)
+
+        pygame.draw.rect(self.screen, self.colors["UI_Background"], (self.width, 0, self.sidebar_width, self.total_height))
+        pygame.draw.rect(self.screen, (30, 30, 30), self.replay_plot_rect)
+        counts = self.replay.species_counts
+        n = len(counts)
+        if n > 1:
+            # One sample per plot column
+            columns = [min(n - 1, i * (n - 1) // max(1, plot_width - 1)) for i in range(plot_width)]
+            max_count = max(1, int(counts[:, [SPECIES.index(s) for s in self.entity_sizes]].max()))
+            for species in self.entity_sizes:
+                column = counts[:, SPECIES.index(species)]
+                points = [
+                    (plot_x + i, plot_y + plot_height - int(column[row] / max_count * plot_height))
+                    for i, row in enumerate(columns)
+                ]
+                pygame.draw.lines(self.screen, self.colors[species], False, points, 2)
+            cursor_x = plot_x + int(self.replay_position / (n - 1) * (plot_width - 1))
+            pygame.draw.line(self.screen, self.colors["Text"], (cursor_x, plot_y), (cursor_x, plot_y + plot_height), 1)
+
+        controls = (
+            "Space  play / pause",
+            "Left/Right  step one frame",
+            "Up/Down  faster / slower",
+            "B  reverse direction",
+            "PgUp/PgDn  jump 10%",
+            "Home/End  first / last frame",
+            "Click plot  seek",
+        )
+        for i, line in enumerate(controls):
+            text = self.small_font.render(line, True, (200, 200, 200))
+            self.screen.blit(text, (plot_x, plot_y + plot_height + 15 + i * 20))
+
+    def handle_replay_key(self, key):
+        last = max(0, len(self.replay) - 1)
+        if key == pygame.K_SPACE:
+            self.replay_paused = not self.replay_paused
+        elif key in (pygame.K_LEFT, pygame.K_RIGHT):
+            self.replay_paused = True
+            step = 1 if key == pygame.K_RIGHT else -1
+            self.replay_position = float(min(max(int(self.replay_position) + step, 0), last))
+        elif key == pygame.K_UP:
+            self.replay_speed *= 2
+        elif key == pygame.K_DOWN:
+            self.replay_speed /= 2
+        elif key == pygame.K_b:
+            self.replay_speed = -self.replay_speed
+        elif key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+            jump = max(1, len(self.replay) // 10) * (1 if key == pygame.K_PAGEDOWN else -1)
+            self.replay_position = float(min(max(int(self.replay_position) + jump, 0), last))
+        elif key == pygame.K_HOME:
+            self.replay_position = 0.0
+        elif key == pygame.K_END:
+            self.replay_position = float(last)
+
+    def handle_replay_click(self, pos):
+        rect = self.replay_plot_rect
+        if rect is not None and rect.collidepoint(pos) and len(self.replay) > 1:
+            fraction = (pos[0] - rect.x) / max(1, rect.width - 1)
+            self.replay_position = float(round(fraction * (len(self.replay) - 1)))
+
+    def handle_camera_event(self, event):
+        """
+        Pan and zoom: mouse wheel zooms at the cursor, right or middle drag
+        pans, W/A/S/D pan, +/- zoom, F fits the whole world. Returns True if
+        the event was used.
+        """
+        camera = self.camera
+        if event.type == pygame.MOUSEWHEEL:
+            mx, my = pygame.mouse.get_pos()
+            if mx < self.width and my >= self.ui_height:
+                camera.zoom_at(1.25 ** event.y, mx, my - self.ui_height)
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+            self._drag = True
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+            self._drag = False
+            return True
+        if event.type == pygame.MOUSEMOTION and self._drag:
+            dx, dy = event.rel
+            camera.pan(-dx, -dy)
+            return True
+        if event.type == pygame.KEYDOWN:
+            step = 0.1 * self.width
+            if event.key == pygame.K_w:
+                camera.pan(0, -step)
+            elif event.key == pygame.K_s:
+                camera.pan(0, step)
+            elif event.key == pygame.K_a:
+                camera.pan(-step, 0)
+            elif event.key == pygame.K_d:
+                camera.pan(step, 0)
+            elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                camera.zoom_at(1.25, self.width / 2, self.height / 2)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                camera.zoom_at(0.8, self.width / 2, self.height / 2)
+            elif event.key == pygame.K_f:
+                camera.fit()
+            else:
+                return False
+            return True
+        return False
+
     def handle_events(self):
         """Handle pygame events"""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 exit()
+            elif self.handle_camera_event(event):
+                pass
+            elif event.type == pygame.KEYDOWN and self.replay is not None and event.key != pygame.K_ESCAPE:
+                self.handle_replay_key(event.key)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.replay is not None:
+                self.handle_replay_click(event.pos)
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     pygame.quit()
@@ -309,9 +756,14 @@ class PygameDisplay:
                     print(f"Entities - Plants: {len(self.world.get_all_entities_by_type('Plant'))}, "
                           f"Prey: {len(self.world.get_all_entities_by_type('Prey'))}, "
                           f"Predators: {len(self.world.get_all_entities_by_type('Predator'))}")
+                elif event.key == pygame.K_p:
+                    # Toggle profiler overlay (starts profiling on first use)
+                    self.show_profile = not self.show_profile
+                    if self.show_profile:
+                        self.world.enable_profiling()
                 elif event.key == pygame.K_g:
-                    # Toggle grid visibility
-                    pass  # Could implement grid toggle
+                    # Cycle density/trait heatmap overlays (starts the trait fields on first use)
+                    self.cycle_overlay()
                 elif event.key == pygame.K_r:
                     # Reset world
                     print("Reset not implemented yet")
@@ -397,10 +849,14 @@ class PygameDisplay:
                 step_text = self.small_font.render(f"Steps 1-{total_steps}", True, (150, 150, 150))
                 screen.blit(step_text, (plot_x, plot_y + plot_height + 25))
 
+    def _screen_pos(self, x, y):
+        """Integer window position of a world point (view transform plus UI offset)"""
+        sx, sy = self.camera.to_screen(x, y)
+        return int(sx), int(sy) + self.ui_height
+
     def draw_agent_fov(self, agent, vision_system):
         """Draw agent's field of view"""
-        if not hasattr(agent, 'visible_entities'):
-            return
+        visible = agent.visible_entities
         
         # Get the UI offset
         grid_y_offset = self.ui_height
@@ -409,7 +865,7 @@ class PygameDisplay:
         eye_positions = vision_system._get_eye_positions(agent)
         
         # Colors for different eyes
-        eye_colors = [(255, 100, 100, 50), (100, 255, 100, 50)]  # Red, Green with alpha
+        eye_colors = [(255, 100, 100, 50), (100, 255, 100, 50), (100, 100, 255, 50), (255, 255, 100, 50)]  # With alpha
         
         for eye_idx, eye_angle in enumerate(eye_positions):
             # Calculate absolute eye angle (relative to world)
@@ -420,15 +876,16 @@ class PygameDisplay:
             fov_end = absolute_eye_angle + vision_system.eye_fov / 2
             
             # Create FOV arc points with UI offset
-            points = [(int(agent.x), int(agent.y) + grid_y_offset)]  # Start at agent center with offset
+            points = [self._screen_pos(agent.x, agent.y)]  # Start at agent center with offset
             
             # Add arc points
             num_points = 20
             for i in range(num_points + 1):
                 angle = fov_start + (fov_end - fov_start) * i / num_points
-                x = int(agent.x + math.cos(angle) * vision_system.max_vision_range)
-                y = int(agent.y + math.sin(angle) * vision_system.max_vision_range) + grid_y_offset
-                points.append((x, y))
+                points.append(self._screen_pos(
+                    agent.x + math.cos(angle) * vision_system.max_vision_range,
+                    agent.y + math.sin(angle) * vision_system.max_vision_range
+                ))
             
             # Clip points to stay within the main simulation area (not overlap sidebar)
             clipped_points = []
@@ -442,13 +899,12 @@ class PygameDisplay:
                 pygame.draw.polygon(self.screen, eye_colors[eye_idx % len(eye_colors)], clipped_points)
         
         # Draw visible entities with lines (with UI offset and clipping)
-        for entity_data in agent.visible_entities:
-            entity = entity_data['entity']
-            color = (255, 255, 0) if entity_data['binocular'] else (255, 255, 255)  # Yellow if binocular
+        for i, entity in enumerate(visible.entities):
+            color = (255, 255, 0) if visible.is_binocular(i) else (255, 255, 255)  # Yellow if binocular
             
             # Apply UI offset to both start and end points
-            start_pos = (int(agent.x), int(agent.y) + grid_y_offset)
-            end_pos = (int(entity.x), int(entity.y) + grid_y_offset)
+            start_pos = self._screen_pos(agent.x, agent.y)
+            end_pos = self._screen_pos(entity.x, entity.y)
             
             # Only draw lines that stay within the simulation area
             if start_pos[0] <= self.width and end_pos[0] <= self.width:
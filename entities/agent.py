@@ -1,35 +1,57 @@
 import math
 import random
-from core import config
 from evolution.genome import Genome
 from systems import vision
-from systems.vision import update_agent_vision, get_vision_data_for_nn
+from systems.vision import NOTHING_VISIBLE, get_vision_data_for_nn
 from systems.colour import Colour
 from systems.size import Size
+from core.sim_config import SPECIES_IDS, default_config
 class Agent:
-    def __init__(self, genome=None):
+    species_id = SPECIES_IDS["Agent"]
+    mobile = True
+    __slots__ = (
+        "config", "genome", "x", "y", "energy", "energy_cost", "health", "world",
+        "id", "parent_ids", "type", "angle", "age", "reproduction_count", "visible_entities",
+        "eye_layout",
+    )
+
+    def __init__(self, genome=None, config=None):
+        self.config = config or default_config()  # Replaced by the world's config on add
         self.genome = genome or Genome()  # Use Genome class instead of dict
         self.x = 0
         self.y = 0
-        self.energy = config.MAX_ENERGY // 2
+        self.energy = self.config.initial_energy
         self.energy_cost = 0
         self.health = 100
         self.world = None
+        self.id = 0  # Assigned by the world on add
+        self.parent_ids = (0, 0)  # 0 = no parent (initial population)
         self.type = "Agent"
         self.angle = random.uniform(0, 2 * math.pi)
         self.age = 0
         self.reproduction_count = 0
-        self.colour = Colour(self)
-        self.size = Size(self)
+        self.visible_entities = NOTHING_VISIBLE  # Refreshed by the world's scheduler
+        self.eye_layout = None  # EyeLayout, built by the vision system on first use
         self.get_energy_cost()
         self.get_health()
     
+    # Colour and size are thin views over the genome, built on demand so
+    # agents don't each carry two extra objects
+
+    @property
+    def colour(self):
+        return Colour(self)
+
+    @property
+    def size(self):
+        return Size(self)
+
     def move_step(self):
         if self.world is None:
             return
 
-        base_speed = getattr(config, f"{self.type.upper()}_SPEED", config.DEFAULT_SPEED)
-        base_turn_rate = getattr(config, f"{self.type.upper()}_TURN_RATE", config.DEFAULT_TURN_RATE)
+        base_speed = self.config.base_speed[self.species_id]
+        base_turn_rate = self.config.base_turn_rate[self.species_id]
 
         speed = self.genome.get_modified_value(base_speed, 'speed', 0.5, 2.0)
         turn_rate = self.genome.get_modified_value(base_turn_rate, 'neuroplasticity', 0.5, 1.5)
@@ -38,48 +60,78 @@ class Agent:
 
         new_x = self.x + math.cos(self.angle) * speed
         new_y = self.y + math.sin(self.angle) * speed
-        self.world.move_entity(self, new_x, new_y)
+        self.world.propose_move(self, new_x, new_y)
 
-        # Deduct energy cost (recalculate if speed or size changed this step)
-        self.get_energy_cost()
+        # Deduct energy cost (fixed by the genome, set when the agent is added)
         self.energy -= self.energy_cost
 
 
     def step(self):
+        self.update()
+        if self.world is not None:
+            self.interact()
+
+    def update(self):
+        """Ageing, vision, metabolism and movement (everything but interactions)"""
+        if self.world is None:
+            return  # Removed earlier in this step
         self.age += 1
-        seen = self.see()
+        profiler = self.world.profiler
+        with profiler.phase("vision"):
+            seen = self.see()
         # energy loss implemented in move_step
-        #self.energy -= config.ENERGY_PER_STEP
 
         # Die if energy is depleted
         if self.energy <= 0:
-            self.die()
+            self.die("starvation")
             return
 
         # Take damage if energy is low
-        if self.energy < config.MAX_ENERGY // 2:
-            self.take_damage(1)
+        if self.energy < self.config.hunger_threshold:
+            self.take_damage(1, "hunger")
 
-        self.reproduce()
-        self.move_step()
+        # Reproduction runs from the world's scheduler while energy allows it
+        with profiler.phase("movement"):
+            self.move_step()
+
+    def interact(self):
+        """Feeding/hunting, applied immediately (the world batches intent() instead)"""
+        pass
+
+    def intent(self):
+        """This step's feeding/hunting Intent, or None; plain agents don't interact"""
+        return None
 
     def eat(self, food_value):
         # Gain energy from eating, but don't exceed max
-        self.energy = min(config.MAX_ENERGY, self.energy + food_value)
+        self.energy = min(self.config.max_energy, self.energy + food_value)
+        if self.world is not None and self.energy >= self.reproduction_threshold():
+            self.world.schedule_reproduction(self)
 
-    def take_damage(self, amount):
+    def take_damage(self, amount, cause="unknown", source=None):
         self.health -= amount
         if self.health <= 0:
-            self.die()
+            self.die(cause, source)
 
-    def die(self):
+    def die(self, cause="unknown", killer=None):
         if self.world:
+            events = self.world.events
+            if events.enabled and events.wants("death"):
+                events.emit(
+                    "death", self.world.step_count,
+                    id=self.id, species=self.type, cause=cause,
+                    by=killer.id if killer is not None else 0,
+                    age=self.age, x=self.x, y=self.y
+                )
             self.world.remove_entity(self)
 
+    def reproduction_threshold(self):
+        """Energy needed to reproduce (lowered by the n_children trait)"""
+        return self.genome.get_modified_value(self.config.base_repro_threshold, 'n_children', 0.6, 1.0)
+
     def reproduce(self):
-        # Use genome to modify reproduction threshold
-        base_threshold = config.MAX_ENERGY * 0.8
-        threshold = self.genome.get_modified_value(base_threshold, 'n_children', 0.6, 1.0)
+        cfg = self.config
+        threshold = self.reproduction_threshold()
         
         if self.energy < threshold:
             return
@@ -87,7 +139,7 @@ class Agent:
         if self.world is None:
             return  # or handle gracefully
 
-        nearby_agents = self.world.get_entities_in_radius(self.x, self.y, config.REPRO_DISTANCE)
+        nearby_agents = self.world.neighbours_of(self, cfg.repro_distance)
         mates = [a for a in nearby_agents if a is not self and a.type == self.type and a.energy >= threshold]
 
         if not mates:
@@ -96,20 +148,21 @@ class Agent:
         mate = random.choice(mates)
 
         # set chance to reproduce
-        if random.random() > config.REPRO_CHANCE:
+        if random.random() > cfg.repro_chance:
             return
 
         # Create child genome using crossover and mutation
         #child_genome = self.genome.crossover(mate.genome).mutate()
         #Try out hybrid crossover
-        child_genome = self.genome.crossover_hybrid(mate.genome).mutate()
-        child = self.__class__(genome=child_genome)
+        child_genome = self.genome.crossover_hybrid(mate.genome).mutate(cfg.mutation_rate, cfg.mutation_strength)
+        child = self.__class__(genome=child_genome, config=cfg)
+        child.parent_ids = (self.id, mate.id)
         child_x = (self.x + mate.x) / 2 #+ random.uniform(-1, 1)
         child_y = (self.y + mate.y) / 2 #+ random.uniform(-1, 1)
-        self.world.add_entity(child, child_x, child_y)
+        added = self.world.add_entity(child, child_x, child_y)
 
         # Reduce parents' energy after reproduction
-        reproduction_energy = config.MAX_ENERGY // 3
+        reproduction_energy = cfg.reproduction_energy
         self.energy -= reproduction_energy
         mate.energy -= reproduction_energy
         
@@ -117,49 +170,37 @@ class Agent:
         self.reproduction_count += 1
         mate.reproduction_count += 1
 
-        print(f"{self.type} reproduced - Parent1: ({self.x:.1f},{self.y:.1f}), Parent2: ({mate.x:.1f},{mate.y:.1f}), Child: ({child_x:.1f},{child_y:.1f})")
-        # In your reproduce() method, add after creating the child:
-        print(f"Parent1 color: {self.genome.get_trait('colour'):.3f} -> RGB {self.colour.get_rgb()}")
-        print(f"Parent2 color: {mate.genome.get_trait('colour'):.3f} -> RGB {mate.colour.get_rgb()}")
-        print(f"Child color: {child_genome.get_trait('colour'):.3f} -> RGB {child.colour.get_rgb()}")
-
-        print(f"Parent1 speed: {self.genome.get_trait('speed')}")
-        print(f"Parent2 speed: {mate.genome.get_trait('speed')}")
-        print(f"Child speed: {child_genome.get_trait('speed')}")
-
-        # Sizes:
-        print(f"Parent1 size: {self.size.get_size()}")
-        print(f"Parent2 size: {mate.size.get_size()}")
-        print(f"Child size: {child.size.get_size()}")
-
-        # Energy costs (make sure energy_cost is updated before print)
-        print(f"Parent1 energy cost: {self.energy_cost:.3f}")
-        print(f"Parent2 energy cost: {mate.energy_cost:.3f}")
-        print(f"Child energy cost: {child.energy_cost:.3f}")
+        if added:
+            events = self.world.events
+            if events.enabled and events.wants("birth"):
+                events.emit(
+                    "birth", self.world.step_count,
+                    id=child.id, parent1=self.id, parent2=mate.id, species=child.type,
+                    x=child.x, y=child.y, **child_genome.traits
+                )
 
         """Calculate fitness score for this agent"""
         return self.genome.fitness_score(self.age, self.reproduction_count, self.energy)
     
     def see(self):
         """Get vision data formatted for neural network"""
-        update_agent_vision(self)
         return get_vision_data_for_nn(self)
     
     def get_energy_cost(self):
-        base_speed = getattr(config, f"{self.type.upper()}_SPEED", config.DEFAULT_SPEED)
+        base_speed = self.config.base_speed[self.species_id]
         base_size = 6  # Use your base size here or a config dict if available
         
         speed = self.genome.get_modified_value(base_speed, 'speed', 0.5, 2.0)
-        size_value = self.size.get_size()
+        size_value = Size.from_trait(self.genome.get_trait('size'))
         size_multiplier = size_value / base_size
 
         speed_multiplier = speed / base_speed
         
-        self.energy_cost = config.ENERGY_PER_STEP * speed_multiplier * size_multiplier
+        self.energy_cost = self.config.energy_per_step * speed_multiplier * size_multiplier
     def get_health(self):
         """Returns the size-adjusted health value"""
         base_health = self.health  # the class-specific base health set in __init__
         base_size = 6
-        current_size = self.size.get_size()
+        current_size = Size.from_trait(self.genome.get_trait('size'))
         size_multiplier = current_size / base_size
         return int(base_health * size_multiplier)
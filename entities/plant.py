@@ -1,42 +1,74 @@
-from core import config
+from core.sim_config import SPECIES_IDS, default_config
 import random
 import math
 
 class Plant:
-    def __init__(self):
+    species_id = SPECIES_IDS["Plant"]
+    mobile = False  # Never moves once placed
+    __slots__ = ("config", "type", "x", "y", "world", "id", "birth_step", "base_size")
+
+    def __init__(self, config=None):
+        self.config = config or default_config()  # Replaced by the world's config on add
         self.type = "Plant"
         self.x = 0.0
         self.y = 0.0
         self.world = None
-        self.energy_value = config.PLANT_ENERGY_VALUE  # Energy provided when eaten
-        self.growth_stage = 1  # Could be used for plant growth mechanics
-        self.age = 0  # Track how long plant has been alive
-        self.size = random.uniform(3, 8)  # Variable plant size
-        self.spread_radius = config.PLANT_SPREAD_RADIUS  # How far plants can spread
-    
-    def step(self):
-        # Plants age each step
-        self.age += 1
-        
-        # Plants grow slightly over time (affects visual size and energy value)
-        if self.age % 10 == 0 and self.growth_stage < 3:
-            self.growth_stage += 1
-            self.size = min(self.size + 1, 10)
-            self.energy_value = int(self.energy_value * 1.2)
-        
-        # Chance to spread/reproduce if mature enough
-        if self.age > config.PLANT_MATURITY_AGE and random.random() < config.PLANT_SPREAD_CHANCE:
-            self.attempt_spread()
+        self.id = 0  # Assigned by the world on add
+        self.birth_step = 0  # World step the plant was added at (set by the world)
+        self.base_size = random.uniform(3, 8)  # Variable plant size
+
+    # Age and growth are derived from the world clock instead of being
+    # updated every step, so idle plants cost nothing
+
+    @property
+    def spread_radius(self):
+        """How far plants can spread"""
+        return self.config.plant_spread_radius
+
+    @property
+    def age(self):
+        """Steps since the plant was added (0 outside a world)"""
+        if self.world is None:
+            return 0
+        return self.world.step_count - self.birth_step
+
+    @property
+    def growth_stage(self):
+        """Grows one stage every 10 steps, up to stage 3"""
+        return min(3, 1 + self.age // 10)
+
+    @property
+    def size(self):
+        return min(self.base_size + self.growth_stage - 1, 10)
+
+    @property
+    def energy_value(self):
+        """Energy provided when eaten (+20% per growth stage)"""
+        value = self.config.plant_energy_value
+        for _ in range(self.growth_stage - 1):
+            value = int(value * 1.2)
+        return value
+
+    def next_spread_step(self, after):
+        """
+        Pick the step of the next spread attempt after `after`. Rolling the
+        spread chance once per step until it succeeds is a geometric waiting
+        time, so it is sampled in one go. Returns None if plants never spread.
+        """
+        chance = self.config.plant_spread_chance
+        if chance <= 0:
+            return None
+        if chance >= 1:
+            return after + 1
+        return after + 1 + int(math.log(1.0 - random.random()) / math.log(1.0 - chance))
     
     def attempt_spread(self):
         """Try to spread to a nearby area in continuous space"""
-        existing_plants = self.world.get_all_entities_by_type("Plant") if self.world else []
-        
         if not self.world:
             return
         
         # Try multiple spread attempts
-        if len(existing_plants) >= config.MAX_PLANTS:
+        if self.world.population("Plant") >= self.config.max_plants:
             return
         for _ in range(3):  # Try up to 3 times
             # Random direction and distance
@@ -53,10 +85,15 @@ class Plant:
             # Check if the area is relatively empty (small radius to avoid overcrowding)
             if not self.world.is_occupied(new_x, new_y, radius=8):
                 # Create new plant
-                new_plant = Plant()
+                new_plant = Plant(self.config)
                 try:
                     self.world.add_entity(new_plant, new_x, new_y)
-                    #print(f"Plant spread from ({self.x:.1f},{self.y:.1f}) to ({new_x:.1f},{new_y:.1f})")
+                    events = self.world.events
+                    if events.enabled and events.wants("plant_spread"):
+                        events.emit(
+                            "plant_spread", self.world.step_count,
+                            parent=self.id, id=new_plant.id, x=new_x, y=new_y
+                        )
                     break  # Only spread once per attempt
                 except (ValueError, RuntimeError):
                     # Area became occupied or world is full
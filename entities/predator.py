@@ -1,40 +1,61 @@
 import math
-from core import config
+from core.sim_config import SPECIES_IDS
 from entities.agent import Agent
+from systems.interactions import ATTACK, Intent
+from systems import kernels
 
 class Predator(Agent):
-    def __init__(self, genome=None):
-        super().__init__(genome)
+    species_id = SPECIES_IDS["Predator"]
+    __slots__ = ()
+    hunt_range = 15  # Radius searched for prey (everything in it can be hit)
+    attack_damage = 50
+
+    def __init__(self, genome=None, config=None):
+        super().__init__(genome, config)
         self.type = "Predator"
-        self.energy = config.MAX_ENERGY // 2
+        self.energy = self.config.initial_energy
         self.health = 150  # Predators might have higher base health
 
-    def step(self):
-        if self.world is None:
-            return
-
-        # Call parent step method to handle energy loss, damage, reproduction, movement, and vision
-        super().step()
-
-        # If the agent died from energy depletion or other causes, don't continue
-        if self.world is None:
-            return
-
+    def interact(self):
         # Hunt for prey at current position
-        self.hunt_prey()
+        with self.world.profiler.phase("hunting"):
+            self.hunt_prey()
 
     def hunt_prey(self):
-        hunt_range = 15
-        prey_list = [
-            e for e in self.world.get_entities_in_radius(self.x, self.y, hunt_range)
-            if getattr(e, 'type', None) == "Prey"
-        ]
+        nearby_entities = self.world.neighbours_of(self, self.hunt_range)
+        closest_prey = self.choose_prey(nearby_entities)
+        if closest_prey is not None:
+            self.attack(closest_prey)
+
+    def intent(self):
+        """Intent to attack the closest prey in range (None if there is none)"""
+        nearby_entities = self.world.neighbours_of(self, self.hunt_range)
+        prey = self.choose_prey(nearby_entities)
+        if prey is None:
+            return None
+        return Intent(self, prey, ATTACK, math.hypot(prey.x - self.x, prey.y - self.y))
+
+    def choose_prey(self, nearby_entities):
+        """Closest prey among the candidates, or None"""
+        prey_list = [e for e in nearby_entities if getattr(e, 'type', None) == "Prey"]
 
         if not prey_list:
-            return
+            return None
+
+        return kernels.nearest_entity(prey_list, self.x, self.y)[0]
+
+    def attack(self, prey):
+        damage = self.attack_damage
+        prey.take_damage(damage, "predation", self)
+        killed = prey.world is None
 
-        closest_prey = min(prey_list, key=lambda p: math.hypot(p.x - self.x, p.y - self.y))
-        closest_prey.take_damage(50)
+        events = self.world.events
+        if events.enabled and events.wants("predation"):
+            events.emit(
+                "predation", self.world.step_count,
+                predator=self.id, prey=prey.id, damage=damage, killed=killed,
+                x=self.x, y=self.y
+            )
 
-        if closest_prey.world is None:  # Prey died from the attack
-            self.eat(config.PREY_ENERGY_VALUE)
\ No newline at end of file
+        if killed:  # Prey died from the attack
+            self.eat(self.config.prey_energy_value)
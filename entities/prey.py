@@ -1,46 +1,64 @@
 import math
-from core import config
+from core.sim_config import SPECIES_IDS
 from entities.agent import Agent
+from systems.interactions import EAT, Intent
+from systems import kernels
 
 class Prey(Agent):
-    def __init__(self, genome=None):
-        super().__init__(genome)
+    species_id = SPECIES_IDS["Prey"]
+    __slots__ = ()
+    food_search_range = 15  # Radius searched for plants
+    eating_range = 8  # Plants closer than this get eaten
+
+    def __init__(self, genome=None, config=None):
+        super().__init__(genome, config)
         self.type = "Prey"
-        self.energy = config.MAX_ENERGY // 2
+        self.energy = self.config.initial_energy
         self.health = 100
 
-    def step(self):
-        # Check if world is set before trying to access it
-        if self.world is None:
-            return
-        
-        # Call parent step method to handle energy loss, damage, reproduction, and movement
-        super().step()
-        
-        # If the agent died from energy depletion or other causes, don't continue
-        if self.world is None:
-            return
-        
+    def interact(self):
         # Look for food at current position
-        self.look_for_food()
+        with self.world.profiler.phase("feeding"):
+            self.look_for_food()
 
     def look_for_food(self):
         """Look for plants within vision range and eat them"""
-        vision_range = 15
-        eating_range = 8
+        nearby_entities = self.world.neighbours_of(self, self.food_search_range)
+        closest_plant = self.choose_food(nearby_entities)
+        if closest_plant is not None:
+            self.eat_plant(closest_plant)
+
+    def intent(self):
+        """Intent to eat the closest plant in eating range (None if there is none)"""
+        nearby_entities = self.world.neighbours_of(self, self.food_search_range)
+        plant = self.choose_food(nearby_entities)
+        if plant is None:
+            return None
+        return Intent(self, plant, EAT, math.hypot(plant.x - self.x, plant.y - self.y))
 
-        # Find nearby plants
-        nearby_entities = self.world.get_entities_in_radius(self.x, self.y, vision_range)
+    def choose_food(self, nearby_entities):
+        """Closest plant among the candidates if it is within eating range, else None"""
         plants = [e for e in nearby_entities if getattr(e, 'type', None) == "Plant"]
 
         if not plants:
-            return
+            return None
 
         # Find the closest plant
-        closest_plant = min(plants, key=lambda p: math.hypot(p.x - self.x, p.y - self.y))
-        distance = math.hypot(closest_plant.x - self.x, closest_plant.y - self.y)
+        closest_plant, distance = kernels.nearest_entity(plants, self.x, self.y)
+
+        if distance <= self.eating_range:
+            return closest_plant
+        return None
+
+    def eat_plant(self, plant):
+        food_value = getattr(plant, 'energy_value', self.config.plant_energy_value)
+        self.eat(food_value)
 
-        if distance <= eating_range:
-            food_value = getattr(closest_plant, 'energy_value', config.PLANT_ENERGY_VALUE)
-            self.eat(food_value)
-            self.world.remove_entity(closest_plant)
\ No newline at end of file
+        events = self.world.events
+        if events.enabled and events.wants("plant_eaten"):
+            events.emit(
+                "plant_eaten", self.world.step_count,
+                id=plant.id, by=self.id, energy=food_value,
+                x=plant.x, y=plant.y
+            )
+        self.world.remove_entity(plant)
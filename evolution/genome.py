@@ -1,40 +1,59 @@
 import random
+from array import array
+from types import MappingProxyType
 from core import config
 
+# Traits that make up every genome, in a fixed order
+TRAIT_NAMES = (
+    'n_eyes',
+    'eye_pos',
+    'n_legs',
+    'brain_size',
+    'speed',
+    'n_children',
+    'neuroplasticity',
+    'size',
+    'colour',
+)
+TRAIT_INDEX = {name: i for i, name in enumerate(TRAIT_NAMES)}
+
 class Genome:
     """
     Represents the genetic makeup of an agent.
     Each trait is a value between 0.0 and 1.0 that affects agent behavior.
+    Values are kept in a compact float array in TRAIT_NAMES order.
     """
-    
-    def __init__(self, traits=None):
-        # Define the traits that make up the genome
-        self.trait_names = [
-            'n_eyes',
-            'eye_pos',
-            'n_legs',
-            'brain_size',
-            'speed',
-            'n_children',
-            'neuroplasticity',
-            'size',
-            'colour'
+    __slots__ = ("values",)
+    trait_names = TRAIT_NAMES  # Shared by every genome
 
-        ]
+    def __init__(self, traits=None):
         if traits is None:
             # Generate random traits
-            self.traits = {trait: random.random() for trait in self.trait_names}
+            self.values = array('d', [random.random() for _ in TRAIT_NAMES])
         else:
-            # Use provided traits
-            self.traits = traits.copy()
+            # Use provided traits (missing ones default to 0.5)
+            self.values = array('d', [traits.get(name, 0.5) for name in TRAIT_NAMES])
+
+    @classmethod
+    def from_values(cls, values):
+        """Wrap trait values already in TRAIT_NAMES order (no copy)"""
+        genome = cls.__new__(cls)
+        genome.values = values
+        return genome
+
+    @property
+    def traits(self):
+        """Traits as a read-only {name: value} mapping (change them with set_trait)"""
+        return MappingProxyType(dict(zip(TRAIT_NAMES, self.values)))
 
     def get_trait(self, trait_name):
         """Get a specific trait value"""
-        return self.traits.get(trait_name, 0.5)  # Fixed: default to 0.5 if not found
+        index = TRAIT_INDEX.get(trait_name)
+        return self.values[index] if index is not None else 0.5  # Default to 0.5 if not found
     
     def set_trait(self, trait_name, value):
         """Set a specific trait value (clamp between 0 and 1)"""
-        self.traits[trait_name] = max(0.0, min(1.0, value))
+        self.values[TRAIT_INDEX[trait_name]] = max(0.0, min(1.0, value))
     
     def mutate(self, mutation_rate=0.1, mutation_strength=0.1):
         """
@@ -42,55 +61,53 @@ class Genome:
         mutation_rate: probability of each trait mutating
         mutation_strength: how much traits can change
         """
-        new_traits = self.traits.copy()
+        new_values = array('d', self.values)
         
-        for trait_name in self.trait_names:
+        for i in range(len(new_values)):
             if random.random() < mutation_rate:
                 # Apply mutation
-                current_value = new_traits[trait_name]
+                current_value = new_values[i]
                 mutation = random.uniform(-mutation_strength, mutation_strength)
                 new_value = current_value + mutation
                 
                 # Clamp to valid range
-                new_traits[trait_name] = max(0.0, min(1.0, new_value))
+                new_values[i] = max(0.0, min(1.0, new_value))
         
-        return Genome(new_traits)
+        return Genome.from_values(new_values)
     
     def crossover(self, other_genome):
         """
         Create offspring genome by combining traits from two parents
         """
-        new_traits = {}
+        mine, theirs = self.values, other_genome.values
+        new_values = array('d', mine)
         
-        for trait_name in self.trait_names:
+        for i in range(len(new_values)):
             # Randomly choose trait from either parent
-            if random.random() < 0.5:
-                new_traits[trait_name] = self.traits[trait_name]
-            else:
-                new_traits[trait_name] = other_genome.traits[trait_name]
+            if random.random() >= 0.5:
+                new_values[i] = theirs[i]
             
             # Optional: blend traits instead of choosing
-            # new_traits[trait_name] = (self.traits[trait_name] + other_genome.traits[trait_name]) / 2
+            # new_values[i] = (mine[i] + theirs[i]) / 2
         
-        return Genome(new_traits)
+        return Genome.from_values(new_values)
     
     def crossover_hybrid(self, other_genome):
         """
         Hybrid approach: blend most traits, but randomly select some
         More realistic biological reproduction
         """
-        new_traits = {}
+        mine, theirs = self.values, other_genome.values
+        new_values = array('d', mine)
         
-        for trait_name in self.trait_names:
+        for i in range(len(new_values)):
             if random.random() < 0.3:  # 30% chance of random selection
-                if random.random() < 0.5:
-                    new_traits[trait_name] = self.traits[trait_name]
-                else:
-                    new_traits[trait_name] = other_genome.traits[trait_name]
+                if random.random() >= 0.5:
+                    new_values[i] = theirs[i]
             else:  # 70% chance of blending
-                new_traits[trait_name] = (self.traits[trait_name] + other_genome.traits[trait_name]) / 2
+                new_values[i] = (mine[i] + theirs[i]) / 2
         
-        return Genome(new_traits)
+        return Genome.from_values(new_values)
     
     def fitness_score(self, age, reproduction_count, energy_level):
         """
@@ -103,7 +120,7 @@ class Genome:
         energy_bonus = energy_level * 0.01
         
         # Size trait affects fitness (medium size is optimal)
-        size_penalty = abs(self.traits['size'] - 0.5) * 2
+        size_penalty = abs(self.values[TRAIT_INDEX['size']] - 0.5) * 2
         
         return survival_bonus + reproduction_bonus + energy_bonus - size_penalty
     
@@ -121,14 +138,13 @@ class Genome:
     def __str__(self):
         """String representation of the genome"""
         trait_strs = []
-        for trait_name in self.trait_names:
-            value = self.traits[trait_name]
+        for trait_name, value in zip(TRAIT_NAMES, self.values):
             trait_strs.append(f"{trait_name}: {value:.2f}")
         return f"Genome({', '.join(trait_strs)})"
     
     def to_dict(self):
         """Convert genome to dictionary for saving/loading"""
-        return self.traits.copy()
+        return dict(zip(TRAIT_NAMES, self.values))
     
     @classmethod
     def from_dict(cls, trait_dict):
@@ -0,0 +1,191 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+from core.sim_config import SPECIES_IDS
+from evolution.genome import TRAIT_NAMES
+
+ALIVE = -1  # death_step of agents that are still alive
+
+class Genealogy:
+    """
+    Append-only, array-backed genealogy table.
+    One row per agent ever born, holding only numbers (ids, parents,
+    birth/death step, genome row), so dead Agent objects are never kept
+    alive. Rows are appended in id order, which keeps the id column sorted
+    and lets lookups use binary search. Genomes are stored as float32 rows
+    in one flat array.
+    """
+
+    def __init__(self, trait_names=TRAIT_NAMES):
+        self.trait_names = tuple(trait_names)
+        self.n_traits = len(self.trait_names)
+        self._trait_index = {name: i for i, name in enumerate(self.trait_names)}
+
+        self.ids = array('q')
+        self.parent1 = array('q')
+        self.parent2 = array('q')
+        self.species = array('B')
+        self.birth_step = array('i')
+        self.death_step = array('i')
+        self.genome_row = array('i')
+        self.genomes = array('f')  # n_rows x n_traits, row-major
+        self.n_alive = 0
+        self.n_pruned = 0  # Rows dropped by prune() so far
+
+    def __len__(self):
+        return len(self.ids)
+
+    # === Recording ===
+
+    def record_birth(self, agent, step):
+        """Append a row for a newly added agent; returns its row index"""
+        if self.ids and agent.id <= self.ids[-1]:
+            raise ValueError(f"Agent ids must be recorded in increasing order (got {agent.id})")
+
+        row = len(self.ids)
+        self.ids.append(agent.id)
+        parent1, parent2 = agent.parent_ids
+        self.parent1.append(parent1)
+        self.parent2.append(parent2)
+        self.species.append(SPECIES_IDS.get(agent.type, SPECIES_IDS["Agent"]))
+        self.birth_step.append(step)
+        self.death_step.append(ALIVE)
+        self.genome_row.append(len(self.genomes) // self.n_traits)
+        self.genomes.extend(agent.genome.get_trait(name) for name in self.trait_names)
+        self.n_alive += 1
+        return row
+
+    def record_death(self, agent_id, step):
+        row = self.row_of(agent_id)
+        if row is not None and self.death_step[row] == ALIVE:
+            self.death_step[row] = step
+            self.n_alive -= 1
+
+    # === Queries ===
+
+    def row_of(self, agent_id):
+        """Row index of an id, or None if unknown (or pruned)"""
+        row = bisect_left(self.ids, agent_id)
+        if row < len(self.ids) and self.ids[row] == agent_id:
+            return row
+        return None
+
+    def parents(self, agent_id):
+        row = self.row_of(agent_id)
+        if row is None:
+            return None
+        return (self.parent1[row], self.parent2[row])
+
+    def is_alive(self, agent_id):
+        row = self.row_of(agent_id)
+        return row is not None and self.death_step[row] == ALIVE
+
+    def genome(self, agent_id):
+        """Trait values of an agent as a {trait: value} dict"""
+        row = self.row_of(agent_id)
+        if row is None:
+            return None
+        start = self.genome_row[row] * self.n_traits
+        return dict(zip(self.trait_names, self.genomes[start:start + self.n_traits]))
+
+    def ancestors(self, agent_id, max_generations=None):
+        """
+        All known ancestors of an agent as {id: generation}, where parents
+        are generation 1. Walks the parent columns breadth-first.
+        """
+        found = {}
+        queue = deque([(agent_id, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if max_generations is not None and depth >= max_generations:
+                continue
+            row = self.row_of(current)
+            if row is None:
+                continue
+            for parent in (self.parent1[row], self.parent2[row]):
+                if parent and parent not in found:
+                    found[parent] = depth + 1
+                    queue.append((parent, depth + 1))
+        return found
+
+    def common_ancestor(self, id_a, id_b):
+        """Most recent common ancestor of two agents (None if unrelated)"""
+        ancestors_a = self.ancestors(id_a)
+        ancestors_a[id_a] = 0
+        ancestors_b = self.ancestors(id_b)
+        ancestors_b[id_b] = 0
+
+        best, best_depth = None, None
+        for ancestor, depth_b in ancestors_b.items():
+            if ancestor in ancestors_a:
+                depth = max(depth_b, ancestors_a[ancestor])
+                if best_depth is None or depth < best_depth:
+                    best, best_depth = ancestor, depth
+        return best
+
+    def trait_trajectory(self, agent_id, trait):
+        """
+        Trait value along the first-parent line back to a founder,
+        as [(birth_step, value), ...] from oldest to newest.
+        """
+        offset = self._trait_index[trait]
+        trajectory = []
+        row = self.row_of(agent_id)
+        while row is not None:
+            value = self.genomes[self.genome_row[row] * self.n_traits + offset]
+            trajectory.append((self.birth_step[row], value))
+            parent = self.parent1[row]
+            row = self.row_of(parent) if parent else None
+        trajectory.reverse()
+        return trajectory
+
+    # === Maintenance ===
+
+    def prune(self):
+        """
+        Drop extinct branches: keep only living agents and their ancestors.
+        Parents always have smaller ids than their children, so one pass from
+        newest to oldest row is enough to mark everything still needed.
+        Returns the number of rows removed.
+        """
+        n = len(self.ids)
+        keep = bytearray(n)
+        for row in range(n - 1, -1, -1):
+            if self.death_step[row] == ALIVE:
+                keep[row] = 1
+            if not keep[row]:
+                continue
+            for parent in (self.parent1[row], self.parent2[row]):
+                if parent:
+                    parent_row = bisect_left(self.ids, parent, 0, row)
+                    if parent_row < row and self.ids[parent_row] == parent:
+                        keep[parent_row] = 1
+
+        kept_rows = [row for row in range(n) if keep[row]]
+        removed = n - len(kept_rows)
+        if not removed:
+            return 0
+
+        width = self.n_traits
+        genomes = array('f')
+        for row in kept_rows:
+            start = self.genome_row[row] * width
+            genomes.extend(self.genomes[start:start + width])
+
+        self.ids = array('q', (self.ids[row] for row in kept_rows))
+        self.parent1 = array('q', (self.parent1[row] for row in kept_rows))
+        self.parent2 = array('q', (self.parent2[row] for row in kept_rows))
+        self.species = array('B', (self.species[row] for row in kept_rows))
+        self.birth_step = array('i', (self.birth_step[row] for row in kept_rows))
+        self.death_step = array('i', (self.death_step[row] for row in kept_rows))
+        self.genome_row = array('i', range(len(kept_rows)))
+        self.genomes = genomes
+        self.n_pruned += removed
+        return removed
+
+    def memory_bytes(self):
+        """Approximate storage used by the table columns"""
+        columns = (self.ids, self.parent1, self.parent2, self.species,
+                   self.birth_step, self.death_step, self.genome_row, self.genomes)
+        return sum(column.itemsize * len(column) for column in columns)
@@ -1,3 +1,6 @@
+import argparse
+import atexit
+import random
 from core import config
 from core.world import World
 from entities.agent import Agent
@@ -6,28 +9,90 @@ from entities.prey import Prey
 from entities.predator import Predator
 
 
+from core.trajectory import TrajectoryReader
+from display.export import FrameExporter, ffmpeg_command
 from display.pygame_display import PygameDisplay
 
-def main():
+def attach_exporter(display, args):
+    """Export drawn frames as PNGs or a video if asked to (closed at exit)"""
+    if args.export_dir:
+        display.exporter = FrameExporter(directory=args.export_dir, workers=args.export_workers)
+    elif args.export_video:
+        command = ffmpeg_command(args.export_video, display.total_width, display.total_height, args.export_fps)
+        display.exporter = FrameExporter(command=command)
+    else:
+        return
+    atexit.register(display.exporter.close)
+
+def replay(path, args):
+    """Play back a recorded trajectory (no simulation runs)"""
+    display = PygameDisplay(replay=TrajectoryReader(path), headless=args.headless)
+    attach_exporter(display, args)
+    while True:
+        display.handle_events()
+        display.draw()  # Before advancing, so the first frame is shown too
+        if args.headless and (display.replay_paused or display.replay_position >= len(display.replay) - 1):
+            break  # Played to the end
+        display.advance_replay()
+
+def main(args):
     w = World(config.WORLD_WIDTH, config.WORLD_HEIGHT)
 
-    plants = [Plant() for _ in range(config.N_PLANTS)]
-    preys = [Prey() for _ in range(config.N_PREY)]
-    predators = [Predator() for _ in range(config.N_PREDATORS)]
+    plants = [Plant(w.config) for _ in range(w.config.n_plants)]
+    preys = [Prey(config=w.config) for _ in range(w.config.n_prey)]
+    predators = [Predator(config=w.config) for _ in range(w.config.n_predators)]
 
     agents = preys + predators
 
+    if config.ROCKS_ENABLED:
+        from entities.obstacle import generate_rock_map
+        tile = config.ROCK_TILE_SIZE
+        rock_map = generate_rock_map(
+            int(w.width // tile), int(w.height // tile),
+            config.ROCK_SCALE, config.ROCK_THRESHOLD, config.ROCK_OCTAVES,
+            random.randint(0, 10000)
+        )
+        w.set_rock_map(rock_map, tile)
+
     for entity in plants + agents:
         w.add_entity(entity)
 
-    display = PygameDisplay(w)
+    w.configure_spatial_index(config.SPATIAL_INDEX, config.SPATIAL_CELL_SIZE, config.SPATIAL_TUNE_INTERVAL)
+    if config.NEIGHBOUR_SKIN:
+        w.enable_neighbour_lists(config.NEIGHBOUR_SKIN)
+    if config.PARALLEL_TILES:
+        w.enable_domain_decomposition(config.PARALLEL_TILES, config.PARALLEL_WORKERS)
+        atexit.register(w.disable_domain_decomposition)
 
-    while True:
-        for agent in agents:
-            agent.step()
+    if config.EVENT_LOG_PATH:
+        w.enable_event_log(config.EVENT_LOG_PATH, config.EVENT_LOG_FORMAT,
+                           config.EVENT_LOG_LEVEL, config.EVENT_LOG_SAMPLE)
+        atexit.register(w.close_event_log)
+    if config.TRAJECTORY_PATH:
+        w.enable_trajectory(config.TRAJECTORY_PATH, config.TRAJECTORY_EVERY, config.TRAJECTORY_KEYFRAMES)
+        atexit.register(w.close_trajectory)
+
+    display = PygameDisplay(w, headless=args.headless)
+    display.render_every = args.render_every
+    attach_exporter(display, args)
+
+    while not args.steps or w.step_count < args.steps:
         w.step()
         display.handle_events()
         display.draw()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="EvoSim")
+    parser.add_argument("--replay", metavar="PATH", help="play back a trajectory file instead of simulating")
+    parser.add_argument("--headless", action="store_true", help="render offscreen (no window, no frame cap)")
+    parser.add_argument("--steps", type=int, default=0, help="stop after this many steps (0 = run forever)")
+    parser.add_argument("--render-every", type=int, default=1, metavar="N", help="draw every N steps")
+    parser.add_argument("--export-dir", metavar="DIR", help="save drawn frames as a PNG sequence")
+    parser.add_argument("--export-video", metavar="PATH", help="pipe drawn frames to ffmpeg")
+    parser.add_argument("--export-fps", type=int, default=30)
+    parser.add_argument("--export-workers", type=int, default=2, help="PNG encoder threads")
+    args = parser.parse_args()
+    if args.replay:
+        replay(args.replay, args)
+    else:
+        main(args)
@@ -2,14 +2,19 @@ import colorsys
 import math
 
 class Colour:
+    __slots__ = ("agent",)
+
     def __init__(self, agent):
         self.agent = agent
 
     def get_rgb(self):
         """Get RGB values as tuple (r, g, b) with values 0-255"""
         hue = self.agent.genome.get_trait('colour')  # Stored as hue in [0.0, 1.0]
-        saturation = 0.9
-        value = 0.9
+        return self.hue_to_rgb(hue)
+
+    @staticmethod
+    def hue_to_rgb(hue, saturation=0.9, value=0.9):
+        """RGB (0-255) of a hue in [0.0, 1.0]"""
         r, g, b = colorsys.hsv_to_rgb(hue, saturation, value)
         return (int(r * 255), int(g * 255), int(b * 255))
 
@@ -0,0 +1,70 @@
+"""
+Two-phase (intent/resolve) feeding and predation.
+
+Agents first emit what they want to do as Intent records, all against the
+same snapshot of the world. The resolver then groups intents by target and
+orders each group by (priority, actor id), lower first, where the priority
+is the actor's distance to the target. Finally every effect is applied in
+that order. Outcomes never depend on the order of World.entities, or on
+which tile or worker process produced an intent.
+"""
+from collections import namedtuple
+
+EAT = "eat"
+ATTACK = "attack"
+
+Intent = namedtuple("Intent", "actor target action priority")
+
+
+def collect_intents(agents):
+    """Ask every live agent for its intent (agents return None when idle)"""
+    intents = []
+    for agent in agents:
+        if agent.world is not None:
+            intent = agent.intent()
+            if intent is not None:
+                intents.append(intent)
+    return intents
+
+
+def resolve_claims(intents):
+    """
+    Group intents by target.
+    Returns [(target, [intent, ...]), ...] with targets in id order and each
+    target's intents in settlement order (first = strongest claim).
+    """
+    by_target = {}
+    for intent in intents:
+        target_id = intent.target.id
+        if target_id not in by_target:
+            by_target[target_id] = (intent.target, [])
+        by_target[target_id][1].append(intent)
+    return [
+        (target, sorted(claims, key=lambda i: (i.priority, i.actor.id)))
+        for _, (target, claims) in sorted(by_target.items())
+    ]
+
+
+def apply_intents(world, intents):
+    """
+    Settle and apply a batch of intents.
+    Attacks land first: every predator on a prey hits in turn until it dies.
+    Then each plant goes to the strongest claimant that is still alive.
+    """
+    attacks = [i for i in intents if i.action == ATTACK]
+    meals = [i for i in intents if i.action == EAT]
+
+    with world.profiler.phase("hunting"):
+        for prey, claims in resolve_claims(attacks):
+            for intent in claims:
+                if prey.world is not world:
+                    break
+                if intent.actor.world is world:
+                    intent.actor.attack(prey)
+
+    with world.profiler.phase("feeding"):
+        for plant, claims in resolve_claims(meals):
+            for intent in claims:
+                if intent.actor.world is world and plant.world is world:
+                    intent.actor.eat_plant(plant)
+                    break
@@ -0,0 +1,399 @@
+"""
+Interchangeable implementations of the innermost query loops.
+
+Three backends share one interface:
+  "numba"  - @njit loops over float64 arrays (only if Numba is installed)
+  "numpy"  - vectorised array expressions
+  "python" - plain loops over lists, the reference implementation
+
+The array kernels take coordinate sequences and return plain Python lists
+and scalars whichever backend runs them, so results can be compared
+directly (see benchmarks/check_kernels.py). The entity helpers below them
+are what the simulation calls: they hand batches smaller than
+KERNEL_MIN_BATCH to the Python backend, since converting a handful of
+entities to arrays costs more than the loop itself.
+
+The backend is chosen from config.KERNEL_BACKEND on import ("auto" picks
+the fastest one available) and can be changed with set_backend().
+"""
+import math
+
+import numpy as np
+
+from core import config
+
+try:
+    import numba
+except ImportError:  # Optional dependency
+    numba = None
+
+TWO_PI = 2 * math.pi
+
+
+def _wrap(angle):
+    """Normalize an angle to [-pi, pi)"""
+    return (angle + math.pi) % TWO_PI - math.pi
+
+
+# === Python backend (reference) ===
+
+class _PythonKernels:
+    name = "python"
+
+    @staticmethod
+    def radius_select(xs, ys, x, y, radius):
+        """Indices of the points within radius of (x, y)"""
+        hits = []
+        for i in range(len(xs)):
+            dx = xs[i] - x
+            dy = ys[i] - y
+            if math.sqrt(dx * dx + dy * dy) <= radius:
+                hits.append(i)
+        return hits
+
+    @staticmethod
+    def nearest(xs, ys, x, y):
+        """(index, distance) of the point closest to (x, y); (-1, inf) if none"""
+        best, best_distance = -1, math.inf
+        for i in range(len(xs)):
+            distance = math.hypot(xs[i] - x, ys[i] - y)
+            if distance < best_distance:
+                best, best_distance = i, distance
+        return best, best_distance
+
+    @staticmethod
+    def vision_scan(dxs, dys, heading, eye_angles, half_fov, max_range):
+        """
+        FOV test of many offsets (target - viewer) at once.
+        Returns (indices, distances, relative angles, eye bitmasks) of the
+        targets within max_range seen by at least one eye.
+        """
+        hits, distances, angles, eyes = [], [], [], []
+        for i in range(len(dxs)):
+            dx, dy = dxs[i], dys[i]
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance > max_range:
+                continue
+            relative = _wrap(math.atan2(dy, dx) - heading)
+            mask = 0
+            for eye, eye_angle in enumerate(eye_angles):
+                if abs(_wrap(relative - eye_angle)) <= half_fov:
+                    mask |= 1 << eye
+            if mask:
+                hits.append(i)
+                distances.append(distance)
+                angles.append(relative)
+                eyes.append(mask)
+        return hits, distances, angles, eyes
+
+    @staticmethod
+    def sector_scan(dxs, dys, owners, headings, full, edge, eye_angles, half_fov, max_range, bins):
+        """
+        Batched FOV test for many viewers using angular sector tables.
+        Offset i belongs to viewer owners[i]. Each viewer's relative angles
+        are cut into `bins` sectors; full[v][b] holds the eyes that see all
+        of sector b and edge[v][b] those that see part of it, which are the
+        only ones tested exactly (against eye_angles[v]).
+        Returns (indices, distances, relative angles, eye bitmasks).
+        """
+        width = TWO_PI / bins
+        hits, distances, angles, eyes = [], [], [], []
+        for i in range(len(dxs)):
+            dx, dy = dxs[i], dys[i]
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance > max_range:
+                continue
+            viewer = owners[i]
+            relative = _wrap(math.atan2(dy, dx) - headings[viewer])
+            sector = min(int((relative + math.pi) / width), bins - 1)
+            mask = full[viewer][sector]
+            partial = edge[viewer][sector]
+            if partial:
+                viewer_eyes = eye_angles[viewer]
+                for eye in range(len(viewer_eyes)):
+                    if partial >> eye & 1 and abs(_wrap(relative - viewer_eyes[eye])) <= half_fov:
+                        mask |= 1 << eye
+            if mask:
+                hits.append(i)
+                distances.append(distance)
+                angles.append(relative)
+                eyes.append(mask)
+        return hits, distances, angles, eyes
+
+
+def _sector_tables(full, edge, eye_angles, bins):
+    """Stack per-viewer sector tables (bytes) and eye angles into arrays"""
+    full = np.frombuffer(b"".join(full), dtype=np.uint8).reshape(len(full), bins)
+    edge = np.frombuffer(b"".join(edge), dtype=np.uint8).reshape(len(edge), bins)
+    angles = np.zeros((len(eye_angles), max(map(len, eye_angles), default=0)))
+    for viewer, viewer_eyes in enumerate(eye_angles):
+        angles[viewer, :len(viewer_eyes)] = viewer_eyes
+    return full, edge, angles
+
+
+# === NumPy backend ===
+
+class _NumpyKernels:
+    name = "numpy"
+
+    @staticmethod
+    def radius_select(xs, ys, x, y, radius):
+        dx = np.asarray(xs, dtype=np.float64) - x
+        dy = np.asarray(ys, dtype=np.float64) - y
+        return np.flatnonzero(np.sqrt(dx * dx + dy * dy) <= radius).tolist()
+
+    @staticmethod
+    def nearest(xs, ys, x, y):
+        if len(xs) == 0:
+            return -1, math.inf
+        distances = np.hypot(np.asarray(xs, dtype=np.float64) - x, np.asarray(ys, dtype=np.float64) - y)
+        best = int(np.argmin(distances))
+        return best, float(distances[best])
+
+    @staticmethod
+    def vision_scan(dxs, dys, heading, eye_angles, half_fov, max_range):
+        dx = np.asarray(dxs, dtype=np.float64)
+        dy = np.asarray(dys, dtype=np.float64)
+        distances = np.sqrt(dx * dx + dy * dy)
+        relative = (np.arctan2(dy, dx) - heading + math.pi) % TWO_PI - math.pi
+        masks = np.zeros(len(dx), dtype=np.int64)
+        for eye, eye_angle in enumerate(eye_angles):
+            in_fov = np.abs((relative - eye_angle + math.pi) % TWO_PI - math.pi) <= half_fov
+            masks |= in_fov.astype(np.int64) << eye
+        hits = np.flatnonzero((distances <= max_range) & (masks != 0))
+        return hits.tolist(), distances[hits].tolist(), relative[hits].tolist(), masks[hits].tolist()
+
+    @staticmethod
+    def sector_scan(dxs, dys, owners, headings, full, edge, eye_angles, half_fov, max_range, bins):
+        full, edge, eye_angles = _sector_tables(full, edge, eye_angles, bins)
+        dx = np.asarray(dxs, dtype=np.float64)
+        dy = np.asarray(dys, dtype=np.float64)
+        owners = np.asarray(owners, dtype=np.int64)
+        distances = np.sqrt(dx * dx + dy * dy)
+        relative = (np.arctan2(dy, dx) - np.asarray(headings, dtype=np.float64)[owners] + math.pi) % TWO_PI - math.pi
+        sectors = np.minimum(((relative + math.pi) / (TWO_PI / bins)).astype(np.int64), bins - 1)
+        masks = full[owners, sectors].astype(np.int64)
+        partial = edge[owners, sectors].astype(np.int64)
+
+        # Exact tests only where a sector is partly covered
+        edgy = np.flatnonzero(partial)
+        if len(edgy):
+            viewers = owners[edgy]
+            for eye in range(eye_angles.shape[1]):
+                in_fov = np.abs((relative[edgy] - eye_angles[viewers, eye] + math.pi) % TWO_PI - math.pi) <= half_fov
+                masks[edgy] |= ((partial[edgy] >> eye & 1) & in_fov) << eye
+
+        hits = np.flatnonzero((distances <= max_range) & (masks != 0))
+        return hits.tolist(), distances[hits].tolist(), relative[hits].tolist(), masks[hits].tolist()
+
+
+# === Numba backend ===
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _nb_radius_select(xs, ys, x, y, radius):
+        out = np.empty(len(xs), dtype=np.int64)
+        k = 0
+        for i in range(len(xs)):
+            dx = xs[i] - x
+            dy = ys[i] - y
+            if math.sqrt(dx * dx + dy * dy) <= radius:
+                out[k] = i
+                k += 1
+        return out[:k]
+
+    @numba.njit(cache=True)
+    def _nb_nearest(xs, ys, x, y):
+        best, best_distance = -1, np.inf
+        for i in range(len(xs)):
+            distance = math.hypot(xs[i] - x, ys[i] - y)
+            if distance < best_distance:
+                best, best_distance = i, distance
+        return best, best_distance
+
+    @numba.njit(cache=True)
+    def _nb_vision_scan(dxs, dys, heading, eye_angles, half_fov, max_range):
+        n = len(dxs)
+        hits = np.empty(n, dtype=np.int64)
+        distances = np.empty(n)
+        angles = np.empty(n)
+        eyes = np.empty(n, dtype=np.int64)
+        k = 0
+        for i in range(n):
+            dx, dy = dxs[i], dys[i]
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance > max_range:
+                continue
+            relative = (math.atan2(dy, dx) - heading + math.pi) % TWO_PI - math.pi
+            mask = 0
+            for eye in range(len(eye_angles)):
+                if abs((relative - eye_angles[eye] + math.pi) % TWO_PI - math.pi) <= half_fov:
+                    mask |= 1 << eye
+            if mask:
+                hits[k] = i
+                distances[k] = distance
+                angles[k] = relative
+                eyes[k] = mask
+                k += 1
+        return hits[:k], distances[:k], angles[:k], eyes[:k]
+
+    @numba.njit(cache=True)
+    def _nb_sector_scan(dxs, dys, owners, headings, full, edge, eye_angles, half_fov, max_range, bins):
+        n = len(dxs)
+        width = TWO_PI / bins
+        hits = np.empty(n, dtype=np.int64)
+        distances = np.empty(n)
+        angles = np.empty(n)
+        eyes = np.empty(n, dtype=np.int64)
+        k = 0
+        for i in range(n):
+            dx, dy = dxs[i], dys[i]
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance > max_range:
+                continue
+            viewer = owners[i]
+            relative = (math.atan2(dy, dx) - headings[viewer] + math.pi) % TWO_PI - math.pi
+            sector = min(int((relative + math.pi) / width), bins - 1)
+            mask = np.int64(full[viewer, sector])
+            partial = np.int64(edge[viewer, sector])
+            if partial:
+                for eye in range(eye_angles.shape[1]):
+                    if partial >> eye & 1:
+                        if abs((relative - eye_angles[viewer, eye] + math.pi) % TWO_PI - math.pi) <= half_fov:
+                            mask |= 1 << eye
+            if mask:
+                hits[k] = i
+                distances[k] = distance
+                angles[k] = relative
+                eyes[k] = mask
+                k += 1
+        return hits[:k], distances[:k], angles[:k], eyes[:k]
+
+
+class _NumbaKernels:
+    name = "numba"
+
+    @staticmethod
+    def radius_select(xs, ys, x, y, radius):
+        return _nb_radius_select(np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64),
+                                 float(x), float(y), float(radius)).tolist()
+
+    @staticmethod
+    def nearest(xs, ys, x, y):
+        best, distance = _nb_nearest(np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64),
+                                     float(x), float(y))
+        return int(best), float(distance)
+
+    @staticmethod
+    def vision_scan(dxs, dys, heading, eye_angles, half_fov, max_range):
+        hits, distances, angles, eyes = _nb_vision_scan(
+            np.asarray(dxs, dtype=np.float64), np.asarray(dys, dtype=np.float64), float(heading),
+            np.asarray(eye_angles, dtype=np.float64), float(half_fov), float(max_range)
+        )
+        return hits.tolist(), distances.tolist(), angles.tolist(), eyes.tolist()
+
+    @staticmethod
+    def sector_scan(dxs, dys, owners, headings, full, edge, eye_angles, half_fov, max_range, bins):
+        full, edge, eye_angles = _sector_tables(full, edge, eye_angles, bins)
+        hits, distances, angles, eyes = _nb_sector_scan(
+            np.asarray(dxs, dtype=np.float64), np.asarray(dys, dtype=np.float64),
+            np.asarray(owners, dtype=np.int64), np.asarray(headings, dtype=np.float64),
+            full, edge, eye_angles, float(half_fov), float(max_range), int(bins)
+        )
+        return hits.tolist(), distances.tolist(), angles.tolist(), eyes.tolist()
+
+
+BACKENDS = {"python": _PythonKernels, "numpy": _NumpyKernels}
+if numba is not None:
+    BACKENDS["numba"] = _NumbaKernels
+
+_python = _PythonKernels
+_active = _PythonKernels
+_min_batch = config.KERNEL_MIN_BATCH
+
+
+def available_backends():
+    return list(BACKENDS)
+
+
+def backend_name():
+    return _active.name
+
+
+def get_backend(name):
+    """Kernel namespace of one backend (for comparisons and benchmarks)"""
+    if name not in BACKENDS:
+        raise ValueError(f"Kernel backend {name!r} is not available (have: {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+
+def set_backend(name="auto", min_batch=None):
+    """Select the backend used by the simulation ("auto" = fastest available)"""
+    global _active, _min_batch
+    if name == "auto":
+        name = "numba" if "numba" in BACKENDS else "numpy"
+    _active = get_backend(name)
+    if min_batch is not None:
+        _min_batch = min_batch
+    return _active.name
+
+
+# === Entity helpers used by the simulation ===
+
+def entities_in_radius(entities, x, y, radius):
+    """The entities within radius of (x, y), in their original order"""
+    if len(entities) < _min_batch or _active is _python:
+        result = []
+        for entity in entities:
+            dx = entity.x - x
+            dy = entity.y - y
+            if math.sqrt(dx * dx + dy * dy) <= radius:
+                result.append(entity)
+        return result
+    hits = _active.radius_select([e.x for e in entities], [e.y for e in entities], x, y, radius)
+    return [entities[i] for i in hits]
+
+
+def points(values):
+    """Coordinates in the form points_in_radius handles fastest (array or list)"""
+    if len(values) < _min_batch or _active is _python:
+        return list(values)
+    return np.asarray(values, dtype=np.float64)
+
+
+def points_in_radius(xs, ys, x, y, radius):
+    """Indices of the points (from points()) within radius of (x, y)"""
+    kernels = _python if len(xs) < _min_batch else _active
+    return kernels.radius_select(xs, ys, x, y, radius)
+
+
+def nearest_entity(entities, x, y):
+    """(closest entity, distance) to (x, y); (None, inf) if there are none"""
+    if len(entities) < _min_batch:
+        kernels = _python
+    else:
+        kernels = _active
+    best, distance = kernels.nearest([e.x for e in entities], [e.y for e in entities], x, y)
+    return (entities[best] if best >= 0 else None), distance
+
+
+def scan_sectors(dxs, dys, owners, headings, full, edge, eye_angles, half_fov, max_range, bins):
+    """sector_scan on the active backend (Python for small batches)"""
+    kernels = _python if len(dxs) < _min_batch else _active
+    return kernels.sector_scan(dxs, dys, owners, headings, full, edge, eye_angles, half_fov, max_range, bins)
+
+
+def scan_field_of_view(entities, x, y, heading, eye_angles, half_fov, max_range):
+    """
+    FOV test of entities seen from (x, y). Returns (entities, distances,
+    relative angles, eye bitmasks) of those seen by at least one eye.
+    """
+    kernels = _python if len(entities) < _min_batch else _active
+    hits, distances, angles, eyes = kernels.vision_scan(
+        [e.x - x for e in entities], [e.y - y for e in entities],
+        heading, eye_angles, half_fov, max_range
+    )
+    return [entities[i] for i in hits], distances, angles, eyes
+
+
+set_backend(config.KERNEL_BACKEND)
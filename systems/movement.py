@@ -0,0 +1,133 @@
+"""
+Batched movement with collision resolution.
+
+While a world step runs, agents only propose their moves
+(World.propose_move). apply_moves then settles every proposal at once:
+close pairs of movers are found by hashing the proposed positions into
+grid cells (one sort plus a few binary searches), and a mover that would
+collide stays where it was. Of two colliding movers the one that updated
+later is held back, as if the moves had been made one by one.
+
+Collision modes (SimConfig.movement_collisions):
+  "overlap" - bodies are points; moves landing within OVERLAP of another
+              mover are rejected (the old per-move is_occupied check)
+  "bodies"  - bodies are discs with the diameter from Size.get_size
+  "none"    - no collisions, every move is applied
+A pair that already overlapped before moving may still move apart.
+"""
+import numpy as np
+
+from systems.size import Size
+
+OVERLAP = 0.01
+
+# The forward half of a cell's 3x3 neighbourhood: each pair of cells once
+_NEIGHBOUR_CELLS = ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def close_pairs(xs, ys, reach, cell, groups=None):
+    """
+    Index arrays (a, b), a < b, of the points closer than reach[a] + reach[b].
+    `cell` must be at least the largest such sum. With `groups` (an int
+    per point, e.g. a world id) only points of the same group pair up.
+    """
+    n = len(xs)
+    cx = np.floor(xs / cell).astype(np.int64)
+    cy = np.floor(ys / cell).astype(np.int64)
+    stride = int(cy.max()) + 3 if n else 1
+    if groups is not None and n:
+        # Each group's cells get their own columns, with a free one in between
+        cx = cx + np.asarray(groups, dtype=np.int64) * (int(cx.max()) + 3)
+    keys = cx * stride + (cy + 1)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    firsts, seconds = [], []
+    for ox, oy in _NEIGHBOUR_CELLS:
+        target = (cx + ox) * stride + (cy + 1 + oy)
+        lo = np.searchsorted(sorted_keys, target, "left")
+        counts = np.searchsorted(sorted_keys, target, "right") - lo
+        total = int(counts.sum())
+        if not total:
+            continue
+        # Every (point, occupant of its neighbour cell) combination
+        starts = np.cumsum(counts) - counts
+        first = np.repeat(np.arange(n), counts)
+        second = order[np.repeat(lo, counts) + np.arange(total) - np.repeat(starts, counts)]
+        if (ox, oy) == (0, 0):
+            keep = first < second
+            first, second = first[keep], second[keep]
+        firsts.append(first)
+        seconds.append(second)
+    if not firsts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    first, second = np.concatenate(firsts), np.concatenate(seconds)
+    limit = reach[first] + reach[second]
+    close = np.hypot(xs[first] - xs[second], ys[first] - ys[second]) < limit
+    first, second = first[close], second[close]
+    return np.minimum(first, second), np.maximum(first, second)
+
+
+def blocked_moves(old_xs, old_ys, new_xs, new_ys, reach, groups=None):
+    """
+    Boolean mask of the moves to reject (movers in update order). Only
+    pairs that end up both closer than their reach and closer than they
+    started conflict; the later mover of each such pair is held back,
+    repeating until no held-back mover causes a new conflict. Movers in
+    different `groups` never collide.
+    """
+    n = len(new_xs)
+    blocked = np.zeros(n, dtype=bool)
+    if n < 2:
+        return blocked
+    cell = max(2 * float(reach.max()), OVERLAP)
+    xs, ys = new_xs.copy(), new_ys.copy()
+    while True:
+        a, b = close_pairs(xs, ys, reach, cell, groups)
+        if len(a):
+            before = np.hypot(old_xs[a] - old_xs[b], old_ys[a] - old_ys[b])
+            after = np.hypot(xs[a] - xs[b], ys[a] - ys[b])
+            conflict = (after < before) & ~(blocked[a] & blocked[b])
+            a, b = a[conflict], b[conflict]
+        if not len(a):
+            return blocked
+        # Hold back the later mover, or the other one if that is already held
+        held = np.where(blocked[b], a, b)
+        blocked[held] = True
+        xs[held] = old_xs[held]
+        ys[held] = old_ys[held]
+
+
+def body_reach(world, entities):
+    """Collision radius of each mover under the world's collision mode"""
+    if world.config.movement_collisions == "bodies":
+        return np.array([Size(e).get_size() / 2 for e in entities], dtype=np.float64)
+    return np.full(len(entities), OVERLAP / 2)
+
+
+def apply_moves(world, moves):
+    """Settle a batch of (entity, new_x, new_y) proposals; returns how many were blocked"""
+    moves = [move for move in moves if move[0].world is world]
+    if not moves:
+        return 0
+    entities = [move[0] for move in moves]
+    new_xs = np.array([move[1] for move in moves], dtype=np.float64) % world.width
+    new_ys = np.array([move[2] for move in moves], dtype=np.float64) % world.height
+
+    if world.config.movement_collisions == "none":
+        blocked = np.zeros(len(moves), dtype=bool)
+    else:
+        old_xs = np.array([e.x for e in entities], dtype=np.float64)
+        old_ys = np.array([e.y for e in entities], dtype=np.float64)
+        blocked = blocked_moves(old_xs, old_ys, new_xs, new_ys, body_reach(world, entities))
+
+    for entity, x, y, held in zip(entities, new_xs.tolist(), new_ys.tolist(), blocked.tolist()):
+        if not held:
+            world._relocate(entity, x, y)
+    n_blocked = int(np.count_nonzero(blocked))
+    if world.profiler.enabled:
+        world.profiler.count("moves", len(moves))
+        world.profiler.count("blocked_moves", n_blocked)
+    return n_blocked
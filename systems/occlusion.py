@@ -0,0 +1,198 @@
+import math
+import numpy as np
+
+class OcclusionGrid:
+    """
+    Line-of-sight queries against a static occupancy grid (1 = rock, 0 = open).
+    Rays are marched tile by tile (DDA) between tile centres, so visibility is
+    resolved at tile resolution. Pairs whose bounding box holds no rock are
+    accepted straight from a summed-area table, the rest are cached per pair
+    of tiles; the cache is only dropped when the grid itself changes.
+    """
+
+    def __init__(self, rock_map, tile_size, max_cache_size=1 << 20, batch_threshold=48):
+        self.tile_size = float(tile_size)
+        self.max_cache_size = max_cache_size
+        self.batch_threshold = batch_threshold  # Rays per call before switching to numpy
+        self.set_rock_map(rock_map)
+
+    def set_rock_map(self, rock_map):
+        """Replace the occupancy grid (invalidates the visibility cache)"""
+        self.grid = np.ascontiguousarray(rock_map, dtype=np.uint8)
+        self.rows, self.cols = self.grid.shape
+        self._flat = self.grid.ravel()
+        self._flat_bytes = self.grid.tobytes()  # Faster scalar indexing
+        self._n_cells = self.rows * self.cols
+        self._build_summed_area()
+        self._cache = {}
+
+    def set_tile(self, row, col, blocked):
+        """Change a single tile (invalidates the visibility cache)"""
+        self.grid[row, col] = 1 if blocked else 0
+        self._flat_bytes = self.grid.tobytes()
+        self._build_summed_area()
+        self._cache.clear()
+
+    def _build_summed_area(self):
+        # sat[r, c] = number of rock tiles in grid[:r, :c]
+        self._sat = np.zeros((self.rows + 1, self.cols + 1), dtype=np.int32)
+        self._sat[1:, 1:] = self.grid.cumsum(axis=0).cumsum(axis=1)
+
+    def _rocks_in_box(self, r0, c0, r1, c1):
+        """Rock count in the inclusive tile box [r0..r1] x [c0..c1] (vectorised)"""
+        sat = self._sat
+        return sat[r1 + 1, c1 + 1] - sat[r0, c1 + 1] - sat[r1 + 1, c0] + sat[r0, c0]
+
+    def is_blocked(self, x, y):
+        """Check if a world position lies on a rock tile"""
+        return bool(self._flat[self._cell_index(x, y)])
+
+    def _cell_index(self, x, y):
+        col = min(max(int(x // self.tile_size), 0), self.cols - 1)
+        row = min(max(int(y // self.tile_size), 0), self.rows - 1)
+        return row * self.cols + col
+
+    def _cell_indices(self, xs, ys):
+        cols = np.clip((np.asarray(xs, dtype=float) // self.tile_size).astype(np.int64), 0, self.cols - 1)
+        rows = np.clip((np.asarray(ys, dtype=float) // self.tile_size).astype(np.int64), 0, self.rows - 1)
+        return rows * self.cols + cols
+
+    def visible_from(self, x, y, xs, ys):
+        """
+        Batched visibility test from one viewer at (x, y) to many targets.
+        Returns a boolean array, True where the target is not hidden by rock.
+        """
+        targets = self._cell_indices(xs, ys)
+        n = len(targets)
+        result = np.ones(n, dtype=bool)
+        if n == 0:
+            return result
+
+        origin = self._cell_index(x, y)
+        row, col = divmod(origin, self.cols)
+        rows, cols = np.divmod(targets, self.cols)
+
+        # Fast accept: nothing can block a ray whose bounding box has no rock
+        r_lo = np.minimum(rows, row)
+        r_hi = np.maximum(rows, row)
+        c_lo = np.minimum(cols, col)
+        c_hi = np.maximum(cols, col)
+        if self._rocks_in_box(r_lo.min(), c_lo.min(), r_hi.max(), c_hi.max()) == 0:
+            return result
+        pending = np.flatnonzero(self._rocks_in_box(r_lo, c_lo, r_hi, c_hi) > 0)
+        if len(pending) == 0:
+            return result
+
+        # Symmetric key: the raymarch is symmetric, LOS(a, b) == LOS(b, a)
+        pending_cells = targets[pending]
+        lo = np.minimum(pending_cells, origin)
+        hi = np.maximum(pending_cells, origin)
+        keys = (lo * self._n_cells + hi).tolist()
+
+        cache = self._cache
+        misses = []
+        for i, key in enumerate(keys):
+            seen = cache.get(key)
+            if seen is None:
+                misses.append(i)
+            elif not seen:
+                result[pending[i]] = False
+
+        if misses:
+            miss_cells = pending_cells[misses]
+            if len(misses) < self.batch_threshold:
+                # Array overhead dominates for a handful of rays
+                computed = [self._line_of_sight_scalar(origin, cell) for cell in miss_cells.tolist()]
+            else:
+                origins = np.full(len(misses), origin, dtype=np.int64)
+                computed = self.line_of_sight_cells(origins, miss_cells).tolist()
+            result[pending[misses]] = computed
+
+            if len(cache) + len(misses) > self.max_cache_size:
+                cache.clear()
+            for i, seen in zip(misses, computed):
+                cache[keys[i]] = seen
+
+        return result
+
+    def line_of_sight_cells(self, start_cells, end_cells):
+        """
+        Vectorised grid raymarch (Amanatides-Woo DDA) between tile centres.
+        The start and end tiles themselves never block, so agents standing on
+        rock can still see and be seen. Rays are always marched from the
+        lower cell index to the higher (ties step the row first, so the
+        direction matters), making LOS(a, b) == LOS(b, a).
+        """
+        start_cells = np.asarray(start_cells, dtype=np.int64)
+        end_cells = np.asarray(end_cells, dtype=np.int64)
+        start_cells, end_cells = np.minimum(start_cells, end_cells), np.maximum(start_cells, end_cells)
+        r, c = np.divmod(start_cells, self.cols)
+        r1, c1 = np.divmod(end_cells, self.cols)
+
+        dr = r1 - r
+        dc = c1 - c
+        step_r = np.sign(dr)
+        step_c = np.sign(dc)
+
+        # Parametric distance between tile boundaries along each axis
+        with np.errstate(divide='ignore'):
+            delta_r = np.where(dr != 0, 1.0 / np.abs(dr), np.inf)
+            delta_c = np.where(dc != 0, 1.0 / np.abs(dc), np.inf)
+        t_max_r = 0.5 * delta_r
+        t_max_c = 0.5 * delta_c
+
+        remaining = np.abs(dr) + np.abs(dc)
+        visible = np.ones(len(start_cells), dtype=bool)
+        flat = self._flat
+        cols = self.cols
+
+        for _ in range(int(remaining.max(initial=0))):
+            active = (remaining > 0) & visible
+            if not active.any():
+                break
+
+            move_c = active & (t_max_c < t_max_r)
+            move_r = active & ~move_c
+
+            c += np.where(move_c, step_c, 0)
+            t_max_c = np.where(move_c, t_max_c + delta_c, t_max_c)
+            r += np.where(move_r, step_r, 0)
+            t_max_r = np.where(move_r, t_max_r + delta_r, t_max_r)
+            remaining -= active
+
+            # The end tile is excluded from the blocking test
+            blocked = active & (remaining > 0) & (flat[r * cols + c] != 0)
+            visible &= ~blocked
+
+        return visible
+
+    def _line_of_sight_scalar(self, start_cell, end_cell):
+        """Single-ray version of line_of_sight_cells"""
+        if end_cell < start_cell:
+            start_cell, end_cell = end_cell, start_cell
+        cols = self.cols
+        r, c = divmod(start_cell, cols)
+        r1, c1 = divmod(end_cell, cols)
+        dr = r1 - r
+        dc = c1 - c
+        step_r = 1 if dr > 0 else -1
+        step_c = 1 if dc > 0 else -1
+        delta_r = 1.0 / abs(dr) if dr else math.inf
+        delta_c = 1.0 / abs(dc) if dc else math.inf
+        t_max_r = 0.5 * delta_r
+        t_max_c = 0.5 * delta_c
+        flat = self._flat_bytes
+
+        for _ in range(abs(dr) + abs(dc) - 1):
+            if t_max_c < t_max_r:
+                c += step_c
+                t_max_c += delta_c
+            else:
+                r += step_r
+                t_max_r += delta_r
+            if flat[r * cols + c]:
+                return False
+        return True
+
+    def clear_cache(self):
+        self._cache.clear()
@@ -1,5 +1,7 @@
 import math
 class Size:
+    __slots__ = ("agent", "base_size", "scale_range")
+
     def __init__(self, agent, base_size=5, scale_range=(0.5, 1.5)):
         self.agent = agent
         self.base_size = base_size
@@ -12,10 +14,14 @@ class Size:
         return 0.5  # default if no genome or trait
 
     def get_size(self):
-        trait = self.get_trait_value()
-        min_scale, max_scale = self.scale_range
+        return self.from_trait(self.get_trait_value(), self.base_size, self.scale_range)
+
+    @staticmethod
+    def from_trait(trait, base_size=5, scale_range=(0.5, 1.5)):
+        """Size for a size trait value in [0.0, 1.0]"""
+        min_scale, max_scale = scale_range
         scale = min_scale + trait * (max_scale - min_scale)
-        return int(self.base_size * scale)
+        return int(base_size * scale)
     def get_health_modifier(self):
         if not hasattr(self.agent, 'size'):
             return 1.0  # default if no size info
@@ -1,123 +1,220 @@
 import math
 import random
+from array import array
+
+import numpy as np
+
+from systems import kernels
+
+
+def is_binocular(mask):
+    """True if an eye bitmask has at least two eyes (depth from binocular overlap)"""
+    return bin(mask).count('1') >= 2
+
+
+class VisibleSet:
+    """
+    What one agent currently sees, stored as parallel compact arrays:
+    the entities, perceived and true distances, angles relative to the
+    agent's heading, and a bitmask of the eyes that see each entity.
+    """
+    __slots__ = ('entities', 'distances', 'true_distances', 'angles', 'eyes')
+
+    def __init__(self, entities=(), distances=(), true_distances=(), angles=(), eyes=()):
+        self.entities = tuple(entities)
+        self.distances = array('f', distances)
+        self.true_distances = array('f', true_distances)
+        self.angles = array('f', angles)
+        self.eyes = bytes(eyes)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def is_binocular(self, i):
+        """True if two or more eyes see entity i"""
+        return is_binocular(self.eyes[i])
+
+    def seeing_eyes(self, i):
+        mask = self.eyes[i]
+        return [eye for eye in range(mask.bit_length()) if mask >> eye & 1]
+
+    def records(self):
+        """One dict per visible entity (handy for debugging, not for hot paths)"""
+        return [
+            {
+                'entity': entity,
+                'distance': self.distances[i],
+                'true_distance': self.true_distances[i],
+                'angle': self.angles[i],
+                'type': getattr(entity, 'type', 'Unknown'),
+                'binocular': self.is_binocular(i),
+                'seeing_eyes': self.seeing_eyes(i),
+            }
+            for i, entity in enumerate(self.entities)
+        ]
+
+
+NOTHING_VISIBLE = VisibleSet()  # Shared by agents that haven't looked yet
+
+
+def eye_angles(n_eyes, eye_pos):
+    """
+    Eye directions relative to the heading, spread evenly from
+    -eye_pos*pi to +eye_pos*pi (0 = all forward, 0.5 = to the sides,
+    1 = backward). A single eye looks straight ahead.
+    """
+    if n_eyes == 1:
+        return (0.0,)
+    spread = eye_pos * math.pi
+    return tuple(-spread + 2 * spread * i / (n_eyes - 1) for i in range(n_eyes))
+
+
+_SECTOR_MARGIN = 1e-9  # Sectors this close to an FOV edge count as partly covered
+
+
+class EyeLayout:
+    """
+    One agent's eyes: their angles, and for each angular sector (relative
+    to the heading) the bitmask of eyes that see all of it (`full`) or
+    only part of it (`edge`). Only edge eyes need an exact angle test.
+    """
+    __slots__ = ('angles', 'full', 'edge')
+
+    def __init__(self, angles, half_fov, sectors):
+        self.angles = tuple(angles)
+        width = 2 * math.pi / sectors
+        centres = -math.pi + (np.arange(sectors) + 0.5) * width
+        full = np.zeros(sectors, dtype=np.uint8)
+        edge = np.zeros(sectors, dtype=np.uint8)
+        for eye, angle in enumerate(self.angles):
+            # Angular distance from the eye's axis to each sector's centre
+            offset = np.abs((centres - angle + math.pi) % (2 * math.pi) - math.pi)
+            inside = offset + width / 2 <= half_fov - _SECTOR_MARGIN
+            touching = ~inside & (offset - width / 2 <= half_fov + _SECTOR_MARGIN)
+            full |= inside.astype(np.uint8) << eye
+            edge |= touching.astype(np.uint8) << eye
+        self.full = full.tobytes()
+        self.edge = edge.tobytes()
+
 
 class VisionSystem:
     """
     Efficient vision system for agents with binocular depth perception.
-    Updates every 3 steps for performance.
+    Each agent has between min_eyes and max_eyes eyes (from its n_eyes
+    trait), placed by its eye_pos trait. Each agent is refreshed every
+    `refresh_interval` steps; the world's scheduler staggers agents across
+    ticks to spread the load, and each tick's cohort is scanned in one
+    batched kernel call.
     """
     
-    def __init__(self, n_eyes=2, eye_fov=60, max_vision_range=100):
-        self.n_eyes = n_eyes
+    def __init__(self, min_eyes=1, max_eyes=4, eye_fov=60, max_vision_range=100,
+                 refresh_interval=3, sectors=72):
+        self.min_eyes = min_eyes
+        self.max_eyes = max_eyes
         self.eye_fov = math.radians(eye_fov)  # Convert to radians
         self.max_vision_range = max_vision_range
+        self.refresh_interval = refresh_interval
+        self.sectors = sectors  # Angular bins of the per-agent eye lookup tables
         
     def update_agent_vision(self, agent):
-        """Update agent's vision if it's time (every 3 steps)"""
-        if not hasattr(agent, 'vision_step_counter'):
-            agent.vision_step_counter = 0
-            agent.visible_entities = []
-            
-        agent.vision_step_counter += 1
-        
-        if agent.vision_step_counter >= 3:
-            agent.vision_step_counter = 0
-            agent.visible_entities = self.get_visible_entities(agent)
+        """Refresh the agent's visible entities (the scheduler decides when)"""
+        self.refresh([agent])
+
+    def refresh(self, agents):
+        """Refresh the visible entities of a cohort of agents in one batched scan"""
+        for agent, visible in zip(agents, self._scan(agents)):
+            agent.visible_entities = visible
+
+    def first_refresh(self, agent, tick):
+        """Tick of an agent's first refresh after being added at `tick`, staggered by id"""
+        return tick + 1 + agent.id % self.refresh_interval
+
+    def eye_count(self, agent):
+        """Number of eyes encoded by the agent's n_eyes trait"""
+        span = self.max_eyes - self.min_eyes
+        return self.min_eyes + int(round(agent.genome.get_trait('n_eyes') * span))
+
+    def eye_layout(self, agent):
+        """The agent's EyeLayout (computed once, the genome never changes)"""
+        layout = agent.eye_layout
+        if layout is None:
+            angles = eye_angles(self.eye_count(agent), agent.genome.get_trait('eye_pos'))
+            layout = agent.eye_layout = EyeLayout(angles, self.eye_fov / 2, self.sectors)
+        return layout
             
     def get_visible_entities(self, agent):
-        """Get all entities visible to the agent"""
-        if not agent.world:
-            return []
-            
-        # Get all entities within max vision range using spatial hash
-        nearby_entities = agent.world.get_entities_in_radius(
-            agent.x, agent.y, self.max_vision_range
-        )
-        
-        # Remove self from candidates
-        nearby_entities = [e for e in nearby_entities if e != agent]
-        
-        visible_entities = []
-        eye_positions = self._get_eye_positions(agent)
-        
-        for entity in nearby_entities:
-            # Calculate relative position
-            dx = entity.x - agent.x
-            dy = entity.y - agent.y
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance > self.max_vision_range:
+        """Get all entities visible to the agent as a VisibleSet"""
+        return self._scan([agent])[0]
+
+    def _scan(self, agents):
+        """VisibleSets of several agents, with one kernel call for all their candidates"""
+        candidates, dxs, dys, owners = [], [], [], []
+        headings, full, edge, angles = [], [], [], []
+        for viewer, agent in enumerate(agents):
+            layout = self.eye_layout(agent)
+            headings.append(agent.angle)
+            full.append(layout.full)
+            edge.append(layout.edge)
+            angles.append(layout.angles)
+            if not agent.world:
                 continue
-                
-            # Calculate angle relative to agent's facing direction
-            entity_angle = math.atan2(dy, dx)
-            relative_angle = self._normalize_angle(entity_angle - agent.angle)
-            
-            # Check which eyes can see this entity
-            seeing_eyes = []
-            for eye_idx, eye_angle in enumerate(eye_positions):
-                if self._is_in_fov(relative_angle, eye_angle, self.eye_fov):
-                    seeing_eyes.append(eye_idx)
-                    
-            if seeing_eyes:
-                # Entity is visible to at least one eye
-                binocular_vision = len(seeing_eyes) == 2
-                
-                # Apply depth perception noise
-                perceived_distance = self._apply_depth_noise(
-                    distance, binocular_vision
-                )
-                
-                visible_entities.append({
-                    'entity': entity,
-                    'distance': perceived_distance,
-                    'true_distance': distance,  # For debugging
-                    'angle': relative_angle,
-                    'type': getattr(entity, 'type', 'Unknown'),
-                    'binocular': binocular_vision,
-                    'seeing_eyes': seeing_eyes
-                })
-                
-        return visible_entities
+            # Everything within vision range, except the agent itself
+            x, y = agent.x, agent.y
+            nearby = [e for e in agent.world.neighbours_of(agent, self.max_vision_range) if e is not agent]
+            candidates.extend(nearby)
+            dxs.extend([e.x - x for e in nearby])
+            dys.extend([e.y - y for e in nearby])
+            owners.extend([viewer] * len(nearby))
+
+        hits, true_distances, relative, eyes = kernels.scan_sectors(
+            dxs, dys, owners, headings, full, edge, angles,
+            self.eye_fov / 2, self.max_vision_range, self.sectors
+        )
+
+        # Hits come back in candidate order, so each agent's are contiguous
+        results = []
+        start = 0
+        for viewer, agent in enumerate(agents):
+            end = start
+            while end < len(hits) and owners[hits[end]] == viewer:
+                end += 1
+            results.append(self._visible_set(
+                agent, [candidates[i] for i in hits[start:end]],
+                true_distances[start:end], relative[start:end], eyes[start:end]
+            ))
+            start = end
+        return results
+
+    def _visible_set(self, agent, entities, true_distances, angles, eyes):
+        """Add depth noise and line-of-sight culling to one agent's raw hits"""
+        # Apply depth perception noise (binocular = seen by two or more eyes)
+        distances = [
+            self._apply_depth_noise(distance, is_binocular(seeing))
+            for distance, seeing in zip(true_distances, eyes)
+        ]
+
+        # Drop anything hidden behind rocks (one batched raymarch per agent)
+        occlusion = getattr(agent.world, 'occlusion', None)
+        if occlusion is not None and entities:
+            mask = occlusion.visible_from(
+                agent.x, agent.y,
+                [e.x for e in entities],
+                [e.y for e in entities]
+            )
+            keep = [i for i, seen in enumerate(mask) if seen]
+            entities = [entities[i] for i in keep]
+            distances = [distances[i] for i in keep]
+            true_distances = [true_distances[i] for i in keep]
+            angles = [angles[i] for i in keep]
+            eyes = [eyes[i] for i in keep]
+
+        if not entities:
+            return NOTHING_VISIBLE
+        return VisibleSet(entities, distances, true_distances, angles, eyes)
     
     def _get_eye_positions(self, agent):
-        """Get eye positions based on eye_pos trait"""
-        eye_pos = agent.genome.get_trait('eye_pos')
-        
-        if self.n_eyes == 2:
-            # Calculate eye angles based on eye_pos
-            # 0.0 = both eyes forward (0°, 0°)
-            # 0.5 = eyes on sides (-90°, 90°)  
-            # 1.0 = eyes backward (-180°, 180°)
-            
-            # Linear interpolation from 0 to π radians (0° to 180°)
-            max_angle = eye_pos * math.pi
-            
-            eye1_angle = -max_angle  # Left eye
-            eye2_angle = max_angle   # Right eye
-                
-            return [eye1_angle, eye2_angle]
-        else:
-            # For future expansion - distribute eyes evenly
-            eye_angles = []
-            for i in range(self.n_eyes):
-                angle = (2 * math.pi * i) / self.n_eyes
-                eye_angles.append(angle)
-            return eye_angles
-    
-    def _is_in_fov(self, entity_angle, eye_angle, fov):
-        """Check if entity is within eye's field of view"""
-        # Calculate the difference between entity angle and eye angle
-        angle_diff = self._normalize_angle(entity_angle - eye_angle)
-        return abs(angle_diff) <= fov / 2
-    
-    def _normalize_angle(self, angle):
-        """Normalize angle to [-π, π]"""
-        while angle > math.pi:
-            angle -= 2 * math.pi
-        while angle < -math.pi:
-            angle += 2 * math.pi
-        return angle
+        """Get eye angles (relative to the heading) from the n_eyes and eye_pos traits"""
+        return list(self.eye_layout(agent).angles)
     
     def _apply_depth_noise(self, true_distance, binocular_vision):
         """Apply biologically-inspired depth perception noise"""
@@ -142,41 +239,32 @@ class VisionSystem:
         Format vision data for neural network input.
         Returns normalized vectors ready for NN processing.
         """
-        if not hasattr(agent, 'visible_entities'):
-            return {'distances': [], 'angles': [], 'types': []}
-            
-        distances = []
-        angles = []
-        types = []
-        
-        for entity_data in agent.visible_entities:
-            # Normalize distance (0 = very close, 1 = max range)
-            norm_distance = min(1.0, entity_data['distance'] / self.max_vision_range)
-            distances.append(norm_distance)
-            
-            # Normalize angle (-1 = left, 0 = forward, 1 = right)
-            norm_angle = entity_data['angle'] / math.pi
-            angles.append(norm_angle)
-            
-            # One-hot encode types
-            entity_type = entity_data['type']
-            type_vector = [0, 0, 0]  # [prey, predator, plant]
-            if entity_type == 'Prey':
-                type_vector[0] = 1
-            elif entity_type == 'Predator':
-                type_vector[1] = 1
-            elif entity_type == 'Plant':
-                type_vector[2] = 1
-            types.append(type_vector)
-            
+        visible = agent.visible_entities
+        if not visible:
+            return {'distances': [], 'angles': [], 'types': [], 'binocular': []}
+
+        # Normalize distance (0 = very close, 1 = max range)
+        max_range = self.max_vision_range
+        distances = [min(1.0, d / max_range) for d in visible.distances]
+
+        # Normalize angle (-1 = left, 0 = forward, 1 = right)
+        angles = [a / math.pi for a in visible.angles]
+
+        # One-hot encode types [prey, predator, plant]
+        types = [_TYPE_VECTORS.get(getattr(e, 'type', None), _NO_TYPE) for e in visible.entities]
+
         return {
             'distances': distances,
             'angles': angles,
             'types': types,
-            'binocular': [e['binocular'] for e in agent.visible_entities]
+            'binocular': [visible.is_binocular(i) for i in range(len(visible))]
         }
 
 
+_TYPE_VECTORS = {'Prey': (1, 0, 0), 'Predator': (0, 1, 0), 'Plant': (0, 0, 1)}
+_NO_TYPE = (0, 0, 0)
+
+
 # Global vision system instance
 vision_system = VisionSystem()
 
@@ -0,0 +1,35 @@
+"""Every kernel backend must agree with the Python reference (see benchmarks.check_kernels)"""
+import random
+
+import pytest
+
+from benchmarks.check_kernels import compare, random_case
+from systems import kernels
+
+CASES = 300
+
+
+def _mismatches(backend, cases=CASES, seed=0):
+    rng = random.Random(seed)
+    reference = kernels.get_backend("python")
+    counts = {}
+    for _ in range(cases):
+        for kernel in compare(reference, backend, random_case(rng)):
+            counts[kernel] = counts.get(kernel, 0) + 1
+    return counts
+
+
+@pytest.mark.parametrize("name", ["python", "numpy", "numba"])
+def test_backend_matches_python(name):
+    if name not in kernels.available_backends():
+        pytest.skip(f"{name} backend not available")
+    assert _mismatches(kernels.get_backend(name)) == {}
+
+
+def test_set_backend_auto_prefers_compiled():
+    previous = kernels.backend_name()
+    try:
+        expected = "numba" if "numba" in kernels.available_backends() else "numpy"
+        assert kernels.set_backend("auto") == expected
+    finally:
+        kernels.set_backend(previous)